@@ -0,0 +1,122 @@
+"""
+Event-loop lag under concurrent thank traffic.
+
+Runs the same burst of simulated thank handlers twice: once calling a blocking
+ThanksDB-like object directly (the old behaviour), then through AsyncThanksDB.
+A probe task measures how late the event loop wakes it up while the burst runs.
+
+Usage: python -m benchmarks.event_loop_lag [--messages 200] [--latency-ms 5]
+"""
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+from bot.database import AsyncThanksDB
+
+
+class SlowDB:
+    """Stand-in for ThanksDB: one lock, a fixed round-trip latency per call."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        with self._lock:
+            time.sleep(self.latency)
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def insert(self, table, data):
+        self._round_trip()
+
+    def select(self, table, columns=None, where=None, limit=None, order_by=None):
+        self._round_trip()
+        return []
+
+    def update(self, table, data, where):
+        self._round_trip()
+
+    def delete(self, table, where):
+        self._round_trip()
+
+
+async def blocking_handler(db: SlowDB):
+    # Same shape as a thank: sender read + write, receiver read + write.
+    db.select("points")
+    db.update("points", {}, {})
+    db.select("points")
+    db.update("points", {}, {})
+
+
+async def async_handler(db: AsyncThanksDB):
+    await db.select("points")
+    await db.update("points", {}, {})
+    await db.select("points")
+    await db.update("points", {}, {})
+
+
+async def probe(samples: list, stop: asyncio.Event, interval: float):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def run(handler, db, messages: int, interval: float) -> dict:
+    samples = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(samples, stop, interval))
+    await asyncio.sleep(interval)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(db) for _ in range(messages)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+    samples.sort()
+    return {
+        "elapsed": elapsed,
+        "mean": statistics.fmean(samples),
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "max": samples[-1],
+    }
+
+
+def report(name: str, result: dict):
+    print(
+        f"{name:<10} total {result['elapsed'] * 1000:8.1f} ms | loop lag "
+        f"mean {result['mean'] * 1000:7.2f} ms, p99 {result['p99'] * 1000:7.2f} ms, "
+        f"max {result['max'] * 1000:7.2f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--probe-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    interval = args.probe_ms / 1000
+
+    report(
+        "blocking",
+        await run(blocking_handler, SlowDB(latency), args.messages, interval),
+    )
+    async_db = AsyncThanksDB(SlowDB(latency))
+    report("async", await run(async_handler, async_db, args.messages, interval))
+    await async_db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,191 @@
+"""
+CPU time and memory of handling raw gateway messages, with and without the prefilter.
+
+Builds MESSAGE_CREATE payloads as decoded from the gateway (mostly chatter,
+some mentions, replies, bots and thanks) and feeds them to the connection
+state's parser, the way discord.py's gateway does, then waits for the
+on_message tasks. Database calls go to the in-memory stand-in and outbound
+REST calls are dropped, so what is measured is parsing and filtering.
+
+Usage: python -m benchmarks.gateway_prefilter [--messages 20000] [--thank-ratio 0.05]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from typing import List
+
+from benchmarks.replay import FILLER, THANKS
+from benchmarks.standin import MemoryDB
+from bot.client import Client
+from bot.database import TableName
+from bot.prefilter import GatewayPrefilter
+
+
+def _user(user_id: int, bot: bool = False) -> dict:
+    user = {
+        "id": str(user_id),
+        "username": f"user{user_id}",
+        "discriminator": "0",
+        "avatar": None,
+        "global_name": None,
+    }
+    if bot:
+        user["bot"] = True
+    return user
+
+
+def generate(args) -> List[dict]:
+    rng = random.Random(args.seed)
+    channels = [(1000 + i, 1 + i % args.guilds) for i in range(args.channels)]
+    history = {channel_id: [] for channel_id, _ in channels}
+    payloads = []
+    for message_id in range(1, args.messages + 1):
+        channel_id, guild_id = rng.choice(channels)
+        bot = rng.random() < args.bot_ratio
+        author = _user(1 if bot else 10_000 + rng.randrange(args.users), bot)
+        if rng.random() < args.thank_ratio:
+            content = f"{rng.choice(THANKS)} {rng.choice(FILLER)}"
+        else:
+            content = rng.choice(FILLER)
+        mentions = []
+        if rng.random() < args.mention_ratio:
+            mentions = [_user(10_000 + rng.randrange(args.users))]
+        payload = {
+            "id": str(message_id),
+            "channel_id": str(channel_id),
+            "guild_id": str(guild_id),
+            "author": author,
+            "member": {"roles": [], "joined_at": "2024-01-01T00:00:00+00:00"},
+            "content": content,
+            "timestamp": "2024-01-01T00:00:00+00:00",
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": mentions,
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+        }
+        if history[channel_id] and rng.random() < args.reply_ratio:
+            referenced = rng.choice(history[channel_id][-50:])
+            payload["type"] = 19
+            payload["message_reference"] = {
+                "message_id": referenced["id"],
+                "channel_id": str(channel_id),
+                "guild_id": str(guild_id),
+            }
+            payload["referenced_message"] = referenced
+        history[channel_id].append(dict(payload, referenced_message=None))
+        payloads.append(payload)
+    return payloads
+
+
+async def _drop(*args, **kwargs):
+    return None
+
+
+async def make_client(args, prefilter: bool) -> Client:
+    db = MemoryDB()
+    for guild_id in range(1, args.guilds + 1):
+        await db.insert(TableName.GUILDS.value, {"guild_id": guild_id})
+    client = Client(db=db)
+    client.outbound.run = _drop
+    await client._async_setup_hook()
+    for guild_id in range(1, args.guilds + 1):
+        client._connection._add_guild_from_data(
+            {
+                "id": str(guild_id),
+                "name": f"guild{guild_id}",
+                "channels": [
+                    {"id": str(1000 + i), "type": 0, "name": f"c{i}", "position": i}
+                    for i in range(args.channels)
+                    if 1 + i % args.guilds == guild_id
+                ],
+                "roles": [],
+                "members": [],
+                "emojis": [],
+                "stickers": [],
+                "features": [],
+                "member_count": args.users,
+            }
+        )
+    await client.fetch_guilds_config()
+    await client.points_event.start()
+    if prefilter:
+        client.prefilter = GatewayPrefilter(client)
+        client.prefilter.install()
+    return client
+
+
+async def feed(client: Client, payloads: List[dict], batch: int):
+    parse = client._connection.parsers["MESSAGE_CREATE"]
+    for start in range(0, len(payloads), batch):
+        running = asyncio.all_tasks()
+        for payload in payloads[start : start + batch]:
+            parse(payload)
+        # Let the dispatched on_message tasks run, not the bot's endless jobs
+        # (thanks history, outbound scheduler) started meanwhile.
+        await asyncio.gather(
+            *(
+                task
+                for task in asyncio.all_tasks() - running
+                if task.get_name() == "discord.py: on_message"
+            )
+        )
+
+
+async def run(args, prefilter: bool) -> dict:
+    payloads = generate(args)
+
+    client = await make_client(args, prefilter)
+    start = time.process_time()
+    await feed(client, payloads, args.batch)
+    cpu = time.process_time() - start
+    handled = client.points_event.manager.tracker.hits
+    handled += client.points_event.manager.tracker.misses
+
+    client = await make_client(args, prefilter)
+    tracemalloc.start()
+    await feed(client, payloads, args.batch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "cpu": cpu,
+        "peak": peak,
+        "parsed": len(payloads) - (client.prefilter.dropped if prefilter else 0),
+        "handled": handled,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--thank-ratio", type=float, default=0.05)
+    parser.add_argument("--mention-ratio", type=float, default=0.1)
+    parser.add_argument("--reply-ratio", type=float, default=0.1)
+    parser.add_argument("--bot-ratio", type=float, default=0.05)
+    parser.add_argument("--guilds", type=int, default=5)
+    parser.add_argument("--channels", type=int, default=20)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for prefilter in (False, True):
+        result = await run(args, prefilter)
+        print(
+            f"prefilter {'on ' if prefilter else 'off'} | "
+            f"{result['cpu']:.2f}s CPU ({result['cpu'] / args.messages * 1e6:.1f}us/msg) | "
+            f"{result['parsed']} messages parsed, {result['handled']} tracker lookups | "
+            f"peak {result['peak'] / 1024:.0f} KiB per {args.batch} messages"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""
+Leaderboard page and rank latency as a guild grows.
+
+Fills an SQLite table shaped like `points` (same primary key and
+(guild_id, points) index) and times fetching a deep leaderboard page with
+OFFSET against the keyset query of ThanksDB.points_page, then a member's rank
+with COUNT(*) against RankIndex. Keyset pages and RankIndex lookups should stay
+flat while OFFSET and COUNT(*) grow with the number of members.
+
+Usage: python -m benchmarks.leaderboard_pages [--sizes 1000 100000 1000000]
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import time
+
+from bot.events.ranking import RankIndex
+
+GUILD_ID = 1
+PAGE_SIZE = 10
+
+OFFSET_QUERY = (
+    "SELECT discord_user_id, points FROM points WHERE guild_id = ? "
+    "ORDER BY points DESC, discord_user_id DESC LIMIT ? OFFSET ?"
+)
+# Same rows as ThanksDB.points_page. SQLite only turns the row value form of
+# its `points < ? OR (points = ? AND discord_user_id < ?)` into an index seek.
+KEYSET_QUERY = (
+    "SELECT discord_user_id, points FROM points WHERE guild_id = ? "
+    "AND (points, discord_user_id) < (?, ?) "
+    "ORDER BY points DESC, discord_user_id DESC LIMIT ?"
+)
+COUNT_QUERY = "SELECT COUNT(*) FROM points WHERE guild_id = ? AND points > ?"
+GROUPED_QUERY = (
+    "SELECT points, COUNT(*) AS count FROM points WHERE guild_id = ? GROUP BY points"
+)
+
+
+def fill(size: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    # WITHOUT ROWID keeps the primary key in the secondary index, like InnoDB.
+    conn.execute(
+        "CREATE TABLE points (guild_id INTEGER, discord_user_id INTEGER, "
+        "points INTEGER, PRIMARY KEY (guild_id, discord_user_id)) WITHOUT ROWID"
+    )
+    conn.execute("CREATE INDEX idx_points_guild_points ON points (guild_id, points)")
+    rng = random.Random(42)
+    conn.executemany(
+        "INSERT INTO points VALUES (?, ?, ?)",
+        # Few members with many points, like a real guild.
+        ((GUILD_ID, user_id, int(rng.paretovariate(1.2))) for user_id in range(size)),
+    )
+    conn.commit()
+    return conn
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+async def run(size: int, repeat: int):
+    conn = fill(size)
+    offset = (size // 2) // PAGE_SIZE * PAGE_SIZE
+    # The keyset cursor of the same page: the last row of the page before it.
+    last = conn.execute(OFFSET_QUERY, (GUILD_ID, 1, offset - 1)).fetchone()
+    user_id, points = last
+
+    offset_ms = timed(
+        lambda: conn.execute(OFFSET_QUERY, (GUILD_ID, PAGE_SIZE, offset)).fetchall(),
+        repeat,
+    )
+    keyset_ms = timed(
+        lambda: conn.execute(
+            KEYSET_QUERY, (GUILD_ID, points, user_id, PAGE_SIZE)
+        ).fetchall(),
+        repeat,
+    )
+    count_ms = timed(
+        lambda: conn.execute(COUNT_QUERY, (GUILD_ID, points)).fetchone(), repeat
+    )
+
+    async def load(guild_id: int):
+        cursor = conn.execute(GROUPED_QUERY, (guild_id,))
+        return [{"points": row[0], "count": row[1]} for row in cursor]
+
+    ranks = RankIndex(load)
+    start = time.perf_counter()
+    await ranks.rank(GUILD_ID, points)
+    build_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await ranks.rank(GUILD_ID, points)
+        ranks.update(GUILD_ID, points, points + 1)
+        ranks.update(GUILD_ID, points + 1, points)
+    rank_ms = (time.perf_counter() - start) / repeat * 1000
+
+    print(
+        f"{size:>9} members | page at offset {offset:>7}: "
+        f"OFFSET {offset_ms:8.3f}ms  keyset {keyset_ms:6.3f}ms | "
+        f"rank: COUNT(*) {count_ms:8.3f}ms  RankIndex {rank_ms:6.3f}ms "
+        f"(built in {build_ms:.1f}ms)"
+    )
+    conn.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        await run(size, args.repeat)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
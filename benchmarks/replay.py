@@ -0,0 +1,246 @@
+"""
+Throughput and latency of the thanks pipeline on synthetic messages.
+
+Builds discord.Message look-alikes (thank-word density, mentions, replies,
+guild/channel spread are configurable) and feeds them through
+Client.on_message with the in-memory database stand-in and channel sends
+stubbed out, so no gateway nor MySQL is needed.
+
+With --coalesce-seconds N the confirmations of a channel within N seconds
+are merged into one message, edited in place.
+
+Confirmations go through the outbound scheduler with its rate limits off,
+--rate-limits keeps them.
+
+With --workers N messages go through the sharded dispatcher (N worker
+queues) and latency is measured from on_message to the end of handling,
+queue wait included.
+
+Usage: python -m benchmarks.replay [--messages 20000] [--thank-ratio 0.3]
+       [--workers 8]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import List
+
+import discord
+
+from benchmarks.standin import MemoryDB
+from bot import metrics
+from bot.client import Client
+from bot.database import TableName
+
+FILLER = [
+    "hello",
+    "does anyone know how to fix this",
+    "I tried that already",
+    "here is my code",
+    "it works now",
+    "what version are you using",
+    "lol",
+]
+THANKS = ["thanks", "ty", "thank you so much", "merci", "спасибо", "mulțumesc"]
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild):
+        self.id = channel_id
+        self.guild = guild
+        self.sends = 0
+        self.edits = 0
+        self.deletes = 0
+
+    async def send(self, *args, delete_after=None, **kwargs):
+        self.sends += 1
+        self.deletes += delete_after is not None
+        return FakeSentMessage(self)
+
+
+class FakeSentMessage:
+    def __init__(self, channel: FakeChannel):
+        self.channel = channel
+
+    async def edit(self, **kwargs):
+        self.channel.edits += 1
+
+
+class FakeUser:
+    def __init__(self, user_id: int, bot: bool = False):
+        self.id = user_id
+        self.bot = bot
+        self.name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+
+
+class FakeMessage(discord.Message):
+    """Only the attributes the pipeline reads, no connection state."""
+
+    def __init__(self, message_id, content, author, channel, mentions, reference):
+        self.id = message_id
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.mentions = mentions
+        self.reference = reference
+
+
+class FakeReference:
+    def __init__(self, resolved):
+        self.resolved = resolved
+        self.message_id = resolved.id
+        self.channel_id = resolved.channel.id
+
+
+def generate(args) -> List[FakeMessage]:
+    rng = random.Random(args.seed)
+    guilds = [discord.Object(id=guild_id) for guild_id in range(1, args.guilds + 1)]
+    for guild in guilds:
+        guild.name = f"guild{guild.id}"
+    channels = [
+        FakeChannel(1000 + i, guilds[i % len(guilds)]) for i in range(args.channels)
+    ]
+    users = [FakeUser(10_000 + i) for i in range(args.users)]
+    bots = [FakeUser(1, bot=True)]
+    history = {channel.id: [] for channel in channels}
+
+    messages = []
+    for message_id in range(args.messages):
+        channel = rng.choice(channels)
+        author = bots[0] if rng.random() < args.bot_ratio else rng.choice(users)
+        if rng.random() < args.thank_ratio:
+            content = f"{rng.choice(THANKS)} {rng.choice(FILLER)}"
+        else:
+            content = rng.choice(FILLER)
+        mentions = rng.sample(users, rng.randint(0, args.max_mentions))
+        reference = None
+        if history[channel.id] and rng.random() < args.reply_ratio:
+            reference = FakeReference(rng.choice(history[channel.id][-50:]))
+        message = FakeMessage(message_id, content, author, channel, mentions, reference)
+        history[channel.id].append(message)
+        messages.append(message)
+    return messages
+
+
+async def run(args) -> dict:
+    if args.buffer_ms:
+        os.environ["POINTS_BUFFER_INTERVAL_MS"] = str(args.buffer_ms)
+    os.environ["DISPATCH_WORKERS"] = str(args.workers)
+    os.environ["CONFIRM_COALESCE_SECONDS"] = str(args.coalesce_seconds)
+    os.environ["DISPATCH_MAX_DEPTH"] = str(args.queue_depth)
+    db = MemoryDB(latency=args.latency_ms / 1000)
+    for guild_id in range(1, args.guilds + 1):
+        await db.insert(TableName.GUILDS.value, {"guild_id": guild_id})
+    client = Client(db=db)
+    if not args.rate_limits:
+        # Fake channels have no limits to stay under.
+        client.outbound.limits = {}
+    config = client.points_event.config
+    config.cooldown_minutes = args.cooldown_minutes
+    config.daily_limit = args.daily_limit
+    await client.fetch_guilds_config()
+    await client.points_event.start()
+
+    messages = generate(args)
+    db.round_trips = db.writes = 0
+    awards = metrics.awards.value()
+    latencies = []
+    queue = iter(messages)
+    received = {}
+
+    dispatcher = client.dispatcher
+    if dispatcher is not None:
+        handle_message = client.handle_message
+
+        async def handle_and_time(message):
+            await handle_message(message)
+            latencies.append(time.perf_counter() - received[message.id])
+
+        dispatcher.handler = handle_and_time
+        dispatcher.start()
+
+    async def worker():
+        for message in queue:
+            received[message.id] = time.perf_counter()
+            await client.on_message(message)
+            if dispatcher is None:
+                latencies.append(time.perf_counter() - received[message.id])
+            else:
+                # Lets the dispatcher's workers run between arrivals, like
+                # messages coming from the gateway.
+                await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    if dispatcher is not None:
+        await dispatcher.close()
+    await client.points_event.close()
+    await asyncio.gather(*client.points_event.manager._background_tasks)
+    elapsed = time.perf_counter() - start
+    confirmations = client.points_event.confirmations
+    if confirmations is not None:
+        # Let the last edits of the open windows go out.
+        await asyncio.sleep(confirmations.edit_interval * 2)
+
+    latencies.sort()
+    channels = {message.channel for message in messages}
+    return {
+        "messages": len(messages),
+        "elapsed": elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "round_trips": db.round_trips,
+        "writes": db.writes,
+        "awards": metrics.awards.value() - awards,
+        "sends": sum(channel.sends for channel in channels),
+        "rest_calls": sum(
+            channel.sends + channel.edits + channel.deletes for channel in channels
+        ),
+        "shed": dispatcher.dropped if dispatcher is not None else 0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--thank-ratio", type=float, default=0.3)
+    parser.add_argument("--reply-ratio", type=float, default=0.2)
+    parser.add_argument("--bot-ratio", type=float, default=0.05)
+    parser.add_argument("--max-mentions", type=int, default=2)
+    parser.add_argument("--guilds", type=int, default=5)
+    parser.add_argument("--channels", type=int, default=20)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--cooldown-minutes", type=int, default=60)
+    parser.add_argument("--daily-limit", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    parser.add_argument("--buffer-ms", type=int, default=0)
+    parser.add_argument("--coalesce-seconds", type=float, default=0)
+    parser.add_argument(
+        "--rate-limits",
+        action="store_true",
+        help="Keep the outbound scheduler's Discord rate limits",
+    )
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--queue-depth", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    result = await run(args)
+    print(
+        f"{result['messages']} messages in {result['elapsed']:.2f}s "
+        f"({result['messages'] / result['elapsed']:.0f} msg/s) | "
+        f"latency p50 {result['p50'] * 1000:.2f}ms p99 {result['p99'] * 1000:.2f}ms | "
+        f"{result['round_trips'] / result['messages']:.3f} round trips/msg "
+        f"({result['writes']} writes) | {result['sends']} sends, "
+        f"{result['rest_calls'] / max(result['awards'], 1):.3f} REST calls/award"
+        + (f" | {result['shed']} shed" if args.workers else "")
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
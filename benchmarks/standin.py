@@ -0,0 +1,318 @@
+"""
+In-memory stand-in for AsyncThanksDB used by the benchmarks.
+
+It implements the same awaitable surface with plain dicts, sleeps `latency`
+seconds per call to mimic a network round trip, and counts round trips and
+write statements (each one is a commit with autocommitting connections).
+"""
+
+import asyncio
+import itertools
+from datetime import datetime, timedelta
+
+from bot.backends.base import PRIMARY_KEYS, TableName
+
+DEFAULTS = {
+    TableName.POINTS.value: {
+        "points": 0,
+        "last_thanks": None,
+        "num_of_thanks": 0,
+        "last_received_points_date": None,
+        "current_day_received_points": 0,
+    },
+}
+
+
+class MemoryDB:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables = {table: {} for table in PRIMARY_KEYS}
+        self.round_trips = 0
+        self.writes = 0
+        self._event_ids = itertools.count(1)
+
+    async def _round_trip(self, write: bool = False):
+        self.round_trips += 1
+        self.writes += write
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+    def _key(self, table: str, row: dict) -> tuple:
+        return tuple(row[column] for column in PRIMARY_KEYS[table])
+
+    def _matches(self, table: str, where: dict):
+        rows = self.tables[table]
+        keys = PRIMARY_KEYS[table]
+        if where and set(where) == set(keys):
+            row = rows.get(tuple(where[column] for column in keys))
+            return [row] if row else []
+        return [
+            row
+            for row in rows.values()
+            if all(row.get(column) == value for column, value in (where or {}).items())
+        ]
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def insert(self, table: str, data: dict):
+        await self._round_trip(write=True)
+        row = {**DEFAULTS.get(table, {}), **data}
+        self.tables[table][self._key(table, row)] = row
+
+    async def select(
+        self,
+        table: str,
+        columns: list = None,
+        where: dict = None,
+        limit: int = None,
+        order_by: str = None,
+    ):
+        await self._round_trip()
+        rows = self._matches(table, where)
+        if order_by:
+            # Stable sorts, last key first.
+            for key in reversed(order_by.split(",")):
+                column, _, direction = key.strip().partition(" ")
+                rows = sorted(
+                    rows,
+                    key=lambda row: row[column],
+                    reverse=direction.upper() == "DESC",
+                )
+        if limit:
+            rows = rows[:limit]
+        if columns and columns != ["*"]:
+            return [{column: row[column] for column in columns} for row in rows]
+        return [dict(row) for row in rows]
+
+    async def update(self, table: str, data: dict, where: dict):
+        await self._round_trip(write=True)
+        for row in self._matches(table, where):
+            row.update(data)
+
+    async def delete(self, table: str, where: dict):
+        await self._round_trip(write=True)
+        for row in self._matches(table, where):
+            del self.tables[table][self._key(table, row)]
+
+    async def upsert(self, table: str, rows: list, increment: tuple = ()):
+        await self._round_trip(write=True)
+        for data in rows:
+            key = self._key(table, data)
+            row = self.tables[table].get(key)
+            if row is None:
+                self.tables[table][key] = {**DEFAULTS.get(table, {}), **data}
+                continue
+            for column, value in data.items():
+                row[column] = row[column] + value if column in increment else value
+
+    async def count_by(self, table: str, column: str, where: dict = None):
+        await self._round_trip()
+        counts = {}
+        for row in self._matches(table, where):
+            counts[row[column]] = counts.get(row[column], 0) + 1
+        return [{column: value, "count": count} for value, count in counts.items()]
+
+    async def points_page(
+        self, guild_id: int, limit: int, after: tuple = None, min_points: int = None
+    ):
+        await self._round_trip()
+        rows = sorted(
+            (
+                row
+                for row in self._matches(TableName.POINTS.value, {"guild_id": guild_id})
+                if (after is None or (row["points"], row["discord_user_id"]) < after)
+                and (min_points is None or row["points"] >= min_points)
+            ),
+            key=lambda row: (row["points"], row["discord_user_id"]),
+            reverse=True,
+        )
+        return [dict(row) for row in rows[:limit]]
+
+    async def award_points(
+        self, guild_id: int, user_id: int, points_delta: int, daily_limit: int
+    ):
+        await self._round_trip(write=True)
+        now = datetime.now()
+        key = (guild_id, user_id)
+        row = self.tables[TableName.POINTS.value].get(key)
+        if row is None:
+            self.tables[TableName.POINTS.value][key] = {
+                "guild_id": guild_id,
+                "discord_user_id": user_id,
+                "points": points_delta,
+                "last_thanks": datetime(2000, 1, 1),
+                "num_of_thanks": 0,
+                "last_received_points_date": now,
+                "current_day_received_points": 1,
+            }
+            return points_delta
+        last = row["last_received_points_date"]
+        in_window = (
+            last is not None
+            and last >= now - timedelta(hours=24)
+            and row["current_day_received_points"] > 0
+        )
+        if in_window and row["current_day_received_points"] >= daily_limit:
+            return None
+        if in_window:
+            row["current_day_received_points"] += 1
+        else:
+            row["current_day_received_points"] = 1
+            row["last_received_points_date"] = now
+        row["points"] += points_delta
+        return row["points"]
+
+    async def record_thanks(self, guild_id: int, user_id: int):
+        await self._round_trip(write=True)
+        key = (guild_id, user_id)
+        row = self.tables[TableName.POINTS.value].get(key)
+        if row is None:
+            row = self.tables[TableName.POINTS.value][key] = {
+                **DEFAULTS[TableName.POINTS.value],
+                "guild_id": guild_id,
+                "discord_user_id": user_id,
+                "last_received_points_date": datetime.now(),
+            }
+        row["last_thanks"] = datetime.now()
+        row["num_of_thanks"] += 1
+
+    async def insert_many(self, table: str, rows: list):
+        await self._round_trip(write=True)
+        for data in rows:
+            row = {**DEFAULTS.get(table, {}), **data}
+            if table == TableName.THANKS_EVENTS.value:
+                row["id"] = next(self._event_ids)
+            self.tables[table][self._key(table, row)] = row
+
+    async def rollup_thanks_events(self, limit: int) -> int:
+        await self._round_trip(write=True)
+        state = self.tables[TableName.ROLLUP_STATE.value]
+        after = state.get(("thanks_rollups",), {"last_event_id": 0})["last_event_id"]
+        events = sorted(
+            (
+                row
+                for row in self.tables[TableName.THANKS_EVENTS.value].values()
+                if row["id"] > after
+            ),
+            key=lambda row: row["id"],
+        )[:limit]
+        previous = self.tables[TableName.THANKS_EVENTS.value].get((after,))
+        last_message = previous["message_id"] if previous else None
+        starts = self.tables[TableName.THANKS_WINDOW_STARTS.value].values()
+        for event in events:
+            hour = event["created_at"].replace(minute=0, second=0, microsecond=0)
+            day = hour.replace(hour=0)
+            spans = [row["span"] for row in starts if day >= row["start"]]
+            users = [(event["receiver_id"], "received")]
+            if event["message_id"] != last_message:
+                users.append((event["giver_id"], "given"))
+                last_message = event["message_id"]
+            for user_id, column in users:
+                guild_id = event["guild_id"]
+                for period, bucket in (("hour", hour), ("day", day)):
+                    key = (guild_id, user_id, period, bucket)
+                    self._counts(TableName.THANKS_ROLLUPS.value, key)[column] += 1
+                for span in spans:
+                    key = (guild_id, span, user_id)
+                    self._counts(TableName.THANKS_WINDOWS.value, key)[column] += 1
+        if events:
+            state[("thanks_rollups",)] = {
+                "name": "thanks_rollups",
+                "last_event_id": events[-1]["id"],
+            }
+        return len(events)
+
+    def _counts(self, table: str, key: tuple) -> dict:
+        row = self.tables[table].get(key)
+        if row is None:
+            row = self.tables[table][key] = dict(zip(PRIMARY_KEYS[table], key))
+            row.update(received=0, given=0)
+        return row
+
+    async def advance_thanks_windows(self, starts: dict):
+        await self._round_trip(write=True)
+        current = self.tables[TableName.THANKS_WINDOW_STARTS.value]
+        windows = self.tables[TableName.THANKS_WINDOWS.value]
+        for span, start in starts.items():
+            old_start = current.get((span,), {}).get("start")
+            if old_start is not None and old_start >= start:
+                continue
+            if old_start is None:
+                for key in [key for key in windows if key[1] == span]:
+                    del windows[key]
+            for row in self.tables[TableName.THANKS_ROLLUPS.value].values():
+                if row["period"] != "day" or row["bucket"] < (old_start or start):
+                    continue
+                key = (row["guild_id"], span, row["user_id"])
+                if old_start is None and row["bucket"] >= start:
+                    sign = 1
+                elif old_start is not None and row["bucket"] < start:
+                    sign = -1
+                else:
+                    continue
+                counts = self._counts(TableName.THANKS_WINDOWS.value, key)
+                counts["received"] += sign * row["received"]
+                counts["given"] += sign * row["given"]
+                if counts["received"] <= 0 and counts["given"] <= 0:
+                    del windows[key]
+            current[(span,)] = {"span": span, "start": start}
+
+    async def window_page(
+        self, guild_id: int, span: str, limit: int, after: tuple = None
+    ) -> list:
+        await self._round_trip()
+        rows = sorted(
+            (
+                {
+                    "discord_user_id": row["user_id"],
+                    "points": row["received"],
+                    "num_of_thanks": row["given"],
+                }
+                for row in self.tables[TableName.THANKS_WINDOWS.value].values()
+                if row["guild_id"] == guild_id
+                and row["span"] == span
+                and row["received"] > 0
+            ),
+            key=lambda row: (row["points"], row["discord_user_id"]),
+            reverse=True,
+        )
+        if after is not None:
+            rows = [
+                row for row in rows if (row["points"], row["discord_user_id"]) < after
+            ]
+        return rows[:limit]
+
+    async def prune_thanks_history(
+        self, events_before: datetime, hourly_before: datetime, daily_before: datetime
+    ):
+        await self._round_trip(write=True)
+        state = self.tables[TableName.ROLLUP_STATE.value]
+        last = state.get(("thanks_rollups",), {"last_event_id": 0})["last_event_id"]
+        events = self.tables[TableName.THANKS_EVENTS.value]
+        for key, row in list(events.items()):
+            if row["id"] < last and row["created_at"] < events_before:
+                del events[key]
+        rollups = self.tables[TableName.THANKS_ROLLUPS.value]
+        before = {"hour": hourly_before, "day": daily_before}
+        for key, row in list(rollups.items()):
+            if row["bucket"] < before[row["period"]]:
+                del rollups[key]
+
+    async def thanks_rollup(
+        self, guild_id: int, user_id: int, period: str, since: datetime
+    ) -> list:
+        await self._round_trip()
+        rows = [
+            {column: row[column] for column in ("bucket", "received", "given")}
+            for row in self.tables[TableName.THANKS_ROLLUPS.value].values()
+            if (row["guild_id"], row["user_id"], row["period"])
+            == (guild_id, user_id, period)
+            and row["bucket"] >= since
+        ]
+        return sorted(rows, key=lambda row: row["bucket"])
@@ -0,0 +1,69 @@
+"""
+Thank-word matching microbenchmark.
+
+Compares the previous `re.findall` + list scan with ThankMatcher on messages
+of realistic lengths, with the thank word at the start, at the end, or absent.
+
+Usage: python -m benchmarks.thank_matcher [--number 20000]
+"""
+
+import argparse
+import random
+import re
+import timeit
+
+from bot.events.matcher import ThankMatcher
+from bot.events.points import PointsConfig
+
+FILLER = (
+    "hey can someone look at my code the build fails on the second step "
+    "i tried reinstalling but it still does not work any idea what is wrong "
+    "привет кто нибудь знает почему сборка падает на втором шаге "
+    "salut am o problema cu configurarea serverului"
+).split()
+
+
+def make_message(length: int, thank: str, position: str, rng: random.Random) -> str:
+    words = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append(rng.choice(FILLER))
+    if position == "start":
+        words.insert(0, thank)
+    elif position == "end":
+        words.append(thank)
+    return " ".join(words)
+
+
+def old_is_valid(content: str, thank_words: list) -> bool:
+    words = re.findall(r"[\w/]+", content.lower())
+    return any(word in words for word in thank_words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    thank_words = PointsConfig.thank_words
+    # A guild with its own words, the slowest case.
+    matcher = ThankMatcher(thank_words).with_words({"kudos"})
+
+    print(f"{'length':>6} {'thank':>6} {'old':>10} {'matcher':>10} {'speedup':>8}")
+    for length in (20, 80, 300, 1000, 2000):
+        for position in ("start", "end", "none"):
+            content = make_message(length, "mulțumesc", position, rng)
+            assert old_is_valid(content, thank_words) == matcher.matches(content)
+            old = timeit.timeit(
+                lambda: old_is_valid(content, thank_words), number=args.number
+            )
+            new = timeit.timeit(lambda: matcher.matches(content), number=args.number)
+            print(
+                f"{length:>6} {position:>6} "
+                f"{old / args.number * 1e6:>8.2f}us {new / args.number * 1e6:>8.2f}us "
+                f"{old / new:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
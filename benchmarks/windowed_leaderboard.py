@@ -0,0 +1,138 @@
+"""
+Window leaderboard latency as a guild grows.
+
+Fills an SQLite database created by ThanksDB with 30 days of daily rollups
+for a guild, builds the 30 day window from them with
+ThanksDB.advance_thanks_windows, then times a first and a deep page of
+ThanksDB.window_page against the lifetime ThanksDB.points_page and against
+summing the daily rollups on each request, and the daily move of the window.
+Window pages should stay flat like lifetime ones while the sum grows with
+the number of members.
+
+Usage: python -m benchmarks.windowed_leaderboard [--sizes 1000 100000]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from bot.backends.sqlite import SQLiteBackend
+from bot.database import TableName, ThanksDB
+
+GUILD_ID = 1
+PAGE_SIZE = 10
+DAYS = 30
+
+# What a window board costs without thanks_windows.
+SUM_QUERY = (
+    "SELECT user_id, SUM(received) AS received FROM thanks_rollups "
+    "WHERE guild_id = ? AND period = 'day' AND bucket >= ? "
+    "GROUP BY user_id HAVING received > 0 "
+    "ORDER BY received DESC, user_id DESC LIMIT ?"
+)
+
+
+def fill(path: str, size: int, start: datetime):
+    conn = sqlite3.connect(path)
+    rng = random.Random(42)
+    rows = []
+    for user_id in range(size):
+        # Few members active on many days, like a real guild.
+        active = min(DAYS, int(rng.paretovariate(1.2)))
+        for day in rng.sample(range(DAYS), active):
+            rows.append(
+                (
+                    GUILD_ID,
+                    user_id,
+                    "day",
+                    (start + timedelta(days=day)).isoformat(" "),
+                    int(rng.paretovariate(1.5)),
+                    rng.randint(0, 2),
+                )
+            )
+    conn.executemany("INSERT INTO thanks_rollups VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.execute(
+        "INSERT INTO points (guild_id, discord_user_id, points, num_of_thanks) "
+        "SELECT guild_id, user_id, SUM(received), SUM(given) FROM thanks_rollups "
+        "GROUP BY guild_id, user_id"
+    )
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(size: int, repeat: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "thanks.db")
+        db = ThanksDB(backend=SQLiteBackend(path))
+        try:
+            db.init_db()
+            start = datetime.now().replace(
+                hour=0, minute=0, second=0, microsecond=0
+            ) - timedelta(days=DAYS - 1)
+            rollups = fill(path, size, start)
+
+            build_start = time.perf_counter()
+            db.advance_thanks_windows({"month": start})
+            build_ms = (time.perf_counter() - build_start) * 1000
+
+            # The cursor of a page halfway down the board.
+            deep = db.window_page(GUILD_ID, "month", size // 2)[-1]
+            after = (deep["points"], deep["discord_user_id"])
+
+            lifetime_ms = timed(lambda: db.points_page(GUILD_ID, PAGE_SIZE), repeat)
+            first_ms = timed(
+                lambda: db.window_page(GUILD_ID, "month", PAGE_SIZE), repeat
+            )
+            deep_ms = timed(
+                lambda: db.window_page(GUILD_ID, "month", PAGE_SIZE, after), repeat
+            )
+            conn = sqlite3.connect(path)
+            sum_ms = timed(
+                lambda: conn.execute(
+                    SUM_QUERY, (GUILD_ID, start.isoformat(" "), PAGE_SIZE)
+                ).fetchall(),
+                repeat,
+            )
+            conn.close()
+            windows = db.select(TableName.THANKS_WINDOWS.value, ["user_id"])
+
+            # The daily move: the oldest day leaves the window.
+            advance_start = time.perf_counter()
+            db.advance_thanks_windows({"month": start + timedelta(days=1)})
+            advance_ms = (time.perf_counter() - advance_start) * 1000
+        finally:
+            db.close()
+
+    print(
+        f"{size:>8} members, {rollups:>8} daily rollups, "
+        f"{len(windows):>8} window rows (built in {build_ms:7.1f}ms) | "
+        f"lifetime {lifetime_ms:6.3f}ms  window {first_ms:6.3f}ms  "
+        f"deep {deep_ms:6.3f}ms | sum of rollups {sum_ms:9.3f}ms | "
+        f"daily advance {advance_ms:7.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
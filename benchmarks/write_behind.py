@@ -0,0 +1,88 @@
+"""
+Commits per second with and without the points write-behind buffer.
+
+Replays a thank storm (many senders thanking a handful of helpers in one
+channel) through PointsManager against the in-memory stand-in, once writing
+every change directly and once through PointsBuffer.
+
+Usage: python -m benchmarks.write_behind [--thanks 5000] [--interval-ms 200]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.standin import MemoryDB
+from bot.buffer import PointsBuffer
+from bot.events.points import PointsConfig, PointsManager, PointsValidator
+
+GUILD_ID = 1
+
+
+async def storm(manager: PointsManager, thanks: int, senders: int, helpers: int):
+    rng = random.Random(42)
+    for _ in range(thanks):
+        sender = rng.randrange(senders)
+        helper = senders + rng.randrange(helpers)
+        await manager.update_has_thanked_user(GUILD_ID, sender)
+        await manager.update_user_points(GUILD_ID, helper)
+
+
+async def run(args, buffered: bool) -> dict:
+    db = MemoryDB(latency=args.latency_ms / 1000)
+    config = PointsConfig()
+    config.daily_limit = args.thanks  # Measure writes, not the daily limit.
+    buffer = None
+    if buffered:
+        buffer = PointsBuffer(db, args.interval_ms / 1000, args.max_entries)
+        buffer.start()
+    manager = PointsManager(db, PointsValidator(config), None, buffer)
+
+    start = time.perf_counter()
+    per_worker = args.thanks // args.concurrency
+    await asyncio.gather(
+        *(
+            storm(manager, per_worker, args.senders, args.helpers)
+            for _ in range(args.concurrency)
+        )
+    )
+    if buffer is not None:
+        await buffer.close()
+    await asyncio.gather(*manager._background_tasks)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed": elapsed,
+        "writes": db.writes,
+        "round_trips": db.round_trips,
+        "thanks": per_worker * args.concurrency,
+    }
+
+
+def report(name: str, result: dict):
+    print(
+        f"{name:<9} {result['thanks']} thanks in {result['elapsed']:6.2f}s | "
+        f"{result['writes']:6d} commits ({result['writes'] / result['elapsed']:8.1f}/s, "
+        f"{result['writes'] / result['thanks']:.3f} per thank) | "
+        f"{result['round_trips']} round trips"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--thanks", type=int, default=5000)
+    parser.add_argument("--senders", type=int, default=200)
+    parser.add_argument("--helpers", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    parser.add_argument("--interval-ms", type=float, default=200)
+    parser.add_argument("--max-entries", type=int, default=500)
+    args = parser.parse_args()
+
+    report("direct", await run(args, buffered=False))
+    report("buffered", await run(args, buffered=True))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,156 @@
+import os
+from contextlib import contextmanager
+from enum import Enum
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class TableName(Enum):
+    GUILDS = "guilds"
+    ADMINS = "bot_administrator"
+    POINTS = "points"
+    CHANNELS = "channels"
+    AUTOROLES = "autoroles"
+    CACHE_DAILY = "cache_daily"
+    THANK_WORDS = "thank_words"
+    JOURNAL_APPLIED = "journal_applied"
+    AUTOROLE_BACKFILLS = "autorole_backfills"
+    THANKS_EVENTS = "thanks_events"
+    THANKS_ROLLUPS = "thanks_rollups"
+    ROLLUP_STATE = "rollup_state"
+    THANKS_WINDOWS = "thanks_windows"
+    THANKS_WINDOW_STARTS = "thanks_window_starts"
+
+
+PRIMARY_KEYS: Dict[str, Tuple[str, ...]] = {
+    TableName.GUILDS.value: ("guild_id",),
+    TableName.ADMINS.value: ("discord_id",),
+    TableName.POINTS.value: ("guild_id", "discord_user_id"),
+    TableName.CHANNELS.value: ("channel_id",),
+    TableName.AUTOROLES.value: ("role_id", "threshold"),
+    TableName.THANK_WORDS.value: ("guild_id", "word"),
+    TableName.JOURNAL_APPLIED.value: ("entry_id",),
+    TableName.AUTOROLE_BACKFILLS.value: ("guild_id", "role_id"),
+    TableName.THANKS_EVENTS.value: ("id",),
+    TableName.THANKS_ROLLUPS.value: ("guild_id", "user_id", "period", "bucket"),
+    TableName.ROLLUP_STATE.value: ("name",),
+    TableName.THANKS_WINDOWS.value: ("guild_id", "span", "user_id"),
+    TableName.THANKS_WINDOW_STARTS.value: ("span",),
+}
+
+
+class QueryResult(NamedTuple):
+    rows: Optional[list]
+    rowcount: int
+    lastrowid: Optional[int]
+
+
+class Backend:
+    """
+    Connections and SQL dialect of one database engine, used by ThanksDB.
+
+    Queries are handed to `execute` with pyformat placeholders (`%s` and
+    `%(name)s`, as in mysql-connector); each backend translates them to its
+    driver. The statements that differ between engines (schema, upserts, the
+    award_points read-modify-write) come from the backend.
+    """
+
+    name = ""
+    # Exceptions raised by the driver.
+    errors: Tuple[type, ...] = ()
+    # The subset meaning the database can't be reached, which opens the
+    # circuit breaker, as opposed to a statement being refused. Checked with
+    # `is_connection_error`, for drivers that tell them apart by code.
+    connection_errors: Tuple[type, ...] = ()
+    # Statements that can run at the same time, sizes AsyncThanksDB's threads.
+    max_connections = 1
+
+    # INSERT that skips rows whose primary key exists.
+    insert_ignore = ""
+    award_points_query = ""
+    record_thanks_query = ""
+
+    def open(self):
+        raise NotImplementedError
+
+    def is_connection_error(self, error: Exception) -> bool:
+        """Whether a driver error means the database can't be reached."""
+        return isinstance(error, self.connection_errors)
+
+    def close(self):
+        raise NotImplementedError
+
+    def init_db(self):
+        """Create the tables and indexes that don't exist."""
+        raise NotImplementedError
+
+    def execute(
+        self,
+        query: str,
+        params=None,
+        fetch: bool = False,
+        dictionary: bool = False,
+        prepared: bool = False,
+    ) -> QueryResult:
+        """
+        Run one statement, autocommitted.
+
+        Args:
+            query (str): The SQL, with pyformat placeholders.
+            params (tuple | dict, optional): The values of the placeholders.
+            fetch (bool, optional): Return the rows of the result set, if any.
+            dictionary (bool, optional): Return rows as dicts.
+            prepared (bool, optional): Run it as a prepared statement kept
+                for the next calls, for statements of the hot path.
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def transaction(self) -> Iterator[Callable[..., QueryResult]]:
+        """
+        Run statements in one transaction, committed at the end of the block
+        and rolled back if it raises.
+
+        Yields:
+            Callable: execute(query, params=None) -> QueryResult, on the
+            transaction's connection. Rows are always fetched.
+        """
+        raise NotImplementedError
+
+    def upsert_query(
+        self, table: str, columns: List[str], row_count: int, increment: tuple
+    ) -> str:
+        """Multi-row insert updating the rows whose primary key exists."""
+        raise NotImplementedError
+
+    def points_after(
+        self, after: tuple, points: str = "points", user_id: str = "discord_user_id"
+    ) -> Tuple[str, tuple]:
+        """Condition and params of the rows ranked after (points, user_id), by the given columns."""
+        return (
+            f"({points} < %s OR ({points} = %s AND {user_id} < %s))",
+            (after[0], after[0], after[1]),
+        )
+
+    def award_points_total(
+        self, result: QueryResult, points_delta: int
+    ) -> Optional[int]:
+        """The new total from the result of award_points_query, None if the limit was reached."""
+        raise NotImplementedError
+
+
+def create_backend(name: str = None) -> Backend:
+    """
+    Build the backend named by DB_BACKEND: "mysql" (default) or "sqlite".
+
+    Drivers are imported here, so a deployment only needs the one it uses.
+    """
+    name = (name or os.getenv("DB_BACKEND", "mysql")).lower()
+    if name == "mysql":
+        from bot.backends.mysql import MySQLBackend
+
+        return MySQLBackend.from_env()
+    if name == "sqlite":
+        from bot.backends.sqlite import SQLiteBackend
+
+        return SQLiteBackend.from_env()
+    raise ValueError(f"Unknown DB_BACKEND: {name}")
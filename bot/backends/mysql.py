@@ -0,0 +1,350 @@
+import functools
+import os
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+import mysql.connector
+from mysql.connector.constants import ClientFlag
+
+from bot.backends.base import Backend, QueryResult, TableName
+from bot.pool import ConnectionPool
+
+_NAMED_PLACEHOLDER = re.compile(r"%\((\w+)\)s")
+
+
+@functools.lru_cache(maxsize=256)
+def _positional(query: str) -> Tuple[str, Tuple[str, ...]]:
+    """Prepared statements only take %s: the query with %(name)s replaced, and the names in order."""
+    return (
+        _NAMED_PLACEHOLDER.sub("%s", query),
+        tuple(_NAMED_PLACEHOLDER.findall(query)),
+    )
+
+
+class MySQLBackend(Backend):
+    """
+    MySQL through mysql-connector and a ConnectionPool.
+
+    Prepared statements are kept per connection (up to `max_prepared`, least
+    recently used dropped first), so a hot statement is parsed once per
+    connection and then only its parameters travel.
+    """
+
+    name = "mysql"
+    errors = (mysql.connector.Error,)
+    connection_errors = (
+        mysql.connector.InterfaceError,
+        mysql.connector.OperationalError,
+        mysql.connector.PoolError,
+    )
+    insert_ignore = "INSERT IGNORE"
+
+    def __init__(self, pool: ConnectionPool, max_prepared: int = 32):
+        self.pool = pool
+        self.max_connections = pool.max_size
+        self.max_prepared = max_prepared
+        # connection -> OrderedDict[(query, dictionary)] -> prepared cursor;
+        # only the thread holding a connection touches its statements.
+        self._prepared = weakref.WeakKeyDictionary()
+        self._prepared_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "MySQLBackend":
+        return cls(
+            ConnectionPool(
+                min_size=int(os.getenv("DB_POOL_MIN_SIZE", 1)),
+                max_size=int(os.getenv("DB_POOL_MAX_SIZE", 5)),
+                checkout_timeout=float(os.getenv("DB_POOL_TIMEOUT", 10)),
+                idle_timeout=float(os.getenv("DB_POOL_IDLE_TIMEOUT", 300)),
+                host=os.getenv("DB_HOST", "localhost"),
+                port=int(os.getenv("DB_PORT", 3306)),
+                user=os.getenv("DB_USER"),
+                password=os.getenv("DB_PASSWORD"),
+                database=os.getenv("DB_DATABASE"),
+                # Affected rows must be 0 for an upsert that changed nothing,
+                # award_points relies on it to detect the daily limit.
+                client_flags=[-ClientFlag.FOUND_ROWS],
+            )
+        )
+
+    def open(self):
+        self.pool.open()
+
+    def close(self):
+        self.pool.close()
+
+    # ── Schema ─────────────────────────────────────────────────────────────────
+
+    def init_db(self):
+        statements = [
+            f"CREATE TABLE IF NOT EXISTS `{TableName.GUILDS.value}` ("
+            "`guild_id` BIGINT NOT NULL,"
+            "PRIMARY KEY (`guild_id`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+            f"CREATE TABLE IF NOT EXISTS `{TableName.ADMINS.value}` ("
+            "`discord_id` BIGINT NOT NULL,"
+            "PRIMARY KEY (`discord_id`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+            f"CREATE TABLE IF NOT EXISTS `{TableName.POINTS.value}` ("
+            "`guild_id` BIGINT NOT NULL,"
+            "`discord_user_id` BIGINT NOT NULL,"
+            "`points` INT DEFAULT 0,"
+            "`last_thanks` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,"
+            "`num_of_thanks` INT DEFAULT 0,"
+            "`last_received_points_date` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,"
+            "`current_day_received_points` TINYINT DEFAULT 0,"
+            "PRIMARY KEY (`guild_id`, `discord_user_id`),"
+            "KEY `idx_points_guild_points` (`guild_id`, `points`),"
+            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+            f"CREATE TABLE IF NOT EXISTS `{TableName.CHANNELS.value}` ("
+            "`channel_id` BIGINT NOT NULL,"
+            "`guild_id` BIGINT NOT NULL,"
+            "PRIMARY KEY (`channel_id`),"
+            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+            f"CREATE TABLE IF NOT EXISTS `{TableName.AUTOROLES.value}` ("
+            "`role_id` BIGINT NOT NULL,"
+            "`guild_id` BIGINT NOT NULL,"
+            "`threshold` SMALLINT NOT NULL,"
+            "PRIMARY KEY (`role_id`, `threshold`),"
+            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+            # Binary collation: "multumesc" and "mulțumesc" are different words.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.THANK_WORDS.value}` ("
+            "`guild_id` BIGINT NOT NULL,"
+            "`word` VARCHAR(32) COLLATE utf8mb4_bin NOT NULL,"
+            "PRIMARY KEY (`guild_id`, `word`),"
+            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+            # Entries of the write journal already replayed.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.JOURNAL_APPLIED.value}` ("
+            "`entry_id` CHAR(32) NOT NULL,"
+            "`applied_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,"
+            "PRIMARY KEY (`entry_id`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+            # Autoroles being given to the members who already qualified, and
+            # the last (points, user) row done.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.AUTOROLE_BACKFILLS.value}` ("
+            "`guild_id` BIGINT NOT NULL,"
+            "`role_id` BIGINT NOT NULL,"
+            "`threshold` SMALLINT NOT NULL,"
+            "`after_points` INT DEFAULT NULL,"
+            "`after_user_id` BIGINT DEFAULT NULL,"
+            "`checked` INT DEFAULT 0,"
+            "`granted` INT DEFAULT 0,"
+            "PRIMARY KEY (`guild_id`, `role_id`),"
+            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+            # Append-only log of the points given, rolled up then pruned.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.THANKS_EVENTS.value}` ("
+            "`id` BIGINT NOT NULL AUTO_INCREMENT,"
+            "`guild_id` BIGINT NOT NULL,"
+            "`giver_id` BIGINT NOT NULL,"
+            "`receiver_id` BIGINT NOT NULL,"
+            "`channel_id` BIGINT NOT NULL,"
+            "`message_id` BIGINT NOT NULL,"
+            "`created_at` TIMESTAMP NOT NULL,"
+            "PRIMARY KEY (`id`),"
+            "KEY `idx_thanks_events_created_at` (`created_at`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+            # Points received, and thanks messages sent, per member and hour or day.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.THANKS_ROLLUPS.value}` ("
+            "`guild_id` BIGINT NOT NULL,"
+            "`user_id` BIGINT NOT NULL,"
+            "`period` ENUM('hour', 'day') NOT NULL,"
+            "`bucket` TIMESTAMP NOT NULL,"
+            "`received` INT NOT NULL DEFAULT 0,"
+            "`given` INT NOT NULL DEFAULT 0,"
+            "PRIMARY KEY (`guild_id`, `user_id`, `period`, `bucket`),"
+            "KEY `idx_thanks_rollups_period_bucket` (`period`, `bucket`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+            # Last event of the log each rollup has aggregated.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.ROLLUP_STATE.value}` ("
+            "`name` VARCHAR(32) NOT NULL,"
+            "`last_event_id` BIGINT NOT NULL,"
+            "PRIMARY KEY (`name`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+            # Points received and given per member over each rolling window
+            # ("week", ...), ranked through the index like `points`.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.THANKS_WINDOWS.value}` ("
+            "`guild_id` BIGINT NOT NULL,"
+            "`span` VARCHAR(8) NOT NULL,"
+            "`user_id` BIGINT NOT NULL,"
+            "`received` INT NOT NULL DEFAULT 0,"
+            "`given` INT NOT NULL DEFAULT 0,"
+            "PRIMARY KEY (`guild_id`, `span`, `user_id`),"
+            "KEY `idx_thanks_windows_received` (`guild_id`, `span`, `received`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+            # First day each window currently covers.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.THANKS_WINDOW_STARTS.value}` ("
+            "`span` VARCHAR(8) NOT NULL,"
+            "`start` TIMESTAMP NOT NULL,"
+            "PRIMARY KEY (`span`)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
+        ]
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                for stmt in statements:
+                    cursor.execute(stmt)
+                # Tables created before the index existed.
+                self._ensure_index(
+                    cursor,
+                    TableName.POINTS.value,
+                    "idx_points_guild_points",
+                    ["guild_id", "points"],
+                )
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _ensure_index(cursor, table: str, name: str, columns: list):
+        """Create an index unless it exists (MySQL has no CREATE INDEX IF NOT EXISTS)."""
+        cursor.execute(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s "
+            "LIMIT 1",
+            (table, name),
+        )
+        if not cursor.fetchall():
+            keys = ", ".join(f"`{column}`" for column in columns)
+            cursor.execute(f"CREATE INDEX `{name}` ON `{table}` ({keys})")
+
+    # ── Statements ─────────────────────────────────────────────────────────────
+
+    def execute(
+        self,
+        query: str,
+        params=None,
+        fetch: bool = False,
+        dictionary: bool = False,
+        prepared: bool = False,
+    ) -> QueryResult:
+        with self.pool.connection() as conn:
+            if prepared:
+                query, names = _positional(query)
+                if names:
+                    params = tuple(params[name] for name in names)
+                cursor = self._prepared_cursor(conn, query, dictionary)
+                cursor.execute(query, params)
+                rows = cursor.fetchall() if cursor.with_rows else None
+                return QueryResult(rows, cursor.rowcount, cursor.lastrowid)
+
+            cursor = conn.cursor(dictionary=dictionary)
+            try:
+                cursor.execute(query, params)
+                rows = cursor.fetchall() if fetch and cursor.with_rows else None
+                return QueryResult(rows, cursor.rowcount, cursor.lastrowid)
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def transaction(self):
+        with self.pool.connection() as conn:
+            conn.start_transaction()
+            cursor = conn.cursor()
+
+            def execute(query: str, params=None) -> QueryResult:
+                cursor.execute(query, params)
+                rows = cursor.fetchall() if cursor.with_rows else None
+                return QueryResult(rows, cursor.rowcount, cursor.lastrowid)
+
+            try:
+                yield execute
+                conn.commit()
+            except BaseException:
+                try:
+                    conn.rollback()
+                except mysql.connector.Error:
+                    pass  # Lost connection: the server rolled it back.
+                raise
+            finally:
+                cursor.close()
+
+    def _prepared_cursor(self, conn, query: str, dictionary: bool):
+        with self._prepared_lock:
+            statements = self._prepared.get(conn)
+            if statements is None:
+                statements = self._prepared[conn] = OrderedDict()
+        key = (query, dictionary)
+        cursor = statements.get(key)
+        if cursor is not None:
+            statements.move_to_end(key)
+            return cursor
+        cursor = statements[key] = conn.cursor(prepared=True, dictionary=dictionary)
+        if len(statements) > self.max_prepared:
+            _, oldest = statements.popitem(last=False)
+            try:
+                # Deallocates the statement on the server.
+                oldest.close()
+            except mysql.connector.Error:
+                pass
+        return cursor
+
+    def upsert_query(
+        self, table: str, columns: List[str], row_count: int, increment: tuple
+    ) -> str:
+        placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        updates = ", ".join(
+            (
+                f"{column} = {column} + VALUES({column})"
+                if column in increment
+                else f"{column} = VALUES({column})"
+            )
+            for column in columns
+        )
+        return (
+            f"INSERT INTO `{table}` ({', '.join(columns)}) "
+            f"VALUES {', '.join([placeholders] * row_count)} "
+            f"ON DUPLICATE KEY UPDATE {updates}"
+        )
+
+    award_points_query = (
+        f"INSERT INTO `{TableName.POINTS.value}` (guild_id, discord_user_id, points, "
+        "last_thanks, num_of_thanks, last_received_points_date, current_day_received_points) "
+        "VALUES (%(guild_id)s, %(user_id)s, %(delta)s, '2000-01-01 00:00:00', 0, %(now)s, 1) "
+        "ON DUPLICATE KEY UPDATE "
+        # Assignments are applied left to right, each one sees the columns
+        # already updated by the previous ones: keep this order. The window
+        # restarts, like with SQLite, unless it is open and has points:
+        # `last_received_points_date >= window_start AND current_day > 0`.
+        # The date is assigned last and only sees the new counter, which is 1
+        # after a restart but also for a member at a daily_limit of 1. So the
+        # limit branch sets LAST_INSERT_ID to 0, and the award branch to the
+        # new total (> 0), to tell them apart.
+        "points = IF("
+        "last_received_points_date >= %(window_start)s "
+        "AND current_day_received_points >= %(limit)s, "
+        "points + LAST_INSERT_ID(0), LAST_INSERT_ID(points + %(delta)s)), "
+        "current_day_received_points = IF("
+        "last_received_points_date >= %(window_start)s "
+        "AND current_day_received_points > 0, "
+        "IF(current_day_received_points >= %(limit)s, "
+        "current_day_received_points, current_day_received_points + 1), 1), "
+        "last_received_points_date = IF("
+        "last_received_points_date < %(window_start)s "
+        "OR last_received_points_date IS NULL "
+        "OR (current_day_received_points = 1 AND LAST_INSERT_ID() <> 0), "
+        "%(now)s, last_received_points_date)"
+    )
+
+    record_thanks_query = (
+        f"INSERT INTO `{TableName.POINTS.value}` (guild_id, discord_user_id, last_thanks, num_of_thanks) "
+        "VALUES (%(guild_id)s, %(user_id)s, %(now)s, 1) "
+        "ON DUPLICATE KEY UPDATE last_thanks = %(now)s, num_of_thanks = num_of_thanks + 1"
+    )
+
+    def award_points_total(
+        self, result: QueryResult, points_delta: int
+    ) -> Optional[int]:
+        # 1: row inserted, 2: row updated, 0: limit reached, nothing changed.
+        if result.rowcount == 1:
+            return points_delta
+        if result.rowcount == 2:
+            return result.lastrowid
+        return None
@@ -0,0 +1,333 @@
+import functools
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from bot.backends.base import PRIMARY_KEYS, Backend, QueryResult, TableName
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s")
+
+# TIMESTAMP columns hold "YYYY-MM-DD HH:MM:SS[.ffffff]" local times, which
+# compare in SQL as text and come back as datetime like with MySQL.
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter(
+    "TIMESTAMP", lambda value: datetime.fromisoformat(value.decode())
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _to_sqlite(query: str) -> str:
+    """%s -> ?, %(name)s -> :name"""
+    return _PLACEHOLDER.sub(
+        lambda match: f":{match.group(1)}" if match.group(1) else "?", query
+    )
+
+
+def _dict_factory(cursor, row) -> dict:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteBackend(Backend):
+    """
+    Embedded SQLite database in WAL mode, for small deployments and tests.
+
+    Each database thread gets its own connection: in WAL mode readers don't
+    block the writer nor each other, writers wait for each other up to
+    `busy_timeout`. sqlite3 keeps the last statements of each connection
+    prepared, so hot statements are parsed once per thread.
+    """
+
+    name = "sqlite"
+    errors = (sqlite3.Error,)
+    # Also raised for a missing table or a syntax error, see is_connection_error.
+    connection_errors = (sqlite3.OperationalError,)
+    # Primary result codes of a database locked past busy_timeout or that
+    # can't be opened.
+    UNAVAILABLE_CODES = (
+        sqlite3.SQLITE_BUSY,
+        sqlite3.SQLITE_LOCKED,
+        sqlite3.SQLITE_CANTOPEN,
+    )
+    insert_ignore = "INSERT OR IGNORE"
+
+    def __init__(self, path: str, max_connections: int = 4, busy_timeout: float = 5):
+        self.path = path
+        self.max_connections = max_connections
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SQLiteBackend":
+        return cls(
+            os.getenv("DB_PATH", "thanks.db"),
+            max_connections=int(os.getenv("DB_POOL_MAX_SIZE", 4)),
+        )
+
+    def open(self):
+        self._connection()
+
+    def is_connection_error(self, error: Exception) -> bool:
+        if not isinstance(error, self.connection_errors):
+            return False
+        code = getattr(error, "sqlite_errorcode", None)
+        if code is not None:
+            return code & 0xFF in self.UNAVAILABLE_CODES
+        message = str(error)
+        return "database is locked" in message or "unable to open" in message
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,  # autocommit, like the MySQL connections
+            check_same_thread=False,  # closed from another thread by close()
+            cached_statements=256,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Durable at each checkpoint instead of each commit, safe with WAL.
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        self._local.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    # ── Schema ─────────────────────────────────────────────────────────────────
+
+    def init_db(self):
+        statements = [
+            f"CREATE TABLE IF NOT EXISTS `{TableName.GUILDS.value}` ("
+            "`guild_id` INTEGER NOT NULL,"
+            "PRIMARY KEY (`guild_id`)"
+            ")",
+            f"CREATE TABLE IF NOT EXISTS `{TableName.ADMINS.value}` ("
+            "`discord_id` INTEGER NOT NULL,"
+            "PRIMARY KEY (`discord_id`)"
+            ")",
+            # WITHOUT ROWID: clustered on the primary key like InnoDB, so the
+            # (guild_id, points) index ends with discord_user_id and serves
+            # the leaderboard order without sorting.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.POINTS.value}` ("
+            "`guild_id` INTEGER NOT NULL,"
+            "`discord_user_id` INTEGER NOT NULL,"
+            "`points` INTEGER DEFAULT 0,"
+            "`last_thanks` TIMESTAMP DEFAULT (datetime('now', 'localtime')),"
+            "`num_of_thanks` INTEGER DEFAULT 0,"
+            "`last_received_points_date` TIMESTAMP DEFAULT (datetime('now', 'localtime')),"
+            "`current_day_received_points` INTEGER DEFAULT 0,"
+            "PRIMARY KEY (`guild_id`, `discord_user_id`),"
+            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
+            ") WITHOUT ROWID",
+            "CREATE INDEX IF NOT EXISTS `idx_points_guild_points` "
+            f"ON `{TableName.POINTS.value}` (`guild_id`, `points`)",
+            f"CREATE TABLE IF NOT EXISTS `{TableName.CHANNELS.value}` ("
+            "`channel_id` INTEGER NOT NULL,"
+            "`guild_id` INTEGER NOT NULL,"
+            "PRIMARY KEY (`channel_id`),"
+            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
+            ")",
+            f"CREATE TABLE IF NOT EXISTS `{TableName.AUTOROLES.value}` ("
+            "`role_id` INTEGER NOT NULL,"
+            "`guild_id` INTEGER NOT NULL,"
+            "`threshold` INTEGER NOT NULL,"
+            "PRIMARY KEY (`role_id`, `threshold`),"
+            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
+            ")",
+            # Binary collation (SQLite's default): "multumesc" and "mulțumesc"
+            # are different words.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.THANK_WORDS.value}` ("
+            "`guild_id` INTEGER NOT NULL,"
+            "`word` VARCHAR(32) NOT NULL,"
+            "PRIMARY KEY (`guild_id`, `word`),"
+            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
+            ")",
+            # Entries of the write journal already replayed.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.JOURNAL_APPLIED.value}` ("
+            "`entry_id` CHAR(32) NOT NULL,"
+            "`applied_at` TIMESTAMP DEFAULT (datetime('now', 'localtime')),"
+            "PRIMARY KEY (`entry_id`)"
+            ") WITHOUT ROWID",
+            # Autoroles being given to the members who already qualified, and
+            # the last (points, user) row done.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.AUTOROLE_BACKFILLS.value}` ("
+            "`guild_id` INTEGER NOT NULL,"
+            "`role_id` INTEGER NOT NULL,"
+            "`threshold` INTEGER NOT NULL,"
+            "`after_points` INTEGER DEFAULT NULL,"
+            "`after_user_id` INTEGER DEFAULT NULL,"
+            "`checked` INTEGER DEFAULT 0,"
+            "`granted` INTEGER DEFAULT 0,"
+            "PRIMARY KEY (`guild_id`, `role_id`),"
+            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
+            ")",
+            # Append-only log of the points given, rolled up then pruned.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.THANKS_EVENTS.value}` ("
+            "`id` INTEGER PRIMARY KEY,"
+            "`guild_id` INTEGER NOT NULL,"
+            "`giver_id` INTEGER NOT NULL,"
+            "`receiver_id` INTEGER NOT NULL,"
+            "`channel_id` INTEGER NOT NULL,"
+            "`message_id` INTEGER NOT NULL,"
+            "`created_at` TIMESTAMP NOT NULL"
+            ")",
+            "CREATE INDEX IF NOT EXISTS `idx_thanks_events_created_at` "
+            f"ON `{TableName.THANKS_EVENTS.value}` (`created_at`)",
+            # Points received, and thanks messages sent, per member and hour or day.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.THANKS_ROLLUPS.value}` ("
+            "`guild_id` INTEGER NOT NULL,"
+            "`user_id` INTEGER NOT NULL,"
+            "`period` VARCHAR(4) NOT NULL,"
+            "`bucket` TIMESTAMP NOT NULL,"
+            "`received` INTEGER NOT NULL DEFAULT 0,"
+            "`given` INTEGER NOT NULL DEFAULT 0,"
+            "PRIMARY KEY (`guild_id`, `user_id`, `period`, `bucket`)"
+            ") WITHOUT ROWID",
+            "CREATE INDEX IF NOT EXISTS `idx_thanks_rollups_period_bucket` "
+            f"ON `{TableName.THANKS_ROLLUPS.value}` (`period`, `bucket`)",
+            # Last event of the log each rollup has aggregated.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.ROLLUP_STATE.value}` ("
+            "`name` VARCHAR(32) NOT NULL,"
+            "`last_event_id` INTEGER NOT NULL,"
+            "PRIMARY KEY (`name`)"
+            ")",
+            # Points received and given per member over each rolling window
+            # ("week", ...), ranked through the index like `points`.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.THANKS_WINDOWS.value}` ("
+            "`guild_id` INTEGER NOT NULL,"
+            "`span` VARCHAR(8) NOT NULL,"
+            "`user_id` INTEGER NOT NULL,"
+            "`received` INTEGER NOT NULL DEFAULT 0,"
+            "`given` INTEGER NOT NULL DEFAULT 0,"
+            "PRIMARY KEY (`guild_id`, `span`, `user_id`)"
+            ") WITHOUT ROWID",
+            "CREATE INDEX IF NOT EXISTS `idx_thanks_windows_received` "
+            f"ON `{TableName.THANKS_WINDOWS.value}` (`guild_id`, `span`, `received`)",
+            # First day each window currently covers.
+            f"CREATE TABLE IF NOT EXISTS `{TableName.THANKS_WINDOW_STARTS.value}` ("
+            "`span` VARCHAR(8) NOT NULL,"
+            "`start` TIMESTAMP NOT NULL,"
+            "PRIMARY KEY (`span`)"
+            ")",
+        ]
+        conn = self._connection()
+        for stmt in statements:
+            conn.execute(stmt)
+
+    # ── Statements ─────────────────────────────────────────────────────────────
+
+    def execute(
+        self,
+        query: str,
+        params=None,
+        fetch: bool = False,
+        dictionary: bool = False,
+        prepared: bool = False,
+    ) -> QueryResult:
+        cursor = self._connection().cursor()
+        if dictionary:
+            cursor.row_factory = _dict_factory
+        try:
+            cursor.execute(_to_sqlite(query), params or ())
+            rows = cursor.fetchall() if fetch and cursor.description else None
+            return QueryResult(rows, cursor.rowcount, cursor.lastrowid)
+        finally:
+            cursor.close()
+
+    @contextmanager
+    def transaction(self):
+        conn = self._connection()
+        # Takes the write lock now rather than on the first write.
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.cursor()
+
+        def execute(query: str, params=None) -> QueryResult:
+            cursor.execute(_to_sqlite(query), params or ())
+            # Fetched so no statement is still running at COMMIT.
+            rows = cursor.fetchall() if cursor.description else None
+            return QueryResult(rows, cursor.rowcount, cursor.lastrowid)
+
+        try:
+            yield execute
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            cursor.close()
+
+    def upsert_query(
+        self, table: str, columns: List[str], row_count: int, increment: tuple
+    ) -> str:
+        keys = PRIMARY_KEYS[table]
+        placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        updates = ", ".join(
+            (
+                f"{column} = {column} + excluded.{column}"
+                if column in increment
+                else f"{column} = excluded.{column}"
+            )
+            for column in columns
+            if column not in keys
+        )
+        return (
+            f"INSERT INTO `{table}` ({', '.join(columns)}) "
+            f"VALUES {', '.join([placeholders] * row_count)} "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+        )
+
+    def points_after(
+        self, after: tuple, points: str = "points", user_id: str = "discord_user_id"
+    ) -> Tuple[str, tuple]:
+        # SQLite only seeks the index with the row value form.
+        return f"({points}, {user_id}) < (%s, %s)", (after[0], after[1])
+
+    # SET expressions see the row as it was before the update, and the WHERE
+    # of DO UPDATE skips members at the limit, who then get no RETURNING row.
+    award_points_query = (
+        f"INSERT INTO `{TableName.POINTS.value}` (guild_id, discord_user_id, points, "
+        "last_thanks, num_of_thanks, last_received_points_date, current_day_received_points) "
+        "VALUES (%(guild_id)s, %(user_id)s, %(delta)s, '2000-01-01 00:00:00', 0, %(now)s, 1) "
+        "ON CONFLICT (guild_id, discord_user_id) DO UPDATE SET "
+        "points = points + %(delta)s, "
+        "current_day_received_points = CASE WHEN "
+        "last_received_points_date >= %(window_start)s "
+        "AND current_day_received_points > 0 "
+        "THEN current_day_received_points + 1 ELSE 1 END, "
+        "last_received_points_date = CASE WHEN "
+        "last_received_points_date >= %(window_start)s "
+        "AND current_day_received_points > 0 "
+        "THEN last_received_points_date ELSE %(now)s END "
+        "WHERE NOT (last_received_points_date IS NOT NULL "
+        "AND last_received_points_date >= %(window_start)s "
+        "AND current_day_received_points >= %(limit)s) "
+        "RETURNING points"
+    )
+
+    record_thanks_query = (
+        f"INSERT INTO `{TableName.POINTS.value}` (guild_id, discord_user_id, last_thanks, num_of_thanks) "
+        "VALUES (%(guild_id)s, %(user_id)s, %(now)s, 1) "
+        "ON CONFLICT (guild_id, discord_user_id) DO UPDATE SET "
+        "last_thanks = excluded.last_thanks, num_of_thanks = num_of_thanks + 1"
+    )
+
+    def award_points_total(
+        self, result: QueryResult, points_delta: int
+    ) -> Optional[int]:
+        return result.rows[0][0] if result.rows else None
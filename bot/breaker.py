@@ -0,0 +1,47 @@
+import time
+
+
+class CircuitBreaker:
+    """
+    Stops sending statements to a database that stopped answering.
+
+    The circuit opens after `failure_threshold` consecutive connection
+    failures. While it is open no call goes through: callers fail fast
+    instead of each one waiting on a dead connection, and the owner probes
+    the database and closes the circuit (`reset`) once it answers again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(self, failure_threshold: int = 3):
+        self.failure_threshold = failure_threshold
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None  # time.monotonic() of the last trip
+        self.trips = 0
+
+    @property
+    def closed(self) -> bool:
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self) -> bool:
+        """Count a connection failure, True if it just opened the circuit."""
+        self.failures += 1
+        if self.closed and self.failures >= self.failure_threshold:
+            self.trip()
+            return True
+        return False
+
+    def trip(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+
+    def reset(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
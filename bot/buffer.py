@@ -0,0 +1,176 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from bot.database import DatabaseUnavailable, TableName
+
+
+class PointsBuffer:
+    """
+    Write-behind buffer in front of the `points` table.
+
+    Each pending entry holds the member's full, up to date row plus the
+    `points` and `num_of_thanks` increments not yet written. Entries are merged
+    per (guild_id, discord_user_id) and flushed as one multi-row upsert every
+    `interval` seconds or as soon as `max_entries` members are pending,
+    whichever comes first. Reads go through `load`/`merge_top` so they see
+    un-flushed changes. A flush made while the database is unavailable goes
+    to its write journal instead.
+    """
+
+    COLUMNS = (
+        "guild_id",
+        "discord_user_id",
+        "points",
+        "last_thanks",
+        "num_of_thanks",
+        "last_received_points_date",
+        "current_day_received_points",
+    )
+    INCREMENTS = ("points", "num_of_thanks")
+
+    def __init__(self, db, interval: float, max_entries: int = 500):
+        self.db = db
+        self.interval = interval
+        self.max_entries = max_entries
+        self.generation = 0  # Bumped every time a flush has been written.
+        self.flushes = 0
+        self.rows_flushed = 0
+
+        self._pending: Dict[Tuple[int, int], dict] = {}
+        self._flushing: Dict[Tuple[int, int], dict] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._early_flush: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the periodic flush and write everything still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[ERROR] Points buffer flush failed: {e}")
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+
+    def get(self, guild_id: int, user_id: int) -> Optional[dict]:
+        """Return a copy of the pending row of a member, if any."""
+        key = (guild_id, user_id)
+        entry = self._pending.get(key) or self._flushing.get(key)
+        return dict(entry["row"]) if entry else None
+
+    async def load(self, guild_id: int, user_id: int) -> Optional[dict]:
+        """Return the member's row including un-flushed changes."""
+        while True:
+            row = self.get(guild_id, user_id)
+            if row is not None:
+                return row
+            generation = self.generation
+            result = await self.db.select(
+                TableName.POINTS.value,
+                where={"guild_id": guild_id, "discord_user_id": user_id},
+            )
+            # Another coroutine may have buffered a change for this member
+            # while we were waiting, its row is newer than what we read.
+            row = self.get(guild_id, user_id)
+            if row is not None:
+                return row
+            # A flush written while we were reading may not be in our result.
+            if generation == self.generation:
+                return result[0] if result else None
+
+    def merge_top(self, guild_id: int, rows: List[dict], limit: int) -> List[dict]:
+        """Overlay pending rows of a guild on a `points DESC, discord_user_id DESC` query result."""
+        merged = {row["discord_user_id"]: row for row in rows}
+        for entries in (self._flushing, self._pending):
+            for (entry_guild_id, user_id), entry in entries.items():
+                if entry_guild_id == guild_id:
+                    merged[user_id] = entry["row"]
+        rows = sorted(
+            merged.values(),
+            key=lambda row: (row["points"], row["discord_user_id"]),
+            reverse=True,
+        )
+        return rows[:limit]
+
+    # ── Writes ─────────────────────────────────────────────────────────────────
+
+    def add(self, row: dict, points: int = 0, num_of_thanks: int = 0):
+        """
+        Buffer a member's updated row along with the increments it contains.
+
+        Args:
+            row (dict): The full row after the change.
+            points (int): Points added by the change.
+            num_of_thanks (int): Thanks added by the change.
+        """
+        key = (row["guild_id"], row["discord_user_id"])
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = self._pending[key] = {"row": row, "points": 0, "num_of_thanks": 0}
+        entry["row"] = row
+        entry["points"] += points
+        entry["num_of_thanks"] += num_of_thanks
+
+        if len(self._pending) >= self.max_entries and (
+            self._early_flush is None or self._early_flush.done()
+        ):
+            self._early_flush = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        """Write all pending entries with one multi-row statement."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            rows = []
+            for entry in self._flushing.values():
+                # Increment columns carry the delta: on insert the row starts
+                # from zero so the delta is also the absolute value.
+                row = {column: entry["row"][column] for column in self.COLUMNS}
+                row["points"] = entry["points"]
+                row["num_of_thanks"] = entry["num_of_thanks"]
+                rows.append(row)
+            try:
+                try:
+                    await self.db.upsert(
+                        TableName.POINTS.value, rows, increment=self.INCREMENTS
+                    )
+                except DatabaseUnavailable:
+                    self.db.defer(
+                        "upsert",
+                        table=TableName.POINTS.value,
+                        rows=rows,
+                        increment=self.INCREMENTS,
+                    )
+            except BaseException:
+                self._restore()
+                raise
+            self.generation += 1
+            self.flushes += 1
+            self.rows_flushed += len(rows)
+            self._flushing = {}
+
+    def _restore(self):
+        """Put entries of a failed flush back in front of newer pending changes."""
+        for key, entry in self._flushing.items():
+            newer = self._pending.get(key)
+            if newer is None:
+                self._pending[key] = entry
+            else:
+                newer["points"] += entry["points"]
+                newer["num_of_thanks"] += entry["num_of_thanks"]
+        self._flushing = {}
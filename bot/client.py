@@ -1,14 +1,20 @@
 from discord.ext import commands
 import discord
+import os
+import time
 
 from bot.events.points import Points
 from bot.config.cogs_list import load_cogs, cogs
-from bot.database import db, TableName
+from bot.database import adb, DatabaseUnavailable, TableName
+from bot.dispatcher import ShardedDispatcher
 from bot.logger import Logger
+from bot.outbound import OutboundScheduler
+from bot.prefilter import GatewayPrefilter
+from bot import metrics
 
 
 class Client(commands.Bot):
-    def __init__(self):
+    def __init__(self, db=None):
         intents = discord.Intents.none()
         intents.guilds = True
         intents.guild_messages = True
@@ -21,10 +27,54 @@ class Client(commands.Bot):
             chunk_guilds_at_startup=False,
         )
 
-        self.db = db
+        # AsyncThanksDB unless another implementation is given (benchmarks).
+        self.db = db or adb
         self.logger = Logger(self)
+        # REST calls made in the background: role grants, DMs, confirmations.
+        self.outbound = OutboundScheduler(
+            max_concurrency=int(os.getenv("OUTBOUND_CONCURRENCY", 4))
+        )
         self.points_event = Points(self)
 
+        metrics.background_tasks.function = lambda: len(
+            self.points_event.manager._background_tasks
+        )
+        metrics.outbound_queue_depth.function = lambda: len(self.outbound)
+        metrics.thanks_events_pending.function = lambda: len(
+            self.points_event.manager.history
+        )
+        reply_authors = self.points_event.reply_authors
+        metrics.reply_cache_entries.function = lambda: len(reply_authors)
+        metrics.reply_cache_entry_bytes.function = reply_authors.bytes_per_entry
+        breaker = getattr(self.db, "breaker", None)
+        if breaker is not None:
+            metrics.db_circuit_open.function = lambda: int(not breaker.closed)
+        journal = getattr(self.db, "journal", None)
+        if journal is not None:
+            metrics.db_journal_entries.function = lambda: len(journal)
+        # Messages are handled on sharded worker queues, inline when 0.
+        dispatch_workers = int(os.getenv("DISPATCH_WORKERS", 0))
+        self.dispatcher = None
+        if dispatch_workers:
+            self.dispatcher = ShardedDispatcher(
+                self.handle_message,
+                workers=dispatch_workers,
+                max_depth=int(os.getenv("DISPATCH_MAX_DEPTH", 1000)),
+                shed=os.getenv("DISPATCH_SHED", "newest"),
+            )
+            metrics.dispatch_queue_depth.function = lambda: len(self.dispatcher)
+
+        self.prefilter = None
+        if os.getenv("GATEWAY_PREFILTER", "0") == "1":
+            self.prefilter = GatewayPrefilter(self)
+
+        metrics_port = int(os.getenv("METRICS_PORT", 0))
+        self.metrics = None
+        if metrics_port:
+            self.metrics = metrics.MetricsServer(
+                os.getenv("METRICS_HOST", "127.0.0.1"), metrics_port
+            )
+
     async def setup_hook(self):
         """
         This function is a coroutine.\n
@@ -34,40 +84,75 @@ class Client(commands.Bot):
         """
         print("[INFO] Setting up the bot...")
 
-        self.fetch_guilds_config()
+        if self.metrics is not None:
+            await self.metrics.start()
+        await self.db.open()
+        await self.fetch_guilds_config()
+        await self.points_event.start()
+        if self.dispatcher is not None:
+            self.dispatcher.start()
+        if self.prefilter is not None:
+            # Needs guilds_config and the thank words, loaded above.
+            self.prefilter.install()
 
         await load_cogs(self, cogs)
 
     async def on_guild_join(self, guild: discord.Guild):
-        self.db.insert(TableName.GUILDS.value, {"guild_id": guild.id})
-        self.fetch_guilds_config()
+        await self.db.insert(TableName.GUILDS.value, {"guild_id": guild.id})
+        self.add_guild_config(guild.id)
         await self.tree.sync(guild=guild)
         print(f"[INFO] Bot has been added to {guild.name}")
 
     async def on_guild_remove(self, guild: discord.Guild):
-        self.db.delete(TableName.GUILDS.value, {"guild_id": guild.id})
-        self.fetch_guilds_config()
+        # Its backfill rows reference the guild's, they are deleted first.
+        await self.points_event.manager.backfill.forget_guild(guild.id)
+        await self.db.delete(TableName.GUILDS.value, {"guild_id": guild.id})
+        self.guilds_config.pop(guild.id, None)
+        self.points_event.manager.tracker.forget_guild(guild.id)
+        self.points_event.manager.autoroles.forget_guild(guild.id)
+        self.points_event.manager.leaderboard.invalidate(guild.id)
+        self.points_event.manager.ranks.invalidate(guild.id)
         print(f"[INFO] Bot has been removed from {guild.name}")
 
-    def fetch_guilds_config(self):
-        self.guilds_config = {}
-        all_guilds = [
-            guild["guild_id"]
-            for guild in self.db.select(TableName.GUILDS.value, ["guild_id"])
-        ]
-        for guild in all_guilds:
-            blacklisted_channel = self.db.select(
-                TableName.CHANNELS.value, ["channel_id"], {"guild_id": guild}
+    async def fetch_guilds_config(self):
+        """Load the config of every guild: one query for the guilds, one for all the channels."""
+        blacklisted_channels = {}
+        for channel in await self.db.select(
+            TableName.CHANNELS.value, ["guild_id", "channel_id"]
+        ):
+            blacklisted_channels.setdefault(channel["guild_id"], set()).add(
+                channel["channel_id"]
             )
-            self.guilds_config[guild] = {"blacklisted_channel": blacklisted_channel}
+
+        self.guilds_config = {}
+        for guild in await self.db.select(TableName.GUILDS.value, ["guild_id"]):
+            self.guilds_config[guild["guild_id"]] = {
+                "blacklisted_channel": frozenset(
+                    blacklisted_channels.get(guild["guild_id"], ())
+                )
+            }
         print("[INFO] Guilds config fetched")
 
+    def add_guild_config(self, guild_id: int):
+        self.guilds_config.setdefault(guild_id, {"blacklisted_channel": frozenset()})
+
+    def blacklist_channel(self, guild_id: int, channel_id: int):
+        self.add_guild_config(guild_id)
+        guild_config = self.guilds_config[guild_id]
+        guild_config["blacklisted_channel"] |= {channel_id}
+
+    def whitelist_channel(self, guild_id: int, channel_id: int):
+        self.add_guild_config(guild_id)
+        guild_config = self.guilds_config[guild_id]
+        guild_config["blacklisted_channel"] -= {channel_id}
+
     async def on_ready(self):
         await self.wait_until_ready()
 
         for guild in self.guilds:
-            if guild.id not in self.guilds_config.keys():
-                self.db.insert(TableName.GUILDS.value, {"guild_id": guild.id})
+            if guild.id not in self.guilds_config:
+                await self.db.insert(TableName.GUILDS.value, {"guild_id": guild.id})
+                self.add_guild_config(guild.id)
             await self.tree.sync(guild=guild)
         await self.tree.sync()
         await self.logger.setup()
@@ -90,13 +175,44 @@ class Client(commands.Bot):
         print("-----------------------------------------")
 
     async def on_message(self, message: discord.Message):
+        metrics.messages_seen.inc()
+        if message.guild is not None:
+            self.points_event.reply_authors.add(message.id, message.author.id)
         if message.author.bot:
             return
 
-        guild_config = self.guilds_config.get(
-            message.guild.id, {"blacklisted_channel": []}
-        )
-        if message.channel.id not in [
-            channel["channel_id"] for channel in guild_config["blacklisted_channel"]
-        ]:
+        guild_config = self.guilds_config.get(message.guild.id)
+        if guild_config and message.channel.id in guild_config["blacklisted_channel"]:
+            return
+        if self.dispatcher is None or self.dispatcher.closing:
+            await self.handle_message(message)
+        # Per sender: their messages are handled in order, which the
+        # cooldown relies on.
+        elif not self.dispatcher.submit((message.guild.id, message.author.id), message):
+            self.logger.debug(
+                f"Guild: {message.guild.id} - Queue full, message {message.id} dropped."
+            )
+
+    async def handle_message(self, message: discord.Message):
+        start = time.perf_counter()
+        try:
             await self.points_event.process_message(message)
+        except DatabaseUnavailable:
+            # A member not tracked in memory while the database is down.
+            metrics.rejections.inc(reason="db_unavailable")
+        finally:
+            metrics.message_seconds.observe(time.perf_counter() - start)
+
+    async def close(self):
+        await self.logger.close()
+        # Still connected: queued messages may fetch the message they reply
+        # to. Messages received meanwhile are handled inline.
+        if self.dispatcher is not None:
+            await self.dispatcher.close()
+        await self.points_event.drain()
+        await super().close()
+        await self.outbound.close()
+        await self.points_event.close()
+        await self.db.close()
+        if self.metrics is not None:
+            await self.metrics.close()
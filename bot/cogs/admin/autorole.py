@@ -2,13 +2,15 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
-from bot.database import TableName
+from bot.database import DatabaseUnavailable, TableName
 
 
 class Autorole(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
         self.db = self.bot.db
+        self.autoroles = self.bot.points_event.manager.autoroles
+        self.backfill = self.bot.points_event.manager.backfill
 
     @app_commands.command(
         name="add_autorole",
@@ -47,20 +49,16 @@ class Autorole(commands.Cog):
             )
             return
 
-        autoroles = self.db.select(
-            TableName.AUTOROLES.value,
-            where={"guild_id": interaction.guild.id},
-        )
-        for autorole in autoroles:
-            if autorole["role_id"] == role.id:
+        for autorole_threshold, role_id in self.autoroles.get(interaction.guild.id):
+            if role_id == role.id:
                 await interaction.response.send_message(
-                    f"The role <@&{role.id}> is already an autorole ({autorole['threshold']} points).",
+                    f"The role <@&{role.id}> is already an autorole ({autorole_threshold} points).",
                     ephemeral=True,
                 )
                 return
 
         try:
-            self.db.insert(
+            await self.db.insert(
                 TableName.AUTOROLES.value,
                 {
                     "guild_id": interaction.guild.id,
@@ -68,8 +66,16 @@ class Autorole(commands.Cog):
                     "threshold": threshold,
                 },
             )
+            self.autoroles.add(interaction.guild.id, role.id, threshold)
+            await self.backfill.start(interaction.guild.id, role.id, threshold)
+            await interaction.response.send_message(
+                content=f"The role <@&{role.id}> will now be given to users with a total of {threshold} points. "
+                "Members who already have them are getting it in the background.",
+                ephemeral=True,
+            )
+        except DatabaseUnavailable:
             await interaction.response.send_message(
-                content=f"The role <@&{role.id}> will now be given to users with a total of {threshold} points.",
+                "The database is temporarily unavailable, please try again later.",
                 ephemeral=True,
             )
         except discord.errors.HTTPException as e:
@@ -96,17 +102,24 @@ class Autorole(commands.Cog):
             return
 
         try:
-            self.db.delete(
+            await self.db.delete(
                 TableName.AUTOROLES.value,
                 {
                     "guild_id": interaction.guild.id,
                     "role_id": role.id,
                 },
             )
+            self.autoroles.remove(interaction.guild.id, role.id)
+            await self.backfill.cancel(interaction.guild.id, role.id)
             await interaction.response.send_message(
                 content=f"The role <@&{role.id}> isn't in the autoroles anymore.",
                 ephemeral=True,
             )
+        except DatabaseUnavailable:
+            await interaction.response.send_message(
+                "The database is temporarily unavailable, please try again later.",
+                ephemeral=True,
+            )
         except discord.errors.HTTPException as e:
             await interaction.response.send_message(e, ephemeral=True)
 
@@ -125,11 +138,8 @@ class Autorole(commands.Cog):
             )
             return
 
-        server_autoroles = self.db.select(
-            TableName.AUTOROLES.value,
-            where={"guild_id": interaction.guild.id},
-            order_by="threshold DESC",
-        )
+        server_autoroles = self.autoroles.get(interaction.guild.id)[::-1]
+        backfills = self.backfill.progress(interaction.guild.id)
 
         # Build the response embed
         embed = discord.Embed(
@@ -145,10 +155,12 @@ class Autorole(commands.Cog):
             )
         else:
             embed.description = "Here are the autoroles for this server:\n\n"
-            for autorole in server_autoroles:
-                role_id = autorole["role_id"]
-                threshold = autorole["threshold"]
-                embed.description += f"<@&{role_id}>: {threshold} points\n"
+            for threshold, role_id in server_autoroles:
+                embed.description += f"<@&{role_id}>: {threshold} points"
+                if role_id in backfills:
+                    checked, granted = backfills[role_id]
+                    embed.description += f" (being given to members who qualified: {checked} checked, {granted} given)"
+                embed.description += "\n"
 
         try:
             await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -3,7 +3,7 @@ from discord import app_commands
 from discord.ext import commands
 from typing import Union
 
-from bot.database import TableName
+from bot.database import DatabaseUnavailable, TableName
 
 _ADMIN_ONLY_MSG = "Only server administrator can use this command"
 
@@ -13,6 +13,10 @@ class Channel(commands.Cog):
         self.bot = bot
         self.db = self.bot.db
 
+    def _blacklisted_channels(self, guild_id: int) -> frozenset:
+        guild_config = self.bot.guilds_config.get(guild_id)
+        return guild_config["blacklisted_channel"] if guild_config else frozenset()
+
     @app_commands.command(
         name="channel_whitelist",
         description="Remove the channel from the blacklisted channels, allowing the bot to interact in it",
@@ -27,27 +31,27 @@ class Channel(commands.Cog):
             await interaction.response.send_message(_ADMIN_ONLY_MSG, ephemeral=True)
             return
 
-        if channel.id not in [
-            channel["channel_id"]
-            for channel in self.bot.guilds_config[channel.guild.id][
-                "blacklisted_channel"
-            ]
-        ]:
+        if channel.id not in self._blacklisted_channels(channel.guild.id):
             await interaction.response.send_message(
                 content="The channel is already whitelisted", ephemeral=True
             )
             return
 
         try:
-            self.db.delete(
+            await self.db.delete(
                 TableName.CHANNELS.value,
                 {"guild_id": channel.guild.id, "channel_id": channel.id},
             )
-            self.bot.fetch_guilds_config()
+            self.bot.whitelist_channel(channel.guild.id, channel.id)
             await interaction.response.send_message(
                 content=f"The channel <#{channel.id}> will now check users message and give points when someone thanks another member.",
                 ephemeral=True,
             )
+        except DatabaseUnavailable:
+            await interaction.response.send_message(
+                "The database is temporarily unavailable, please try again later.",
+                ephemeral=True,
+            )
         except discord.errors.HTTPException as e:
             await interaction.response.send_message(e, ephemeral=True)
 
@@ -65,27 +69,27 @@ class Channel(commands.Cog):
             await interaction.response.send_message(_ADMIN_ONLY_MSG, ephemeral=True)
             return
 
-        if channel.id in [
-            channel["channel_id"]
-            for channel in self.bot.guilds_config[channel.guild.id][
-                "blacklisted_channel"
-            ]
-        ]:
+        if channel.id in self._blacklisted_channels(channel.guild.id):
             await interaction.response.send_message(
                 content="The channel is already blacklisted", ephemeral=True
             )
             return
 
         try:
-            self.db.insert(
+            await self.db.insert(
                 TableName.CHANNELS.value,
                 {"guild_id": channel.guild.id, "channel_id": channel.id},
             )
-            self.bot.fetch_guilds_config()
+            self.bot.blacklist_channel(channel.guild.id, channel.id)
             await interaction.response.send_message(
                 content=f"The channel <#{channel.id}> will no longer check users message and give points when someone thanks another member.",
                 ephemeral=True,
             )
+        except DatabaseUnavailable:
+            await interaction.response.send_message(
+                "The database is temporarily unavailable, please try again later.",
+                ephemeral=True,
+            )
         except discord.errors as e:
             await interaction.response.send_message(e, ephemeral=True)
 
@@ -102,10 +106,7 @@ class Channel(commands.Cog):
             await interaction.response.send_message(_ADMIN_ONLY_MSG, ephemeral=True)
             return
 
-        blacklisted_ids = {
-            c["channel_id"]
-            for c in self.bot.guilds_config[interaction.guild.id]["blacklisted_channel"]
-        }
+        blacklisted_ids = self._blacklisted_channels(interaction.guild.id)
 
         embed = discord.Embed(
             title="Blacklisted Channels",
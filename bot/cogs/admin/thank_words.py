@@ -0,0 +1,133 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from bot.database import DatabaseUnavailable, TableName
+from bot.events.matcher import ThankMatcher, normalize_word
+
+_ADMIN_ONLY_MSG = "Only server administrator can use this command"
+
+
+class ThankWords(commands.Cog):
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.db = self.bot.db
+        self.validator = self.bot.points_event.validator
+
+    def _guild_words(self, guild_id: int) -> frozenset:
+        return self.validator.guild_thank_words.get(guild_id, frozenset())
+
+    @app_commands.command(
+        name="add_thank_word",
+        description="Add a word that counts as a thank you in this server",
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def add_thank_word(self, interaction: discord.Interaction, word: str):
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message(_ADMIN_ONLY_MSG, ephemeral=True)
+            return
+
+        word = normalize_word(word.strip())
+        if len(word) > 32 or not ThankMatcher.TOKEN.fullmatch(word):
+            await interaction.response.send_message(
+                "A thank word must be a single word of at most 32 characters.",
+                ephemeral=True,
+            )
+            return
+
+        words = self._guild_words(interaction.guild.id)
+        if word in self.validator.matcher.words or word in words:
+            await interaction.response.send_message(
+                f"`{word}` is already a thank word.", ephemeral=True
+            )
+            return
+
+        try:
+            await self.db.insert(
+                TableName.THANK_WORDS.value,
+                {"guild_id": interaction.guild.id, "word": word},
+            )
+            self.validator.set_guild_thank_words(interaction.guild.id, words | {word})
+            await interaction.response.send_message(
+                content=f"`{word}` now counts as a thank you in this server.",
+                ephemeral=True,
+            )
+        except DatabaseUnavailable:
+            await interaction.response.send_message(
+                "The database is temporarily unavailable, please try again later.",
+                ephemeral=True,
+            )
+        except discord.errors.HTTPException as e:
+            await interaction.response.send_message(e, ephemeral=True)
+
+    @app_commands.command(
+        name="remove_thank_word",
+        description="Remove a thank word added to this server",
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def remove_thank_word(self, interaction: discord.Interaction, word: str):
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message(_ADMIN_ONLY_MSG, ephemeral=True)
+            return
+
+        word = normalize_word(word.strip())
+        words = self._guild_words(interaction.guild.id)
+        if word not in words:
+            await interaction.response.send_message(
+                f"`{word}` isn't a thank word of this server.", ephemeral=True
+            )
+            return
+
+        try:
+            await self.db.delete(
+                TableName.THANK_WORDS.value,
+                {"guild_id": interaction.guild.id, "word": word},
+            )
+            self.validator.set_guild_thank_words(interaction.guild.id, words - {word})
+            await interaction.response.send_message(
+                content=f"`{word}` no longer counts as a thank you in this server.",
+                ephemeral=True,
+            )
+        except DatabaseUnavailable:
+            await interaction.response.send_message(
+                "The database is temporarily unavailable, please try again later.",
+                ephemeral=True,
+            )
+        except discord.errors.HTTPException as e:
+            await interaction.response.send_message(e, ephemeral=True)
+
+    @app_commands.command(
+        name="show_thank_words",
+        description="Show the thank words added to this server",
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def show_thank_words(self, interaction: discord.Interaction):
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message(_ADMIN_ONLY_MSG, ephemeral=True)
+            return
+
+        words = self._guild_words(interaction.guild.id)
+        embed = discord.Embed(
+            title="Thank Words",
+            description="Here are the thank words added to this server:",
+            color=discord.Color.blue(),
+        )
+        if not words:
+            embed.add_field(
+                name="No thank words",
+                value="This server only uses the default thank words.",
+                inline=False,
+            )
+        else:
+            embed.description = "Here are the thank words added to this server:\n\n"
+            for word in sorted(words):
+                embed.description += f"`{word}`\n"
+
+        try:
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except discord.errors.HTTPException as e:
+            await interaction.response.send_message(e, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(ThankWords(bot))
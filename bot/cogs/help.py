@@ -22,8 +22,8 @@ class Help(commands.Cog):
         embed.add_field(
             name="General",
             value=(
-                "`/stats_thanks` — View your points & thanks count (or another member's)\n"
-                "`/leaderboard_thanks` — See the top 10 most helpful members\n"
+                "`/stats_thanks` — View your points, thanks count & rank (or another member's)\n"
+                "`/leaderboard_thanks` — Browse the most helpful members, 10 per page, of all time or the last 7/30 days or season\n"
                 "`/help` — Show this message"
             ),
             inline=False,
@@ -37,7 +37,10 @@ class Help(commands.Cog):
                 "`/show_blacklisted_channels` — Show all blacklisted channels for the server\n"
                 "`/add_autorole` — Assign a role when a member reaches a point threshold\n"
                 "`/remove_autorole` — Remove an autorole\n"
-                "`/show_autoroles` — List all configured autoroles"
+                "`/show_autoroles` — List all configured autoroles\n"
+                "`/add_thank_word` — Count another word as a thank you\n"
+                "`/remove_thank_word` — Remove a thank word of the server\n"
+                "`/show_thank_words` — List the thank words of the server"
             ),
             inline=False,
         )
@@ -2,49 +2,167 @@ import discord
 
 from discord import app_commands
 from discord.ext import commands
+from typing import Optional
 
-from bot.database import TableName
+from bot.database import DatabaseUnavailable
+
+PAGE_SIZE = 10
+
+# Window -> title suffix, None is all time.
+WINDOW_TITLES = {
+    None: "",
+    "week": " of the Last 7 Days",
+    "month": " of the Last 30 Days",
+    "season": " This Season",
+}
+
+
+def build_leaderboard_embed(
+    guild: discord.Guild, users: list, first_rank: int, window: Optional[str] = None
+) -> discord.Embed:
+    if first_rank == 1:
+        title = f"{guild.name} Top {PAGE_SIZE} Helpers"
+    else:
+        title = f"{guild.name} Helpers {first_rank}-{first_rank + len(users) - 1}"
+    title += WINDOW_TITLES[window]
+    embed = discord.Embed(title=title, description="", color=0x1E1F22)
+    if guild.icon:
+        embed.set_thumbnail(url=guild.icon.url)
+    for i, user in enumerate(users):
+        rank = first_rank + i
+        member_mention = f"<@{user['discord_user_id']}>"
+        desc = f"helped {user['points']} times\n-# ​ ​ ​ ​ ◉ and has thanked {user['num_of_thanks']} times\n"
+        if rank == 1:
+            desc = f"🥇__{member_mention}__ - " + desc
+        elif rank == 2:
+            desc = f"🥈__{member_mention}__ - " + desc
+        elif rank == 3:
+            desc = f"🥉__{member_mention}__ - " + desc
+        else:
+            desc = f"{member_mention} - " + desc
+        embed.description += f"{rank}. {desc}"
+    return embed
+
+
+class LeaderboardView(discord.ui.View):
+    """Previous/Next buttons, each page is fetched after the last row of the previous one."""
+
+    def __init__(
+        self,
+        manager,
+        guild: discord.Guild,
+        author_id: int,
+        first_page: list,
+        window: Optional[str] = None,
+    ):
+        super().__init__(timeout=180)
+        self.manager = manager
+        self.guild = guild
+        self.author_id = author_id
+        self.window = window
+        self.pages = [first_page]
+        self.page = 0
+        self.message = None
+        self._update_buttons()
+
+    def embed(self) -> discord.Embed:
+        return build_leaderboard_embed(
+            self.guild, self.pages[self.page], self.page * PAGE_SIZE + 1, self.window
+        )
+
+    def _update_buttons(self):
+        self.previous.disabled = self.page == 0
+        self.next.disabled = len(self.pages[self.page]) < PAGE_SIZE
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message(
+                "Run /leaderboard_thanks to browse the leaderboard yourself.",
+                ephemeral=True,
+            )
+            return False
+        return True
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, _: discord.ui.Button):
+        self.page -= 1
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, _: discord.ui.Button):
+        if self.page + 1 == len(self.pages):
+            last = self.pages[self.page][-1]
+            try:
+                users = await self.manager.get_points_page(
+                    self.guild.id,
+                    PAGE_SIZE,
+                    (last["points"], last["discord_user_id"]),
+                    self.window,
+                )
+            except DatabaseUnavailable:
+                await interaction.response.send_message(
+                    "The database is temporarily unavailable, please try again later.",
+                    ephemeral=True,
+                )
+                return
+            if not users:
+                self.next.disabled = True
+                await interaction.response.edit_message(view=self)
+                return
+            self.pages.append(users)
+        self.page += 1
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.errors.HTTPException:
+                pass
 
 
 class Leaderboard(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.db = self.bot.db
 
     @app_commands.command(
         name="leaderboard_thanks", description="See the leaderboard of thanks"
     )
-    async def leaderboard_thanks(self, interaction: discord.Interaction):
+    @app_commands.describe(window="Only count the points of this period")
+    @app_commands.choices(
+        window=[
+            app_commands.Choice(name="All time", value="all"),
+            app_commands.Choice(name="Last 7 days", value="week"),
+            app_commands.Choice(name="Last 30 days", value="month"),
+            app_commands.Choice(name="This season (quarter)", value="season"),
+        ]
+    )
+    async def leaderboard_thanks(
+        self, interaction: discord.Interaction, window: str = "all"
+    ):
         try:
-            users = self.db.select(
-                TableName.POINTS.value,
-                where={"guild_id": interaction.guild_id},
-                limit=10,
-                order_by="points DESC",
-            )
-            guild_name = interaction.guild.name
-            embed = discord.Embed(
-                title=f"{guild_name} Top 10 Helpers",
-                description="",
-                color=0x1E1F22,
+            window = None if window == "all" else window
+            manager = self.bot.points_event.manager
+            try:
+                # First pages are served from memory once cached.
+                users = await manager.get_points_page(
+                    interaction.guild_id, PAGE_SIZE, window=window
+                )
+            except DatabaseUnavailable:
+                await interaction.response.send_message(
+                    "The database is temporarily unavailable, please try again later.",
+                    ephemeral=True,
+                )
+                return
+            view = LeaderboardView(
+                manager, interaction.guild, interaction.user.id, users, window
             )
-            if interaction.guild.icon:
-                embed.set_thumbnail(url=interaction.guild.icon.url)
-            for i, user in enumerate(users):
-                rank = i + 1
-                member_mention = f"<@{user['discord_user_id']}>"
-                desc = f"helped {user['points']} times\n-# ​ ​ ​ ​ ◉ and has thanked {user['num_of_thanks']} times\n"
-                if rank == 1:
-                    desc = f"🥇__{member_mention}__ - " + desc
-                elif rank == 2:
-                    desc = f"🥈__{member_mention}__ - " + desc
-                elif rank == 3:
-                    desc = f"🥉__{member_mention}__ - " + desc
-                else:
-                    desc = f"{member_mention} - " + desc
-                embed.description += f"{rank}. {desc}"
-
-            await interaction.response.send_message(embed=embed)
+            await interaction.response.send_message(embed=view.embed(), view=view)
+            view.message = await interaction.original_response()
         except discord.errors.HTTPException as e:
             print(f"[ERROR] {e}")
 
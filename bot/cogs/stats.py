@@ -3,13 +3,12 @@ from discord import app_commands
 from discord.ext import commands
 from typing import Union
 
-from bot.database import TableName
+from bot.database import DatabaseUnavailable
 
 
 class StatsThank(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.db = self.bot.db
 
     @app_commands.command(name="stats_thanks", description="Get your merci stats")
     async def stats_thanks(
@@ -21,15 +20,43 @@ class StatsThank(commands.Cog):
             if target is None:
                 target = interaction.user
 
-            user = self.db.select(
-                TableName.POINTS.value,
-                where={"guild_id": interaction.guild.id, "discord_user_id": target.id},
-            )
+            # Goes through the points manager to include buffered changes.
+            manager = self.bot.points_event.manager
+            try:
+                user = await manager.get_user_points(interaction.guild.id, target.id)
+            except DatabaseUnavailable:
+                # Members who thanked or were thanked lately are tracked.
+                user = manager.tracker.peek(interaction.guild.id, target.id)
+                if user is None:
+                    await interaction.response.send_message(
+                        "The database is temporarily unavailable, please try again later.",
+                        ephemeral=True,
+                    )
+                    return
 
             if user:
+                description = f"You have {user['points']} point(s) and has thanked {user['num_of_thanks']} times"
+                try:
+                    rank, total = await manager.get_rank(
+                        interaction.guild.id, user["points"]
+                    )
+                    if rank is not None:
+                        description += f"\nRank #{rank} of {total}"
+                    recent = await manager.history.recent(
+                        interaction.guild.id, target.id
+                    )
+                    for window, label in (
+                        ("day", "Last 24 hours"),
+                        ("week", "Last 7 days"),
+                        ("month", "Last 30 days"),
+                    ):
+                        received, given = recent[window]
+                        description += f"\n{label}: {received} received, {given} given"
+                except DatabaseUnavailable:
+                    description += "\nRank and recent stats are temporarily unavailable"
                 embed = discord.Embed(
                     title="",
-                    description=f"You have {user[0]['points']} point(s) and has thanked {user[0]['num_of_thanks']} times",
+                    description=description,
                     color=0x1E1F22,
                 )
             else:
@@ -3,6 +3,7 @@ from bot.cogs.admin.channels import setup
 from bot.cogs.leaderboard import setup
 from bot.cogs.admin.autorole import setup
 from bot.cogs.help import setup
+from bot.cogs.admin.thank_words import setup
 
 import discord
 
@@ -12,6 +13,7 @@ cogs = [
     "bot.cogs.leaderboard",
     "bot.cogs.admin.autorole",
     "bot.cogs.help",
+    "bot.cogs.admin.thank_words",
 ]
 
 
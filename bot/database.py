@@ -1,134 +1,127 @@
+import asyncio
+import functools
+import logging
 import os
-import threading
+import random
 import time
-from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 
-import mysql.connector
+from bot import metrics
+from bot.backends.base import Backend, QueryResult, TableName, create_backend
+from bot.breaker import CircuitBreaker
+from bot.journal import WriteJournal
 
+# Queries are logged at DEBUG, off unless DB_LOG_LEVEL=DEBUG; queries slower
+# than DB_SLOW_QUERY_MS are logged at WARNING to the "bot.database.slow" logger.
+log = logging.getLogger("bot.database")
+slow_log = log.getChild("slow")
 
-class TableName(Enum):
-    GUILDS = "guilds"
-    ADMINS = "bot_administrator"
-    POINTS = "points"
-    CHANNELS = "channels"
-    AUTOROLES = "autoroles"
-    CACHE_DAILY = "cache_daily"
+
+def _setup_query_log():
+    log.setLevel(os.getenv("DB_LOG_LEVEL", "WARNING").upper())
+    if not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(
+            logging.Formatter("[%(levelname)s] %(name)s: %(message)s")
+        )
+        log.addHandler(handler)
+        log.propagate = False
+
+
+_setup_query_log()
 
 
 class ThanksDB:
-    def __init__(self, retry_interval=5, keep_alive_interval=60):
+    def __init__(self, retry_interval=5, backend: Backend = None):
         self.retry_interval = retry_interval
-        self.keep_alive_interval = keep_alive_interval
-        self.db = None
-        self._lock = threading.Lock()
+        # Share of the queries logged at DEBUG, slow queries are always logged.
+        self.log_sample_rate = float(os.getenv("DB_LOG_SAMPLE_RATE", 1))
+        self.slow_query_seconds = float(os.getenv("DB_SLOW_QUERY_MS", 500)) / 1000
+        self.backend = backend or create_backend()
         self._and = " AND "
+
+    def open(self):
+        """Open the database, raising the backend's error if it can't be reached."""
         self.connect()
-        self.start_keep_alive()
 
     def connect(self):
-        while True:
-            try:
-                print("[INFO] Connecting to the database...")
-                self.db = mysql.connector.connect(
-                    host=os.getenv("DB_HOST", "localhost"),
-                    port=int(os.getenv("DB_PORT", 3306)),
-                    user=os.getenv("DB_USER"),
-                    password=os.getenv("DB_PASSWORD"),
-                    database=os.getenv("DB_DATABASE"),
-                )
-                self.init_db()
-                print("[INFO] Connected to the database.")
-                break
-            except mysql.connector.Error as err:
-                print(f"[ERROR] Error: {err}")
-                print(f"[ERROR] Retrying in {self.retry_interval} seconds...")
-                time.sleep(self.retry_interval)
-
-    def reconnect_if_needed(self):
-        """Reconnect if the database connection is not available."""
-        if self.db is None or not self.db.is_connected():
-            print("[ERROR] Lost connection to the database. Reconnecting...")
-            self.connect()
-
-    def start_keep_alive(self):
-        """Periodically ping the database to keep the connection alive."""
-
-        def keep_alive():
-            while True:
-                time.sleep(self.keep_alive_interval)
-                try:
-                    with self._lock:
-                        if self.db is None or not self.db.is_connected():
-                            self.connect()
-                        else:
-                            cursor = self.db.cursor()
-                            cursor.execute("SELECT 1")
-                            cursor.fetchall()
-                            cursor.close()
-                except mysql.connector.Error as err:
-                    print(f"[ERROR] Keep-alive error: {err}")
-                    self.connect()
-
-        threading.Thread(target=keep_alive, daemon=True).start()
+        print(f"[INFO] Connecting to the {self.backend.name} database...")
+        try:
+            self.backend.open()
+            self.init_db()
+        except self.backend.errors:
+            self.backend.close()
+            raise
+        print("[INFO] Connected to the database.")
 
     def close(self):
-        if self.db and self.db.is_connected():
-            self.db.close()
+        self.backend.close()
 
     # ── Schema Init ────────────────────────────────────────────────────────────
 
     def init_db(self):
         """Create tables if they don't exist."""
-        statements = [
-            f"CREATE TABLE IF NOT EXISTS `{TableName.GUILDS.value}` ("
-            "`guild_id` BIGINT NOT NULL,"
-            "PRIMARY KEY (`guild_id`)"
-            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
-
-            f"CREATE TABLE IF NOT EXISTS `{TableName.ADMINS.value}` ("
-            "`discord_id` BIGINT NOT NULL,"
-            "PRIMARY KEY (`discord_id`)"
-            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
-
-            f"CREATE TABLE IF NOT EXISTS `{TableName.POINTS.value}` ("
-            "`guild_id` BIGINT NOT NULL,"
-            "`discord_user_id` BIGINT NOT NULL,"
-            "`points` INT DEFAULT 0,"
-            "`last_thanks` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,"
-            "`num_of_thanks` INT DEFAULT 0,"
-            "`last_received_points_date` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,"
-            "`current_day_received_points` TINYINT DEFAULT 0,"
-            "PRIMARY KEY (`guild_id`, `discord_user_id`),"
-            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
-            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
-
-            f"CREATE TABLE IF NOT EXISTS `{TableName.CHANNELS.value}` ("
-            "`channel_id` BIGINT NOT NULL,"
-            "`guild_id` BIGINT NOT NULL,"
-            "PRIMARY KEY (`channel_id`),"
-            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
-            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
-
-            f"CREATE TABLE IF NOT EXISTS `{TableName.AUTOROLES.value}` ("
-            "`role_id` BIGINT NOT NULL,"
-            "`guild_id` BIGINT NOT NULL,"
-            "`threshold` SMALLINT NOT NULL,"
-            "PRIMARY KEY (`role_id`, `threshold`),"
-            f"FOREIGN KEY (`guild_id`) REFERENCES `{TableName.GUILDS.value}` (`guild_id`)"
-            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;",
-        ]
-        with self._lock:
-            cursor = self.db.cursor()
-            try:
-                for stmt in statements:
-                    cursor.execute(stmt)
-                self.db.commit()
-            finally:
-                cursor.close()
+        self.backend.init_db()
+
+    # ── Query Execution ────────────────────────────────────────────────────────
+
+    def _execute(
+        self,
+        table: str,
+        query: str,
+        params=None,
+        fetch: bool = False,
+        dictionary: bool = False,
+        prepared: bool = False,
+    ) -> QueryResult:
+        """
+        Run one statement on the backend, timing and logging it.
+
+        Args:
+            table (str): The table queried, the label of its metrics.
+            query (str): The SQL template, with %s or %(name)s placeholders.
+            params (tuple | dict, optional): The values of the placeholders.
+            fetch (bool, optional): Fetch and return the result rows.
+            dictionary (bool, optional): Return rows as dicts.
+            prepared (bool, optional): Keep it prepared, for the hot path.
+
+        Returns:
+            QueryResult: The rows (None unless fetch), affected or fetched row
+            count and last insert ID.
+        """
+        start = time.perf_counter()
+        try:
+            result = self.backend.execute(query, params, fetch, dictionary, prepared)
+        except self.backend.errors:
+            metrics.db_query_errors.inc(table=table)
+            raise
+        elapsed = time.perf_counter() - start
+        metrics.db_query_seconds.observe(elapsed, table=table)
+
+        # Two comparisons when query logging is off.
+        if elapsed >= self.slow_query_seconds:
+            logger, level = slow_log, logging.WARNING
+        elif log.isEnabledFor(logging.DEBUG) and (
+            self.log_sample_rate >= 1 or random.random() < self.log_sample_rate
+        ):
+            logger, level = log, logging.DEBUG
+        else:
+            return result
+        logger.log(
+            level,
+            "%.1fms %s | %d params, %d rows",
+            elapsed * 1000,
+            _shorten(query),
+            len(params) if params else 0,
+            result.rowcount,
+        )
+        return result
 
     # ── CRUD Operations ────────────────────────────────────────────────────────
-    # Each method creates its own cursor and closes it when done.
-    # The lock prevents concurrent access from the keep-alive thread.
+    # Each method runs one autocommitted statement on the backend; independent
+    # queries run in parallel on different connections.
 
     def insert(self, table: str, data: dict):
         """
@@ -138,18 +131,32 @@ class ThanksDB:
             table (str): The name of the table.
             data (dict): The data to insert.
         """
-        self.reconnect_if_needed()
         keys = ", ".join(data.keys())
         values = ", ".join(["%s"] * len(data))
         query = f"INSERT INTO `{table}` ({keys}) VALUES ({values})"
-        print(f"[DEBUG] {query}", tuple(data.values()))
-        with self._lock:
-            cursor = self.db.cursor(dictionary=True)
-            try:
-                cursor.execute(query, tuple(data.values()))
-                self.db.commit()
-            finally:
-                cursor.close()
+        self._execute(table, query, tuple(data.values()))
+
+    def insert_many(self, table: str, rows: list):
+        """
+        Insert rows with one multi-row statement.
+
+        Args:
+            table (str): The name of the table.
+            rows (list[dict]): The rows to insert, all with the same columns.
+        """
+        if not rows:
+            return
+        self._execute(table, *self._insert_many_statement(table, rows))
+
+    @staticmethod
+    def _insert_many_statement(table: str, rows: list):
+        columns = list(rows[0].keys())
+        placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        query = (
+            f"INSERT INTO `{table}` ({', '.join(columns)}) "
+            f"VALUES {', '.join([placeholders] * len(rows))}"
+        )
+        return query, tuple(row[column] for row in rows for column in columns)
 
     def select(
         self,
@@ -172,7 +179,6 @@ class ThanksDB:
         Returns:
             list[dict]: The selected rows.
         """
-        self.reconnect_if_needed()
         if columns is None:
             columns = ["*"]
         query = f"SELECT {', '.join(columns)} FROM `{table}`"
@@ -183,14 +189,10 @@ class ThanksDB:
             query += f" ORDER BY {order_by}"
         if limit:
             query += f" LIMIT {limit}"
-        print("[DEBUG]", query, tuple(where.values()) if where else None)
-        with self._lock:
-            cursor = self.db.cursor(dictionary=True)
-            try:
-                cursor.execute(query, tuple(where.values()) if where else None)
-                return cursor.fetchall()
-            finally:
-                cursor.close()
+        params = tuple(where.values()) if where else None
+        return self._execute(
+            table, query, params, fetch=True, dictionary=True, prepared=True
+        ).rows
 
     def update(self, table: str, data: dict, where: dict):
         """
@@ -201,19 +203,11 @@ class ThanksDB:
             data (dict): Column-value pairs to update.
             where (dict): WHERE clause as column-value pairs.
         """
-        self.reconnect_if_needed()
         set_clause = ", ".join([f"{key} = %s" for key in data.keys()])
         where_clause = self._and.join([f"{key} = %s" for key in where.keys()])
         values = tuple(data.values()) + tuple(where.values())
         query = f"UPDATE `{table}` SET {set_clause} WHERE {where_clause}"
-        print(f"[DEBUG] {query}", values)
-        with self._lock:
-            cursor = self.db.cursor(dictionary=True)
-            try:
-                cursor.execute(query, values)
-                self.db.commit()
-            finally:
-                cursor.close()
+        self._execute(table, query, values)
 
     def delete(self, table: str, where: dict):
         """
@@ -223,17 +217,745 @@ class ThanksDB:
             table (str): The name of the table.
             where (dict): WHERE clause as column-value pairs.
         """
-        self.reconnect_if_needed()
         where_clause = self._and.join([f"{key} = %s" for key in where.keys()])
         query = f"DELETE FROM `{table}` WHERE {where_clause}"
-        print(f"[DEBUG] {query}", tuple(where.values()))
-        with self._lock:
-            cursor = self.db.cursor(dictionary=True)
+        self._execute(table, query, tuple(where.values()))
+
+    def upsert(self, table: str, rows: list, increment: tuple = ()):
+        """
+        Insert rows, updating the ones whose primary key already exists.
+
+        Args:
+            table (str): The name of the table.
+            rows (list[dict]): The rows to write, all with the same columns.
+            increment (tuple, optional): Columns added to the existing value
+                instead of replacing it.
+        """
+        if not rows:
+            return
+        self._execute(table, *self._upsert_statement(table, rows, increment))
+
+    def _upsert_statement(self, table: str, rows: list, increment: tuple):
+        columns = list(rows[0].keys())
+        query = self.backend.upsert_query(table, columns, len(rows), increment)
+        return query, tuple(row[column] for row in rows for column in columns)
+
+    def count_by(self, table: str, column: str, where: dict = None):
+        """
+        Count rows per value of a column.
+
+        Args:
+            table (str): The name of the table.
+            column (str): The column to group by.
+            where (dict, optional): WHERE clause as column-value pairs.
+
+        Returns:
+            list[dict]: One {column: value, "count": n} row per value.
+        """
+        query = f"SELECT {column}, COUNT(*) AS count FROM `{table}`"
+        if where:
+            where_query = self._and.join([f"{key} = %s" for key in where.keys()])
+            query += f" WHERE {where_query}"
+        query += f" GROUP BY {column}"
+        params = tuple(where.values()) if where else None
+        return self._execute(table, query, params, fetch=True, dictionary=True).rows
+
+    # ── Points ─────────────────────────────────────────────────────────────────
+    # Read-modify-write done server-side: one round trip, and two thanks for
+    # the same member racing each other can't lose an increment.
+
+    def points_page(
+        self, guild_id: int, limit: int, after: tuple = None, min_points: int = None
+    ):
+        """
+        One page of a guild's leaderboard, using keyset pagination.
+
+        Rows are ordered by points then user ID, both descending, which is a
+        backward scan of the (guild_id, points) index (the primary key is
+        appended to it), so any page costs the same as the first one.
+
+        Args:
+            guild_id (int): The guild of the leaderboard.
+            limit (int): Max rows to return.
+            after (tuple, optional): (points, discord_user_id) of the last
+                row of the previous page.
+            min_points (int, optional): Only the rows with at least these
+                points, the page is then shorter than `limit` on the last one.
+
+        Returns:
+            list[dict]: The rows of the page.
+        """
+        query = (
+            "SELECT discord_user_id, points, num_of_thanks "
+            f"FROM `{TableName.POINTS.value}` WHERE guild_id = %s"
+        )
+        params = (guild_id,)
+        if after is not None:
+            condition, after_params = self.backend.points_after(after)
+            query += f" AND {condition}"
+            params += after_params
+        if min_points is not None:
+            query += " AND points >= %s"
+            params += (min_points,)
+        query += " ORDER BY points DESC, discord_user_id DESC LIMIT %s"
+        params += (limit,)
+        return self._execute(
+            TableName.POINTS.value,
+            query,
+            params,
+            fetch=True,
+            dictionary=True,
+            prepared=True,
+        ).rows
+
+    def award_points(
+        self,
+        guild_id: int,
+        user_id: int,
+        points_delta: int,
+        daily_limit: int,
+        now: datetime = None,
+    ) -> Optional[int]:
+        """
+        Award points to a user, applying the 24h daily limit in SQL.
+
+        Args:
+            guild_id (int): The guild the points are awarded in.
+            user_id (int): The member receiving the points.
+            points_delta (int): The number of points to add.
+            daily_limit (int): Max points a member can receive within 24h.
+            now (datetime, optional): When the points were given, defaults to
+                now. Set when replaying the write journal.
+
+        Returns:
+            Optional[int]: The new point total, or None if the daily limit was reached.
+        """
+        result = self._execute(
+            TableName.POINTS.value,
+            self.backend.award_points_query,
+            self._award_params(guild_id, user_id, points_delta, daily_limit, now),
+            fetch=True,
+            prepared=True,
+        )
+        return self.backend.award_points_total(result, points_delta)
+
+    @staticmethod
+    def _award_params(
+        guild_id: int, user_id: int, points_delta: int, daily_limit: int, now=None
+    ) -> dict:
+        now = now or datetime.now()
+        return {
+            "guild_id": guild_id,
+            "user_id": user_id,
+            "delta": points_delta,
+            "limit": daily_limit,
+            "now": now,
+            "window_start": now - timedelta(hours=24),
+        }
+
+    def record_thanks(self, guild_id: int, user_id: int, now: datetime = None) -> None:
+        """
+        Record that a user thanked someone: bump num_of_thanks and last_thanks.
+
+        Args:
+            guild_id (int): The guild the thanks were given in.
+            user_id (int): The member who thanked.
+            now (datetime, optional): When they thanked, defaults to now.
+        """
+        params = {
+            "guild_id": guild_id,
+            "user_id": user_id,
+            "now": now or datetime.now(),
+        }
+        self._execute(
+            TableName.POINTS.value,
+            self.backend.record_thanks_query,
+            params,
+            prepared=True,
+        )
+
+    # ── Write Journal ──────────────────────────────────────────────────────────
+    # Writes journaled while the database was unreachable (see WriteJournal).
+
+    def ping(self):
+        """Run a trivial statement, raising if the database can't be reached."""
+        self.backend.execute("SELECT 1", fetch=True)
+
+    def apply_journal_entry(self, entry: dict) -> bool:
+        """
+        Apply a journaled write, unless it already was.
+
+        The entry ID is recorded in the same transaction as the write, so a
+        write replayed again after a crash is skipped.
+
+        Args:
+            entry (dict): The journal entry, {"id", "op", "args"}.
+
+        Returns:
+            bool: False if the entry had already been applied.
+        """
+        query, params = self._journal_statement(entry["op"], entry["args"])
+        table = TableName.JOURNAL_APPLIED.value
+        with self.backend.transaction() as execute:
+            marked = execute(
+                f"{self.backend.insert_ignore} INTO `{table}` (entry_id) VALUES (%s)",
+                (entry["id"],),
+            )
+            if not marked.rowcount:
+                return False
+            execute(query, params)
+        return True
+
+    def _journal_statement(self, op: str, args: dict):
+        """The statement of a journaled write, its datetimes are ISO strings."""
+        if op == "award_points":
+            return self.backend.award_points_query, self._award_params(
+                args["guild_id"],
+                args["user_id"],
+                args["points_delta"],
+                args["daily_limit"],
+                datetime.fromisoformat(args["now"]),
+            )
+        if op == "record_thanks":
+            params = {
+                "guild_id": args["guild_id"],
+                "user_id": args["user_id"],
+                "now": datetime.fromisoformat(args["now"]),
+            }
+            return self.backend.record_thanks_query, params
+        if op == "upsert":
+            return self._upsert_statement(
+                args["table"], args["rows"], tuple(args["increment"])
+            )
+        if op == "insert_many":
+            return self._insert_many_statement(args["table"], args["rows"])
+        raise ValueError(f"Unknown journal operation: {op}")
+
+    def clear_journal_marks(self):
+        """Forget the applied entry IDs, once no journal file is left to replay."""
+        table = TableName.JOURNAL_APPLIED.value
+        self._execute(table, f"DELETE FROM `{table}`")
+
+    # ── Thanks History ─────────────────────────────────────────────────────────
+    # thanks_events is only appended to; rollup_thanks_events aggregates what
+    # was appended since its last run into thanks_rollups, which stats read.
+
+    ROLLUP = "thanks_rollups"  # Its row in rollup_state.
+
+    def rollup_thanks_events(self, limit: int) -> int:
+        """
+        Aggregate the next `limit` events not rolled up yet into the hourly
+        and daily rollups, and into the windows that cover their day.
+
+        The aggregates and the ID of the last event aggregated are written
+        in the same transaction, so every event is counted exactly once.
+        "given" counts the messages a member thanked with, like
+        `num_of_thanks`: only the first event of each message adds to it.
+
+        Returns:
+            int: The number of events aggregated, below `limit` once done.
+        """
+        events = TableName.THANKS_EVENTS.value
+        state = TableName.ROLLUP_STATE.value
+        with self.backend.transaction() as execute:
+            rows = execute(
+                f"SELECT last_event_id FROM `{state}` WHERE name = %s", (self.ROLLUP,)
+            ).rows
+            after = rows[0][0] if rows else 0
+            # The events of a message are recorded and inserted together, so
+            # their IDs follow each other; the last event aggregated is never
+            # pruned and tells whether the first of these continues a message.
+            previous = execute(
+                f"SELECT message_id FROM `{events}` WHERE id = %s", (after,)
+            ).rows
+            last_message = previous[0][0] if previous else None
+            rows = execute(
+                "SELECT id, guild_id, giver_id, receiver_id, message_id, created_at "
+                f"FROM `{events}` WHERE id > %s ORDER BY id LIMIT %s",
+                (after, limit),
+            ).rows
+            if not rows:
+                return 0
+            starts = execute(
+                f"SELECT span, start FROM `{TableName.THANKS_WINDOW_STARTS.value}`"
+            ).rows
+
+            # (guild_id, user_id, period, bucket) -> [received, given]
+            counts: Dict[Tuple[int, int, str, datetime], List[int]] = {}
+            # (guild_id, span, user_id) -> [received, given]
+            windows: Dict[Tuple[int, str, int], List[int]] = {}
+            for _, guild_id, giver_id, receiver_id, message_id, created_at in rows:
+                hour = created_at.replace(minute=0, second=0, microsecond=0)
+                day = hour.replace(hour=0)
+                # Days a window no longer covers were subtracted already.
+                spans = [span for span, start in starts if day >= start]
+                users = [(receiver_id, 0)]
+                if message_id != last_message:
+                    users.append((giver_id, 1))
+                    last_message = message_id
+                for user_id, column in users:
+                    for period, bucket in (("hour", hour), ("day", day)):
+                        key = (guild_id, user_id, period, bucket)
+                        counts.setdefault(key, [0, 0])[column] += 1
+                    for span in spans:
+                        key = (guild_id, span, user_id)
+                        windows.setdefault(key, [0, 0])[column] += 1
+
+            self._upsert_chunks(
+                execute,
+                TableName.THANKS_ROLLUPS.value,
+                [
+                    {
+                        "guild_id": key[0],
+                        "user_id": key[1],
+                        "period": key[2],
+                        "bucket": key[3],
+                        "received": received,
+                        "given": given,
+                    }
+                    for key, (received, given) in counts.items()
+                ],
+            )
+            self._upsert_chunks(
+                execute,
+                TableName.THANKS_WINDOWS.value,
+                [
+                    {
+                        "guild_id": key[0],
+                        "span": key[1],
+                        "user_id": key[2],
+                        "received": received,
+                        "given": given,
+                    }
+                    for key, (received, given) in windows.items()
+                ],
+            )
+            execute(
+                *self._upsert_statement(
+                    state, [{"name": self.ROLLUP, "last_event_id": rows[-1][0]}], ()
+                )
+            )
+        return len(rows)
+
+    def advance_thanks_windows(self, starts: Dict[str, datetime]):
+        """
+        Move each window to the first day it now covers.
+
+        The daily rollups of the days a window no longer covers are
+        subtracted from it, and the members left with nothing removed. A
+        window seen for the first time is built from the daily rollups, so
+        they must be kept longer than the longest window.
+
+        Args:
+            starts (dict): span -> first day covered, e.g. {"week": ...}.
+        """
+        windows = TableName.THANKS_WINDOWS.value
+        rollups = TableName.THANKS_ROLLUPS.value
+        with self.backend.transaction() as execute:
+            current = dict(
+                execute(
+                    f"SELECT span, start FROM `{TableName.THANKS_WINDOW_STARTS.value}`"
+                ).rows
+            )
+            for span, start in starts.items():
+                old_start = current.get(span)
+                if old_start is not None and old_start >= start:
+                    continue
+                if old_start is None:
+                    # Left by a window dropped then added back.
+                    execute(f"DELETE FROM `{windows}` WHERE span = %s", (span,))
+                    execute(
+                        f"INSERT INTO `{windows}` "
+                        "(guild_id, span, user_id, received, given) "
+                        "SELECT guild_id, %s, user_id, SUM(received), SUM(given) "
+                        f"FROM `{rollups}` WHERE period = 'day' AND bucket >= %s "
+                        "GROUP BY guild_id, user_id",
+                        (span, start),
+                    )
+                else:
+                    expired = execute(
+                        "SELECT guild_id, user_id, SUM(received), SUM(given) "
+                        f"FROM `{rollups}` WHERE period = 'day' "
+                        "AND bucket >= %s AND bucket < %s GROUP BY guild_id, user_id",
+                        (old_start, start),
+                    ).rows
+                    self._upsert_chunks(
+                        execute,
+                        windows,
+                        [
+                            {
+                                "guild_id": guild_id,
+                                "span": span,
+                                "user_id": user_id,
+                                "received": -received,
+                                "given": -given,
+                            }
+                            for guild_id, user_id, received, given in expired
+                        ],
+                    )
+                    # A scan of the span, at most once a day.
+                    execute(
+                        f"DELETE FROM `{windows}` "
+                        "WHERE span = %s AND received <= 0 AND given <= 0",
+                        (span,),
+                    )
+                execute(
+                    *self._upsert_statement(
+                        TableName.THANKS_WINDOW_STARTS.value,
+                        [{"span": span, "start": start}],
+                        (),
+                    )
+                )
+
+    def _upsert_chunks(self, execute, table: str, rows: list, chunk: int = 500):
+        """Upsert rows adding to received and given, `chunk` at a time (SQLite caps placeholders)."""
+        for start in range(0, len(rows), chunk):
+            execute(
+                *self._upsert_statement(
+                    table, rows[start : start + chunk], ("received", "given")
+                )
+            )
+
+    def prune_thanks_history(
+        self, events_before: datetime, hourly_before: datetime, daily_before: datetime
+    ):
+        """
+        Delete the events rolled up and older than `events_before`, and the
+        hourly and daily rollups of buckets before the given times.
+
+        The last event rolled up is kept so an AUTO_INCREMENT counter reset
+        by a restart can't hand out its ID, or a lower one, again.
+        """
+        events = TableName.THANKS_EVENTS.value
+        rollups = TableName.THANKS_ROLLUPS.value
+        state = self.select(
+            TableName.ROLLUP_STATE.value, ["last_event_id"], {"name": self.ROLLUP}
+        )
+        if state:
+            self._execute(
+                events,
+                f"DELETE FROM `{events}` WHERE id < %s AND created_at < %s",
+                (state[0]["last_event_id"], events_before),
+            )
+        for period, before in (("hour", hourly_before), ("day", daily_before)):
+            self._execute(
+                rollups,
+                f"DELETE FROM `{rollups}` WHERE period = %s AND bucket < %s",
+                (period, before),
+            )
+
+    def thanks_rollup(
+        self, guild_id: int, user_id: int, period: str, since: datetime
+    ) -> list:
+        """
+        A member's rollups of one period from the `since` bucket on.
+
+        Args:
+            guild_id (int): The guild of the member.
+            user_id (int): The member.
+            period (str): "hour" or "day".
+            since (datetime): Start of the first bucket.
+
+        Returns:
+            list[dict]: {"bucket", "received", "given"} rows, oldest first.
+        """
+        table = TableName.THANKS_ROLLUPS.value
+        query = (
+            f"SELECT bucket, received, given FROM `{table}` "
+            "WHERE guild_id = %s AND user_id = %s AND period = %s AND bucket >= %s "
+            "ORDER BY bucket"
+        )
+        return self._execute(
+            table,
+            query,
+            (guild_id, user_id, period, since),
+            fetch=True,
+            dictionary=True,
+            prepared=True,
+        ).rows
+
+    def window_page(
+        self, guild_id: int, span: str, limit: int, after: tuple = None
+    ) -> list:
+        """
+        One page of a guild's leaderboard over a window, like `points_page`.
+
+        Rows have the columns of `points_page`: points and num_of_thanks are
+        the points received and the thanks messages sent within the window.
+        Members who received none are left out.
+
+        Args:
+            guild_id (int): The guild of the leaderboard.
+            span (str): The window, e.g. "week".
+            limit (int): Max rows to return.
+            after (tuple, optional): (points, discord_user_id) of the last
+                row of the previous page.
+
+        Returns:
+            list[dict]: The rows of the page.
+        """
+        table = TableName.THANKS_WINDOWS.value
+        query = (
+            "SELECT user_id AS discord_user_id, received AS points, "
+            f"given AS num_of_thanks FROM `{table}` "
+            "WHERE guild_id = %s AND span = %s AND received > 0"
+        )
+        params = (guild_id, span)
+        if after is not None:
+            condition, after_params = self.backend.points_after(
+                after, "received", "user_id"
+            )
+            query += f" AND {condition}"
+            params += after_params
+        query += " ORDER BY received DESC, user_id DESC LIMIT %s"
+        params += (limit,)
+        return self._execute(
+            table, query, params, fetch=True, dictionary=True, prepared=True
+        ).rows
+
+
+def _shorten(query: str, length: int = 200) -> str:
+    """Cut long templates, like multi-row upserts, for the query log."""
+    return query if len(query) <= length else query[:length] + "..."
+
+
+class DatabaseUnavailable(Exception):
+    """The database can't be reached, or the circuit breaker is open."""
+
+
+class AsyncThanksDB:
+    """
+    Awaitable counterpart of ThanksDB.
+
+    Every call is handed to a bounded thread pool so a database round trip
+    never blocks the event loop. The CRUD surface is the same as ThanksDB.
+    Size the thread pool like the connection pool so no worker waits on a
+    checkout.
+
+    Connection failures open a circuit breaker: calls then raise
+    DatabaseUnavailable at once, and callers `defer` their writes to the
+    write journal. A background task retries every `retry_interval` seconds;
+    once the database answers it replays the journal, then closes the
+    circuit, so reads never see the database without the journaled writes.
+    """
+
+    def __init__(
+        self,
+        sync_db: ThanksDB,
+        max_workers: int = 4,
+        journal: WriteJournal = None,
+        failure_threshold: int = 3,
+    ):
+        self.sync_db = sync_db
+        self.journal = journal
+        self.breaker = CircuitBreaker(failure_threshold)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="thanksdb"
+        )
+        self._recovery: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def _run(self, func, *args, **kwargs):
+        if not self.breaker.closed:
+            raise DatabaseUnavailable("Circuit open")
+        try:
+            result = await self._call(func, *args, **kwargs)
+        except self.sync_db.backend.connection_errors as e:
+            if not self.sync_db.backend.is_connection_error(e):
+                raise
+            if self.breaker.record_failure():
+                print(f"[ERROR] Database unreachable, circuit open: {e}")
+                self._start_recovery()
+            raise DatabaseUnavailable(str(e)) from e
+        self.breaker.record_success()
+        return result
+
+    async def open(self):
+        """Open the database, retrying until it answers, and replay what was journaled by the last run."""
+        if self.journal is not None:
+            self.journal.open()
+        while True:
             try:
-                cursor.execute(query, tuple(where.values()))
-                self.db.commit()
-            finally:
-                cursor.close()
+                await self._call(self.sync_db.open)
+                await self._replay()
+                return
+            except self.sync_db.backend.errors as err:
+                print(f"[ERROR] Error: {err}")
+                print(f"[ERROR] Retrying in {self.sync_db.retry_interval} seconds...")
+                await asyncio.sleep(self.sync_db.retry_interval)
+
+    async def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._recovery is not None:
+            self._recovery.cancel()
+        if self.journal is not None:
+            await self.journal.close()
+        await self._call(self.sync_db.close)
+        self._executor.shutdown(wait=False)
+
+    # ── Write Journal ──────────────────────────────────────────────────────────
+
+    def defer(self, op: str, **args):
+        """
+        Journal a write that failed with DatabaseUnavailable, applied once
+        the database is back.
+
+        Args:
+            op (str): The write: "award_points", "record_thanks", "upsert"
+                or "insert_many".
+            **args: Its arguments, as passed to the ThanksDB method.
+
+        Raises:
+            DatabaseUnavailable: No journal is configured.
+        """
+        if self.journal is None:
+            raise DatabaseUnavailable("No write journal")
+        if op in ("award_points", "record_thanks"):
+            args.setdefault("now", datetime.now())
+        self.journal.append(op, **args)
+        if self.breaker.closed:
+            # Failed before the threshold: still replay it soon.
+            self._start_recovery()
+
+    def _start_recovery(self):
+        if self._recovery is None or self._recovery.done():
+            self._recovery = asyncio.create_task(self._recover())
+
+    async def _recover(self):
+        """Probe the database until it answers, replay the journal, close the circuit."""
+        while True:
+            await asyncio.sleep(self.sync_db.retry_interval)
+            try:
+                await self._call(self.sync_db.ping)
+                await self._replay()
+            except (*self.sync_db.backend.errors, OSError) as e:
+                print(f"[ERROR] Database still unavailable: {e}")
+                continue
+            if not self.breaker.closed:
+                print("[INFO] Database reachable again, circuit closed.")
+            self.breaker.reset()
+            return
+
+    async def _replay(self):
+        if self.journal is None:
+            return
+        # Writes journaled during a pass are replayed by the next one, the
+        # loop ends on a check of the journal made without awaiting after it.
+        while len(self.journal):
+            replayed = await self.journal.replay(self._apply_entry)
+            # The replayed file is gone, its entry IDs can't come back.
+            await self._call(self.sync_db.clear_journal_marks)
+            print(f"[INFO] Replayed {replayed} journaled writes.")
+
+    async def _apply_entry(self, entry: dict) -> bool:
+        backend = self.sync_db.backend
+        try:
+            return await self._call(self.sync_db.apply_journal_entry, entry)
+        except backend.errors as e:
+            if backend.is_connection_error(e):
+                raise
+            # Refused for good (e.g. its guild was removed), don't block the
+            # entries after it.
+            print(f"[ERROR] Dropping journaled {entry['op']} {entry['id']}: {e}")
+            return False
+
+    # ── CRUD Operations ────────────────────────────────────────────────────────
+
+    async def insert(self, table: str, data: dict):
+        return await self._run(self.sync_db.insert, table, data)
+
+    async def insert_many(self, table: str, rows: list):
+        return await self._run(self.sync_db.insert_many, table, rows)
+
+    async def select(
+        self,
+        table: str,
+        columns: list = None,
+        where: dict = None,
+        limit: int = None,
+        order_by: str = None,
+    ):
+        return await self._run(
+            self.sync_db.select, table, columns, where, limit, order_by
+        )
+
+    async def update(self, table: str, data: dict, where: dict):
+        return await self._run(self.sync_db.update, table, data, where)
+
+    async def delete(self, table: str, where: dict):
+        return await self._run(self.sync_db.delete, table, where)
+
+    async def upsert(self, table: str, rows: list, increment: tuple = ()):
+        return await self._run(self.sync_db.upsert, table, rows, increment)
+
+    async def count_by(self, table: str, column: str, where: dict = None):
+        return await self._run(self.sync_db.count_by, table, column, where)
+
+    async def points_page(
+        self, guild_id: int, limit: int, after: tuple = None, min_points: int = None
+    ):
+        return await self._run(
+            self.sync_db.points_page, guild_id, limit, after, min_points
+        )
+
+    async def award_points(
+        self, guild_id: int, user_id: int, points_delta: int, daily_limit: int
+    ) -> Optional[int]:
+        return await self._run(
+            self.sync_db.award_points, guild_id, user_id, points_delta, daily_limit
+        )
+
+    async def record_thanks(self, guild_id: int, user_id: int) -> None:
+        return await self._run(self.sync_db.record_thanks, guild_id, user_id)
+
+    async def rollup_thanks_events(self, limit: int) -> int:
+        return await self._run(self.sync_db.rollup_thanks_events, limit)
+
+    async def prune_thanks_history(
+        self, events_before: datetime, hourly_before: datetime, daily_before: datetime
+    ):
+        return await self._run(
+            self.sync_db.prune_thanks_history,
+            events_before,
+            hourly_before,
+            daily_before,
+        )
+
+    async def thanks_rollup(
+        self, guild_id: int, user_id: int, period: str, since: datetime
+    ) -> list:
+        return await self._run(
+            self.sync_db.thanks_rollup, guild_id, user_id, period, since
+        )
+
+    async def advance_thanks_windows(self, starts: Dict[str, datetime]):
+        return await self._run(self.sync_db.advance_thanks_windows, starts)
+
+    async def window_page(
+        self, guild_id: int, span: str, limit: int, after: tuple = None
+    ) -> list:
+        return await self._run(self.sync_db.window_page, guild_id, span, limit, after)
 
 
-db = ThanksDB(retry_interval=10, keep_alive_interval=60)
+db = ThanksDB(retry_interval=int(os.getenv("DB_RETRY_INTERVAL", 10)))
+adb = AsyncThanksDB(
+    db,
+    max_workers=db.backend.max_connections,
+    journal=(
+        WriteJournal(
+            os.environ["DB_JOURNAL_PATH"],
+            fsync_interval=float(os.getenv("DB_JOURNAL_FSYNC_MS", 100)) / 1000,
+        )
+        if os.getenv("DB_JOURNAL_PATH")
+        else None
+    ),
+    failure_threshold=int(os.getenv("DB_BREAKER_FAILURES", 3)),
+)
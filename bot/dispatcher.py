@@ -0,0 +1,114 @@
+import asyncio
+import time
+import traceback
+from typing import Any, Awaitable, Callable, Hashable, List
+
+from bot import metrics
+
+
+class ShardedDispatcher:
+    """
+    Runs a handler on a fixed set of asyncio workers, each with its own queue.
+
+    Items are routed by the hash of their key, so all the items of one key
+    (e.g. one sender in one guild) are handled by the same worker, one at a
+    time and in order, while a stalled key only holds up its own shard.
+
+    Queues hold up to `max_depth` items. When one is full the `shed` policy
+    applies: "newest" drops the incoming item, "oldest" drops the one that
+    waited longest to make room for it.
+
+    The handler must not wait on rate-limited calls: a worker waiting holds
+    up every key of its shard.
+    """
+
+    SHED_POLICIES = ("newest", "oldest")
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[None]],
+        workers: int = 8,
+        max_depth: int = 1000,
+        shed: str = "newest",
+    ):
+        if workers < 1 or max_depth < 1:
+            raise ValueError("Invalid dispatcher size.")
+        if shed not in self.SHED_POLICIES:
+            raise ValueError(f"Unknown shed policy: {shed}")
+        self.handler = handler
+        self.max_depth = max_depth
+        self.shed = shed
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.closing = False  # Draining the queues, submit no more.
+
+        # (enqueued_at, item) pairs.
+        self._queues: List[asyncio.Queue] = [
+            asyncio.Queue(maxsize=max_depth) for _ in range(workers)
+        ]
+        self._tasks: List[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        """Items waiting in all the queues."""
+        return sum(queue.qsize() for queue in self._queues)
+
+    @property
+    def workers(self) -> int:
+        return len(self._queues)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._run(queue)) for queue in self._queues
+            ]
+
+    async def close(self):
+        """Stop the workers once every queued item is handled."""
+        if not self._tasks:
+            return
+        self.closing = True
+        await self.join()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def join(self):
+        """Wait until every submitted item has been handled."""
+        await asyncio.gather(*(queue.join() for queue in self._queues))
+
+    def submit(self, key: Hashable, item) -> bool:
+        """
+        Queue an item on the worker of its key.
+
+        Args:
+            key (Hashable): Items with equal keys are handled in order.
+            item: The handler's argument.
+
+        Returns:
+            bool: False if the incoming item was shed.
+        """
+        queue = self._queues[hash(key) % len(self._queues)]
+        self.submitted += 1
+        if queue.full():
+            self.dropped += 1
+            metrics.dispatch_shed.inc()
+            if self.shed == "newest":
+                return False
+            queue.get_nowait()
+            queue.task_done()
+        queue.put_nowait((time.perf_counter(), item))
+        return True
+
+    async def _run(self, queue: asyncio.Queue):
+        while True:
+            enqueued_at, item = await queue.get()
+            metrics.dispatch_wait_seconds.observe(time.perf_counter() - enqueued_at)
+            try:
+                await self.handler(item)
+            except Exception as e:
+                print(f"[ERROR] Unhandled error in a dispatcher worker: {e}")
+                traceback.print_exc()
+            finally:
+                self.processed += 1
+                queue.task_done()
@@ -0,0 +1,62 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Tuple
+
+from bot.database import TableName
+
+
+class AutoroleIndex:
+    """
+    Autoroles of every guild, kept in memory sorted by threshold.
+
+    Deciding which roles a member became due for after a point is two bisects
+    between the old and the new total, so awards that cross no threshold cost
+    neither a query nor a member fetch.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        # guild_id -> sorted [(threshold, role_id)]
+        self._guilds: Dict[int, List[Tuple[int, int]]] = {}
+
+    async def load(self):
+        """Load the autoroles of every guild with one query."""
+        guilds: Dict[int, List[Tuple[int, int]]] = {}
+        for autorole in await self.db.select(TableName.AUTOROLES.value):
+            guilds.setdefault(autorole["guild_id"], []).append(
+                (autorole["threshold"], autorole["role_id"])
+            )
+        for autoroles in guilds.values():
+            autoroles.sort()
+        self._guilds = guilds
+
+    def get(self, guild_id: int) -> List[Tuple[int, int]]:
+        """The (threshold, role_id) pairs of a guild, lowest threshold first."""
+        return list(self._guilds.get(guild_id, ()))
+
+    def add(self, guild_id: int, role_id: int, threshold: int):
+        insort(self._guilds.setdefault(guild_id, []), (threshold, role_id))
+
+    def remove(self, guild_id: int, role_id: int):
+        """Remove every threshold of a role."""
+        autoroles = self._guilds.get(guild_id)
+        if not autoroles:
+            return
+        autoroles[:] = [autorole for autorole in autoroles if autorole[1] != role_id]
+        if not autoroles:
+            del self._guilds[guild_id]
+
+    def forget_guild(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+
+    def due(
+        self, guild_id: int, old_points: int, new_points: int
+    ) -> List[Tuple[int, int]]:
+        """The (threshold, role_id) pairs crossed going from old_points to new_points."""
+        autoroles = self._guilds.get(guild_id)
+        if not autoroles or new_points <= old_points:
+            return []
+        # Thresholds t with old_points < t <= new_points. Role IDs are
+        # positive, so (t, 0) sorts before every role of that threshold.
+        start = bisect_right(autoroles, (old_points, float("inf")))
+        end = bisect_left(autoroles, (new_points + 1, 0))
+        return autoroles[start:end]
@@ -0,0 +1,258 @@
+import asyncio
+from typing import Dict, Optional, Tuple
+
+import discord
+
+from bot import metrics
+from bot.database import DatabaseUnavailable, TableName
+from bot.outbound import PRIORITY_BACKFILL
+
+
+class _Job:
+    __slots__ = ("guild_id", "role_id", "threshold", "after", "checked", "granted")
+
+    def __init__(self, guild_id: int, role_id: int, threshold: int):
+        self.guild_id = guild_id
+        self.role_id = role_id
+        self.threshold = threshold
+        self.after: Optional[Tuple[int, int]] = None  # Last (points, user_id) done.
+        self.checked = 0
+        self.granted = 0
+
+    @classmethod
+    def from_row(cls, row: dict) -> "_Job":
+        job = cls(row["guild_id"], row["role_id"], row["threshold"])
+        if row["after_user_id"] is not None:
+            job.after = (row["after_points"], row["after_user_id"])
+        job.checked = row["checked"]
+        job.granted = row["granted"]
+        return job
+
+    def row(self) -> dict:
+        after_points, after_user_id = self.after or (None, None)
+        return {
+            "guild_id": self.guild_id,
+            "role_id": self.role_id,
+            "threshold": self.threshold,
+            "after_points": after_points,
+            "after_user_id": after_user_id,
+            "checked": self.checked,
+            "granted": self.granted,
+        }
+
+
+class AutoroleBackfill:
+    """
+    Gives a new autorole to the members who already have its threshold.
+
+    A job walks the guild's qualifying `points` rows `chunk_size` at a time,
+    highest first, with the keyset pagination of the leaderboard, so a guild
+    with tens of thousands of qualifying members is never loaded at once.
+    Members of a chunk are taken from the member cache or fetched, and
+    granted the role through the outbound scheduler at the lowest priority:
+    live grants and confirmations go first, and the scheduler's rate limits
+    and concurrency apply. Grants made this way send no DM.
+
+    After each chunk the position of the job is saved in the
+    `autorole_backfills` table; jobs still there at startup resume from it.
+    """
+
+    def __init__(self, manager, chunk_size: int = 100, retry_interval: float = 10):
+        self.manager = manager
+        self.db = manager.db
+        self.bot = manager.bot
+        self.chunk_size = chunk_size
+        self.retry_interval = retry_interval
+
+        self._jobs: Dict[Tuple[int, int], _Job] = {}
+        self._tasks: Dict[Tuple[int, int], asyncio.Task] = {}
+        self._resume: Optional[asyncio.Task] = None
+
+    def progress(self, guild_id: int) -> Dict[int, Tuple[int, int]]:
+        """role_id -> (members checked, roles granted) of a guild's running jobs."""
+        return {
+            role_id: (job.checked, job.granted)
+            for (job_guild_id, role_id), job in self._jobs.items()
+            if job_guild_id == guild_id
+        }
+
+    def resume(self):
+        """Restart the jobs interrupted by the last shutdown, once the guilds are known."""
+        if self._resume is None:
+            self._resume = asyncio.create_task(self._resume_jobs())
+
+    async def _resume_jobs(self):
+        while True:
+            try:
+                rows = await self.db.select(TableName.AUTOROLE_BACKFILLS.value)
+                break
+            except DatabaseUnavailable:
+                await asyncio.sleep(self.retry_interval)
+        if not rows:
+            return
+        await self.bot.wait_until_ready()
+        for row in rows:
+            job = _Job.from_row(row)
+            if (job.threshold, job.role_id) not in self.manager.autoroles.get(
+                job.guild_id
+            ):
+                # Removed while the database was down, before its row could be.
+                await self._finish(job)
+                continue
+            print(
+                f"[INFO] Guild: {job.guild_id} - Resuming the backfill of role {job.role_id} after {job.checked} members."
+            )
+            self._start(job)
+
+    async def start(self, guild_id: int, role_id: int, threshold: int):
+        """Start giving a just added autorole to the members already over its threshold."""
+        await self.cancel(guild_id, role_id)
+        job = _Job(guild_id, role_id, threshold)
+        try:
+            await self.db.upsert(TableName.AUTOROLE_BACKFILLS.value, [job.row()])
+        except DatabaseUnavailable:
+            # The job waits for the database to read its first chunk anyway.
+            self.db.defer(
+                "upsert",
+                table=TableName.AUTOROLE_BACKFILLS.value,
+                rows=[job.row()],
+                increment=(),
+            )
+        self._start(job)
+
+    async def cancel(self, guild_id: int, role_id: int):
+        """Stop the job of a role and forget its progress, e.g. the autorole was removed."""
+        task = self._tasks.pop((guild_id, role_id), None)
+        if task is not None:
+            task.cancel()
+        if self._jobs.pop((guild_id, role_id), None) is not None:
+            try:
+                await self.db.delete(
+                    TableName.AUTOROLE_BACKFILLS.value,
+                    {"guild_id": guild_id, "role_id": role_id},
+                )
+            except DatabaseUnavailable:
+                pass  # Dropped on resume if the role isn't an autorole anymore.
+
+    async def forget_guild(self, guild_id: int):
+        """Stop the jobs of a guild the bot left and delete their rows, before the guild's."""
+        for key in [key for key in self._jobs if key[0] == guild_id]:
+            self._jobs.pop(key)
+            task = self._tasks.pop(key, None)
+            if task is not None:
+                task.cancel()
+        try:
+            await self.db.delete(
+                TableName.AUTOROLE_BACKFILLS.value, {"guild_id": guild_id}
+            )
+        except DatabaseUnavailable:
+            pass  # Dropped on resume if the guild has no autoroles anymore.
+
+    async def close(self):
+        """Stop the jobs, they resume from their last saved chunk."""
+        if self._resume is not None:
+            self._resume.cancel()
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _start(self, job: _Job):
+        key = (job.guild_id, job.role_id)
+        self._jobs[key] = job
+        task = asyncio.create_task(self._run(job))
+        self._tasks[key] = task
+        task.add_done_callback(self._forget_task)
+
+    def _forget_task(self, task: asyncio.Task):
+        for key, running in list(self._tasks.items()):
+            if running is task:
+                del self._tasks[key]
+
+    async def _run(self, job: _Job):
+        guild = self.bot.get_guild(job.guild_id)
+        role = guild.get_role(job.role_id) if guild is not None else None
+        if role is None:
+            print(
+                f"[ERROR] Guild: {job.guild_id} - Role {job.role_id} not found, backfill dropped."
+            )
+            await self._finish(job)
+            return
+
+        while True:
+            try:
+                rows = await self._next_chunk(job)
+            except DatabaseUnavailable:
+                await asyncio.sleep(self.retry_interval)
+                continue
+            if not rows:
+                break
+            granted = await asyncio.gather(
+                *(self._grant(guild, role, job, row["discord_user_id"]) for row in rows)
+            )
+            job.after = (rows[-1]["points"], rows[-1]["discord_user_id"])
+            job.checked += len(rows)
+            job.granted += sum(granted)
+            metrics.autorole_backfill_members.inc(len(rows))
+            await self._save(job)
+
+        print(
+            f"[INFO] Guild: {guild.id} - Role {role.name} given to {job.granted} of the {job.checked} members over {job.threshold} points."
+        )
+        await self._finish(job)
+
+    async def _next_chunk(self, job: _Job) -> list:
+        if self.manager.buffer is not None:
+            # Keyset pages are read from the table: write pending points first.
+            await self.manager.buffer.flush()
+        return await self.db.points_page(
+            job.guild_id, self.chunk_size, job.after, min_points=job.threshold
+        )
+
+    async def _grant(
+        self, guild: discord.Guild, role: discord.Role, job: _Job, user_id: int
+    ) -> bool:
+        """Give the role to a member unless they have it or left, returns whether it was given."""
+        member = guild.get_member(user_id)
+        if member is None:
+            try:
+                member = await self.bot.outbound.run(
+                    f"members:{guild.id}",
+                    lambda: guild.fetch_member(user_id),
+                    priority=PRIORITY_BACKFILL,
+                    key=("member", guild.id, user_id),
+                )
+            except discord.NotFound:
+                return False
+            except discord.HTTPException as e:
+                self.bot.logger.error(
+                    f"Guild: {guild.id} - Failed to fetch member {user_id} for the backfill of role {role.name}: {e}"
+                )
+                return False
+        if member.get_role(role.id) is not None:
+            return False
+        return await self.manager.give_role(
+            guild, member, role, job.threshold, priority=PRIORITY_BACKFILL, notify=False
+        )
+
+    async def _save(self, job: _Job):
+        try:
+            await self.db.upsert(TableName.AUTOROLE_BACKFILLS.value, [job.row()])
+        except DatabaseUnavailable:
+            # Resumed from the previous chunk after a restart, its grants are
+            # skipped then as the members have the role.
+            pass
+
+    async def _finish(self, job: _Job):
+        key = (job.guild_id, job.role_id)
+        if self._jobs.get(key) is job:
+            del self._jobs[key]
+        while True:
+            try:
+                await self.db.delete(
+                    TableName.AUTOROLE_BACKFILLS.value,
+                    {"guild_id": job.guild_id, "role_id": job.role_id},
+                )
+                return
+            except DatabaseUnavailable:
+                await asyncio.sleep(self.retry_interval)
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import discord
+
+from bot.outbound import PRIORITY_CONFIRMATION, OutboundScheduler
+
+
+class _Window:
+    __slots__ = ("counts", "awards", "shown", "message", "closes_at", "edit_task")
+
+    def __init__(self, closes_at: float):
+        self.counts: Dict[int, int] = {}  # user_id -> points, in award order
+        self.awards = 0
+        self.shown = 0  # Awards in the embed as last sent or edited.
+        self.message: Optional[discord.Message] = None
+        self.closes_at = closes_at
+        self.edit_task: Optional[asyncio.Task] = None
+
+    def add(self, user_ids: List[int]):
+        for user_id in user_ids:
+            self.counts[user_id] = self.counts.get(user_id, 0) + 1
+        self.awards += len(user_ids)
+
+
+class ConfirmationCoalescer:
+    """
+    One confirmation message per channel for all the awards of a window.
+
+    The first award in a channel sends the embed and opens a `window` second
+    window; the awards that follow within it are added to that embed, which
+    is edited in place at most once every `edit_interval` seconds. The
+    message is deleted once, `delete_after` seconds after the window closed.
+    A window also closes once it lists `max_users` members, so the embed
+    stays readable.
+
+    Without it each award costs a create and a delete; a busy channel now
+    costs a create, a few edits and a delete per window. Sends and edits go
+    through the outbound scheduler.
+    """
+
+    def __init__(
+        self,
+        outbound: OutboundScheduler,
+        render: Callable[[List[Tuple[int, int]]], discord.Embed],
+        window: float,
+        delete_after: float,
+        edit_interval: float = 1.0,
+        max_users: int = 40,
+    ):
+        self.outbound = outbound
+        self.render = render
+        self.window = window
+        self.delete_after = delete_after
+        self.edit_interval = edit_interval
+        self.max_users = max_users
+        self.sends = 0
+        self.edits = 0
+
+        self._windows: Dict[int, _Window] = {}
+
+    async def confirm(self, channel: discord.abc.Messageable, user_ids: List[int]):
+        """
+        Confirm the points given to `user_ids` in a channel.
+
+        Raises the error of the send that opens a window; errors of the
+        later edits are printed, the awards they carried stay in the window.
+        """
+        now = time.monotonic()
+        window = self._windows.get(channel.id)
+        if (
+            window is None
+            or now >= window.closes_at
+            or len(window.counts) >= self.max_users
+        ):
+            window = self._windows[channel.id] = _Window(now + self.window)
+            asyncio.get_running_loop().call_later(
+                self.window, self._close, channel.id, window
+            )
+            window.add(user_ids)
+            shown = window.awards
+            embed = self.render(list(window.counts.items()))
+            try:
+                window.message = await self.outbound.run(
+                    f"channel:{channel.id}",
+                    lambda: channel.send(
+                        embed=embed, delete_after=self.window + self.delete_after
+                    ),
+                    priority=PRIORITY_CONFIRMATION,
+                )
+            except BaseException:
+                self._close(channel.id, window)
+                raise
+            self.sends += 1
+            window.shown = shown
+            # Awards added while the message was being sent.
+            self._edit_if_stale(window)
+            return
+
+        window.add(user_ids)
+        self._edit_if_stale(window)
+
+    def _close(self, channel_id: int, window: _Window):
+        # A newer window may have replaced this one already.
+        if self._windows.get(channel_id) is window:
+            del self._windows[channel_id]
+
+    def _edit_if_stale(self, window: _Window):
+        if (
+            window.message is not None
+            and window.edit_task is None
+            and window.awards != window.shown
+        ):
+            window.edit_task = asyncio.create_task(self._edit(window))
+
+    async def _edit(self, window: _Window):
+        await asyncio.sleep(self.edit_interval)
+        shown = window.awards
+        embed = self.render(list(window.counts.items()))
+        message = window.message
+        try:
+            await self.outbound.run(
+                f"channel:{message.channel.id}",
+                lambda: message.edit(embed=embed),
+                priority=PRIORITY_CONFIRMATION,
+            )
+            self.edits += 1
+            window.shown = shown
+        except discord.DiscordException as e:
+            print(f"[ERROR] Failed to edit a points message: {e}")
+            return
+        finally:
+            window.edit_task = None
+        self._edit_if_stale(window)
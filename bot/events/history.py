@@ -0,0 +1,225 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bot.database import DatabaseUnavailable, TableName
+
+# Leaderboard windows, see `window_starts`.
+WINDOWS = ("week", "month", "season")
+
+
+def window_starts(now: datetime) -> Dict[str, datetime]:
+    """
+    First day of each leaderboard window: the last 7 and 30 days, today
+    included, and the season, the current calendar quarter.
+    """
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        "week": today - timedelta(days=6),
+        "month": today - timedelta(days=29),
+        "season": today.replace(month=(today.month - 1) // 3 * 3 + 1, day=1),
+    }
+
+
+class ThanksHistory:
+    """
+    Append-only log of the points given, and its hourly and daily rollups.
+
+    Every award is buffered and written to `thanks_events` with the others
+    of the last `flush_interval` seconds as one multi-row insert, or as soon
+    as `max_pending` are waiting. Every `rollup_interval` seconds the events
+    appended since the last run are aggregated into `thanks_rollups`: points
+    received and thanks messages sent per member and hour, and per member
+    and day. A message thanking several members is sent once, like
+    `num_of_thanks` counts it. Time based stats read those, never the log.
+
+    The same run keeps the totals of each leaderboard window (`WINDOWS`) in
+    `thanks_windows`: new events are added to the windows covering their
+    day, and the days a window moves past are subtracted from it, so a
+    window board is read from an index like the lifetime one. Windows only
+    change during a rollup, so their first pages are cached until the next.
+
+    After each rollup the log is pruned of the events older than
+    `event_retention_days`, and the rollups of their retention too, so the
+    tables stop growing once the retention is reached.
+    """
+
+    def __init__(
+        self,
+        db,
+        flush_interval: float = 5,
+        rollup_interval: float = 60,
+        max_pending: int = 500,
+        rollup_chunk: int = 1000,
+        event_retention_days: int = 30,
+        hourly_retention_days: int = 7,
+        daily_retention_days: int = 400,
+    ):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.rollup_interval = rollup_interval
+        self.max_pending = max_pending
+        self.rollup_chunk = rollup_chunk
+        self.event_retention = timedelta(days=event_retention_days)
+        self.hourly_retention = timedelta(days=hourly_retention_days)
+        self.daily_retention = timedelta(days=daily_retention_days)
+        self.events_written = 0
+        self.events_rolled_up = 0
+
+        self._pending: List[dict] = []
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._early_flush: Optional[asyncio.Task] = None
+        # (guild_id, span) -> (limit, first page of the board), cleared by
+        # each rollup.
+        self._tops: Dict[Tuple[int, str], Tuple[int, List[dict]]] = {}
+        self._rollups = 0  # Bumped when a rollup starts and ends.
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the periodic jobs and write the events still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        next_rollup = time.monotonic() + self.rollup_interval
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() >= next_rollup:
+                    next_rollup = time.monotonic() + self.rollup_interval
+                    await self.rollup()
+            except DatabaseUnavailable:
+                pass  # Rolled up on the first run after the database is back.
+            except Exception as e:
+                print(f"[ERROR] Thanks history update failed: {e}")
+
+    # ── Writes ─────────────────────────────────────────────────────────────────
+
+    def record(
+        self,
+        guild_id: int,
+        giver_id: int,
+        receiver_ids: Iterable[int],
+        channel_id: int,
+        message_id: int,
+    ):
+        """Log the points `giver_id` just gave with a message, one event per receiver."""
+        now = datetime.now()
+        for receiver_id in receiver_ids:
+            self._pending.append(
+                {
+                    "guild_id": guild_id,
+                    "giver_id": giver_id,
+                    "receiver_id": receiver_id,
+                    "channel_id": channel_id,
+                    "message_id": message_id,
+                    "created_at": now,
+                }
+            )
+        if len(self._pending) >= self.max_pending and (
+            self._early_flush is None or self._early_flush.done()
+        ):
+            self._early_flush = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        """Append the pending events with one multi-row insert."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            rows, self._pending = self._pending, []
+            try:
+                try:
+                    await self.db.insert_many(TableName.THANKS_EVENTS.value, rows)
+                except DatabaseUnavailable:
+                    self.db.defer(
+                        "insert_many", table=TableName.THANKS_EVENTS.value, rows=rows
+                    )
+            except BaseException:
+                # In front of the events recorded meanwhile.
+                self._pending[:0] = rows
+                raise
+            self.events_written += len(rows)
+
+    async def rollup(self):
+        """Aggregate the events appended since the last rollup, then prune."""
+        now = datetime.now()
+        self._rollups += 1
+        try:
+            await self.db.advance_thanks_windows(window_starts(now))
+            while True:
+                rolled_up = await self.db.rollup_thanks_events(self.rollup_chunk)
+                self.events_rolled_up += rolled_up
+                if rolled_up < self.rollup_chunk:
+                    break
+        finally:
+            self._rollups += 1
+            self._tops.clear()
+        await self.db.prune_thanks_history(
+            now - self.event_retention,
+            now - self.hourly_retention,
+            now - self.daily_retention,
+        )
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+
+    async def window_page(
+        self,
+        guild_id: int,
+        span: str,
+        limit: int,
+        after: Optional[Tuple[int, int]] = None,
+    ) -> List[dict]:
+        """A page of a guild's board over a window, starting after (points, user_id)."""
+        if after is not None:
+            return await self.db.window_page(guild_id, span, limit, after)
+        cached = self._tops.get((guild_id, span))
+        if cached is not None and cached[0] >= limit:
+            return cached[1][:limit]
+        rollups = self._rollups
+        top = await self.db.window_page(guild_id, span, limit)
+        # Not if a rollup started or ended meanwhile, it may be outdated.
+        if rollups == self._rollups:
+            self._tops[guild_id, span] = (limit, top)
+        return top
+
+    async def recent(self, guild_id: int, user_id: int) -> Dict[str, Tuple[int, int]]:
+        """
+        The points a member received and the thanks they sent lately, from the rollups.
+
+        Events of the last `rollup_interval` seconds aren't rolled up yet.
+
+        Returns:
+            dict: (received, given) for "day" (the last 24 hours, by hour),
+            "week" and "month" (the last 7 and 30 days, today included).
+        """
+        now = datetime.now()
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        today = hour.replace(hour=0)
+        hourly, daily = await asyncio.gather(
+            self.db.thanks_rollup(
+                guild_id, user_id, "hour", hour - timedelta(hours=23)
+            ),
+            self.db.thanks_rollup(guild_id, user_id, "day", today - timedelta(days=29)),
+        )
+        week_start = today - timedelta(days=6)
+        week = [row for row in daily if row["bucket"] >= week_start]
+        return {
+            "day": _totals(hourly),
+            "week": _totals(week),
+            "month": _totals(daily),
+        }
+
+
+def _totals(rows: List[dict]) -> Tuple[int, int]:
+    return sum(row["received"] for row in rows), sum(row["given"] for row in rows)
@@ -0,0 +1,47 @@
+import re
+import unicodedata
+from typing import FrozenSet, Iterable
+
+# Romanian is often typed with the legacy cedilla letters instead of the
+# comma below ones used in the word lists: accept both spellings.
+_CEDILLA_VARIANTS = str.maketrans({"ș": "ş", "ț": "ţ"})
+
+
+def normalize_word(text: str) -> str:
+    """Lowercase and normalize text the same way for words and messages."""
+    text = text.lower()
+    # NFC joins letters typed as base + combining mark (t + U+0326 -> ț),
+    # otherwise the mark would split the word in two.
+    if not text.isascii() and not unicodedata.is_normalized("NFC", text):
+        text = unicodedata.normalize("NFC", text)
+    return text
+
+
+class ThankMatcher:
+    """
+    Whole-word thank detection in a single pass over the message.
+
+    All the words are compiled into one alternation regex, so the scan runs in
+    the regex engine and stops at the first hit. Word boundaries are the ones
+    of the `[\\w/]+` tokens used before, which are Unicode aware (Cyrillic,
+    Romanian diacritics). A guild with its own words gets its own matcher from
+    `with_words`, compiled once when its list changes.
+    """
+
+    TOKEN = re.compile(r"[\w/]+")
+
+    def __init__(self, words: Iterable[str]):
+        self.words: FrozenSet[str] = frozenset(normalize_word(word) for word in words)
+        variants = {word.translate(_CEDILLA_VARIANTS) for word in self.words}
+        # Longest first so a word is never shadowed by one of its prefixes.
+        alternatives = sorted(self.words | variants, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"(?<![\w/])(?:%s)(?![\w/])" % "|".join(map(re.escape, alternatives))
+        )
+
+    def with_words(self, extra: Iterable[str]) -> "ThankMatcher":
+        """Return a matcher for these words plus `extra`."""
+        return ThankMatcher(self.words | frozenset(extra))
+
+    def matches(self, content: str) -> bool:
+        return self._pattern.search(normalize_word(content)) is not None
@@ -1,10 +1,23 @@
 import asyncio
 import discord
-import re
+import os
+import time
+import traceback
 from datetime import datetime, timedelta
-from typing import List, Optional
-
-from bot.database import db, TableName
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from bot import metrics
+from bot.buffer import PointsBuffer
+from bot.database import DatabaseUnavailable, TableName
+from bot.events.autoroles import AutoroleIndex
+from bot.events.backfill import AutoroleBackfill
+from bot.events.confirmations import ConfirmationCoalescer
+from bot.events.history import ThanksHistory
+from bot.events.matcher import ThankMatcher, normalize_word
+from bot.events.ranking import LeaderboardCache, RankIndex
+from bot.events.replies import ReplyAuthorCache
+from bot.events.tracker import ThanksTracker
+from bot.outbound import PRIORITY_CONFIRMATION, PRIORITY_DM, PRIORITY_ROLE
 from enum import Enum
 
 
@@ -14,6 +27,8 @@ class PointsConfig:
     cooldown_minutes: int = 60
     daily_limit: int = 5
     message_timeout: int = 30  # seconds
+    leaderboard_size: int = 10
+    tracker_ttl: int = 2 * 60 * 60  # seconds
 
     thank_words: List[str] = [
         # English thank words
@@ -60,54 +75,80 @@ class DailyLimitEnum(Enum):
 class PointsManager:
     """Manages points-related database operations."""
 
-    def __init__(self, db, validator, bot):
+    def __init__(self, db, validator, bot, buffer: Optional[PointsBuffer] = None):
         self.db = db
         self.bot = bot
         self.validator: PointsValidator = validator
+        self.buffer = buffer
+        self.autoroles = AutoroleIndex(db)
+        self.backfill = AutoroleBackfill(
+            self, chunk_size=int(os.getenv("AUTOROLE_BACKFILL_CHUNK", 100))
+        )
+        self.leaderboard = LeaderboardCache(
+            self.get_top_users, size=validator.config.leaderboard_size
+        )
+        self.ranks = RankIndex(self._count_points)
+        self.history = ThanksHistory(
+            db,
+            flush_interval=float(os.getenv("THANKS_EVENTS_FLUSH_SECONDS", 5)),
+            rollup_interval=float(os.getenv("THANKS_ROLLUP_SECONDS", 60)),
+            event_retention_days=int(os.getenv("THANKS_EVENTS_RETENTION_DAYS", 30)),
+            hourly_retention_days=int(os.getenv("THANKS_HOURLY_RETENTION_DAYS", 7)),
+            daily_retention_days=int(os.getenv("THANKS_DAILY_RETENTION_DAYS", 400)),
+        )
+        self.tracker = ThanksTracker(
+            self.load_user_points, ttl=validator.config.tracker_ttl
+        )
         self._background_tasks: set = set()
 
-    def get_user_points(self, guild_id: int, user_id: int) -> Optional[dict]:
+    def run_in_background(self, coro) -> asyncio.Task:
+        """Run a coroutine without waiting for it, keeping the task until it's done."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def get_user_points(self, guild_id: int, user_id: int) -> Optional[dict]:
         """Get a user's points record."""
-        result = self.db.select(
+        if self.buffer is not None:
+            return await self.buffer.load(guild_id, user_id)
+        result = await self.db.select(
             TableName.POINTS.value,
             where={"guild_id": guild_id, "discord_user_id": user_id},
         )
         return result[0] if result else None
 
     async def check_role_threshold(
-        self, user_id: int, points: int, guild_id: int
+        self, user_id: int, autoroles: List[Tuple[int, int]], guild_id: int
     ) -> None:
-        """Check if a user has reached the role threshold."""
-        autoroles = self.db.select(
-            TableName.AUTOROLES.value, where={"guild_id": guild_id}
-        )
-        if not autoroles:
-            return
-
+        """Give a user the (threshold, role_id) autoroles they just reached."""
         guild = self.bot.get_guild(guild_id)
         if not guild:
             return
 
         try:
-            member = await guild.fetch_member(user_id)
-        except discord.NotFound:
-            await self.bot.logger.debug(
-                f"Guild: {guild.id} - Member {user_id} not found."
+            member = await self.bot.outbound.run(
+                f"members:{guild.id}",
+                lambda: guild.fetch_member(user_id),
+                priority=PRIORITY_ROLE,
+                key=("member", guild.id, user_id),
             )
+        except discord.NotFound:
+            self.bot.logger.debug(f"Guild: {guild.id} - Member {user_id} not found.")
             return
 
-        user_roles_ids = [role.id for role in member.roles]
-
-        for autorole in autoroles:
-            user_has_role = autorole["role_id"] in user_roles_ids
-            if points >= autorole["threshold"] and not user_has_role:
-                role = guild.get_role(autorole["role_id"])
-                if role is not None:
-                    await self.give_role(guild, member, role, autorole["threshold"])
-                else:
-                    await self.bot.logger.error(
-                        f"Guild: {guild.id} - Role {role.name} not found when trying to assign to user {member.name}."
-                    )
+        user_roles_ids = {role.id for role in member.roles}
+
+        for threshold, role_id in autoroles:
+            if role_id in user_roles_ids:
+                continue
+            role = guild.get_role(role_id)
+            if role is not None:
+                await self.give_role(guild, member, role, threshold)
+            else:
+                self.bot.logger.error(
+                    f"Guild: {guild.id} - Role {role_id} not found when trying to assign to user {member.name}."
+                )
 
     async def give_role(
         self,
@@ -115,105 +156,180 @@ class PointsManager:
         member: discord.Member,
         role: discord.Role,
         threshold: int,
-    ) -> None:
-        """Give a role to a member."""
+        priority: int = PRIORITY_ROLE,
+        notify: bool = True,
+    ) -> bool:
+        """Give a role to a member and DM them about it unless not `notify`, returns whether it was given."""
+        key = ("role", guild.id, member.id, role.id)
+        if self.bot.outbound.pending(key):
+            # Already being granted, by a thanks that crossed the same threshold.
+            return False
         try:
-            await member.add_roles(role)
-            await self.bot.logger.debug(
+            await self.bot.outbound.run(
+                f"roles:{guild.id}",
+                lambda: member.add_roles(role),
+                priority=priority,
+                key=key,
+            )
+            self.bot.logger.debug(
                 f"Guild: {guild.id} - Successfully added role {role.name} to {member.name} for reaching {threshold} points."
             )
-            await member.send(
-                embed=discord.Embed(
-                    title="Role Granted",
-                    description=f"Amazing !! You just received the role {role.name} for reaching {threshold} points in {guild.name}!",
-                    color=discord.Color.random(),
-                )
+            if not notify:
+                return True
+            embed = discord.Embed(
+                title="Role Granted",
+                description=f"Amazing !! You just received the role {role.name} for reaching {threshold} points in {guild.name}!",
+                color=discord.Color.random(),
+            )
+            await self.bot.outbound.run(
+                "dm", lambda: member.send(embed=embed), priority=PRIORITY_DM
             )
+            return True
         except Exception as e:
-            await self.bot.logger.error(
+            self.bot.logger.error(
                 f"Guild: {guild.id} - Failed to add role {role.name} to {member.name}: {e}"
             )
+            return False
 
-    def create_user_points(self, guild_id: int, user_id: int, points: int = 0) -> None:
-        """Create a new points record for a user."""
-        self.db.insert(
+    async def get_top_users(self, guild_id: int, limit: int) -> List[dict]:
+        """Get the points records of a guild's top users."""
+        users = await self.db.select(
             TableName.POINTS.value,
-            {
-                "guild_id": guild_id,
-                "discord_user_id": user_id,
-                "points": points,
-                "last_thanks": datetime(2000, 1, 1),
-                "num_of_thanks": 0,
-                "last_received_points_date": datetime.now(),
-                "current_day_received_points": 1,
-            },
+            where={"guild_id": guild_id},
+            limit=limit,
+            order_by="points DESC, discord_user_id DESC",
         )
+        if self.buffer is not None:
+            users = self.buffer.merge_top(guild_id, users, limit)
+        return users
+
+    async def get_points_page(
+        self,
+        guild_id: int,
+        limit: int,
+        after: Optional[Tuple[int, int]] = None,
+        window: Optional[str] = None,
+    ) -> List[dict]:
+        """Get a page of a guild's leaderboard, starting after (points, user_id), over a window of `WINDOWS` or all time."""
+        if window is not None:
+            return await self.history.window_page(guild_id, window, limit, after)
+        if after is None:
+            return (await self.leaderboard.top(guild_id))[:limit]
+        if self.buffer is not None:
+            # Pages are read from the table: write pending changes first.
+            await self.buffer.flush()
+        return await self.db.points_page(guild_id, limit, after)
+
+    async def get_rank(self, guild_id: int, points: int) -> Tuple[Optional[int], int]:
+        """Get the rank of a member with these points, and the number of ranked members."""
+        return await self.ranks.rank(guild_id, points)
+
+    async def _count_points(self, guild_id: int) -> List[dict]:
+        if self.buffer is not None:
+            await self.buffer.flush()
+        return await self.db.count_by(
+            TableName.POINTS.value, "points", {"guild_id": guild_id}
+        )
+
+    async def load_user_points(self, guild_id: int, user_id: int) -> dict:
+        """Get a user's points record, or the one a new member starts with."""
+        user = await self.get_user_points(guild_id, user_id)
+        return user or self._new_points_row(guild_id, user_id)
 
     async def update_user_points(
         self, guild_id: int, user_id: int, points_delta: int = 1
-    ) -> None:
-        """Update a user's points."""
-        current = self.get_user_points(guild_id, user_id)
-        if current:
-            match self.validator.can_receive_points(current):
-                case DailyLimitEnum.LIMIT_EXCEEDED:
-                    return
-                case DailyLimitEnum.FIRST_POINT_OF_THE_DAY:
-                    self.db.update(
-                        TableName.POINTS.value,
-                        {
-                            "last_received_points_date": datetime.now(),
-                            "points": current["points"] + points_delta,
-                            "current_day_received_points": 1,
-                        },
-                        {"guild_id": guild_id, "discord_user_id": user_id},
+    ) -> Optional[int]:
+        """Award points to a user, returns the new total or None if the daily limit is reached."""
+        # Checked and updated in memory without awaiting in between, so two
+        # thanks for the same member can't both pass the daily limit.
+        user = await self.tracker.get(guild_id, user_id)
+        match self.validator.can_receive_points(user):
+            case DailyLimitEnum.LIMIT_EXCEEDED:
+                return None
+            case DailyLimitEnum.FIRST_POINT_OF_THE_DAY:
+                user["last_received_points_date"] = datetime.now()
+                user["current_day_received_points"] = 1
+            case DailyLimitEnum.LIMIT_NOT_EXCEEDED:
+                user["current_day_received_points"] += 1
+        user["points"] += points_delta
+
+        if self.buffer is not None:
+            self.buffer.add(dict(user), points=points_delta)
+            total = user["points"]
+        else:
+            daily_limit = self.validator.config.daily_limit
+            try:
+                try:
+                    total = await self.db.award_points(
+                        guild_id, user_id, points_delta, daily_limit
                     )
-                case DailyLimitEnum.LIMIT_NOT_EXCEEDED:
-                    previous_amount = current["current_day_received_points"]
-                    self.db.update(
-                        TableName.POINTS.value,
-                        {
-                            "current_day_received_points": previous_amount + 1,
-                            "points": current["points"] + points_delta,
-                        },
-                        {"guild_id": guild_id, "discord_user_id": user_id},
+                except DatabaseUnavailable:
+                    # Applied when the database is back, the tracked row is
+                    # the total meanwhile.
+                    self.db.defer(
+                        "award_points",
+                        guild_id=guild_id,
+                        user_id=user_id,
+                        points_delta=points_delta,
+                        daily_limit=daily_limit,
                     )
-
-            task = asyncio.create_task(
-                self.check_role_threshold(
-                    user_id, current["points"] + points_delta, guild_id
-                )
+                    total = user["points"]
+            except BaseException:
+                # Neither written nor journaled (or cancelled meanwhile): the
+                # tracked row may hold points that aren't stored, reload it.
+                self.tracker.forget(guild_id, user_id)
+                raise
+            if total is None:
+                # The database disagrees (e.g. another instance gave the
+                # points): it is the source of truth, reload on next access.
+                self.tracker.forget(guild_id, user_id)
+                return None
+            user["points"] = max(user["points"], total)
+        self.leaderboard.update(user)
+        self.ranks.update(guild_id, total - points_delta, total)
+
+        autoroles = self.autoroles.due(guild_id, total - points_delta, total)
+        if autoroles:
+            self.run_in_background(
+                self.check_role_threshold(user_id, autoroles, guild_id)
             )
-            self._background_tasks.add(task)
-            task.add_done_callback(self._background_tasks.discard)
-        else:
-            self.create_user_points(guild_id, user_id, points_delta)
+        return total
 
-    def update_has_thanked_user(
-        self, guild_id: int, user_id: int, user: Optional[dict] = None
-    ) -> None:
+    async def update_has_thanked_user(self, guild_id: int, user_id: int) -> None:
         """Update the last thanked time for a user."""
-        date_now = datetime.now()
-
-        if not user:
-            db.insert(
-                TableName.POINTS.value,
-                {
-                    "guild_id": guild_id,
-                    "discord_user_id": user_id,
-                    "last_thanks": date_now,
-                    "num_of_thanks": 1,
-                },
-            )
+        user = await self.tracker.get(guild_id, user_id)
+        self.mark_thanked(user)
+        await self.write_thanked(user)
+
+    def mark_thanked(self, user: dict) -> None:
+        """Update the tracked row of a member who just thanked, puts them on cooldown."""
+        user["last_thanks"] = datetime.now()
+        user["num_of_thanks"] += 1
+        self.leaderboard.update(user)
+
+    async def write_thanked(self, user: dict) -> None:
+        """Write the change made by `mark_thanked`."""
+        guild_id, user_id = user["guild_id"], user["discord_user_id"]
+        if self.buffer is not None:
+            self.buffer.add(dict(user), num_of_thanks=1)
         else:
-            db.update(
-                TableName.POINTS.value,
-                {
-                    "last_thanks": date_now,
-                    "num_of_thanks": user["num_of_thanks"] + 1,
-                },
-                {"guild_id": guild_id, "discord_user_id": user_id},
-            )
+            try:
+                await self.db.record_thanks(guild_id, user_id)
+            except DatabaseUnavailable:
+                self.db.defer("record_thanks", guild_id=guild_id, user_id=user_id)
+
+    @staticmethod
+    def _new_points_row(guild_id: int, user_id: int) -> dict:
+        """The row a member gets on their first thanks, as created by the database."""
+        return {
+            "guild_id": guild_id,
+            "discord_user_id": user_id,
+            "points": 0,
+            "last_thanks": datetime(2000, 1, 1),
+            "num_of_thanks": 0,
+            "last_received_points_date": datetime.now(),
+            "current_day_received_points": 0,
+        }
 
 
 class PointsValidator:
@@ -221,6 +337,19 @@ class PointsValidator:
 
     def __init__(self, config: PointsConfig):
         self.config = config
+        self.matcher = ThankMatcher(config.thank_words)
+        self.guild_thank_words: Dict[int, FrozenSet[str]] = {}
+        self._guild_matchers: Dict[int, ThankMatcher] = {}
+
+    def set_guild_thank_words(self, guild_id: int, words: Iterable[str]) -> None:
+        """Replace the extra thank words of a guild."""
+        words = frozenset(normalize_word(word) for word in words)
+        if words:
+            self.guild_thank_words[guild_id] = words
+            self._guild_matchers[guild_id] = self.matcher.with_words(words)
+        else:
+            self.guild_thank_words.pop(guild_id, None)
+            self._guild_matchers.pop(guild_id, None)
 
     def can_receive_points(self, user: Optional[dict]) -> DailyLimitEnum:
         """Check if the user has been receiving more than x points in the last 24h."""
@@ -239,14 +368,22 @@ class PointsValidator:
 
     def is_valid_thank_message(self, message: discord.Message) -> bool:
         """Check if a message contains a valid thank word."""
-        words = re.findall(r"[\w/]+", message.content.lower())
-        return any(word in words for word in self.config.thank_words)
+        return self.is_thank_content(message.guild.id, message.content)
+
+    def is_thank_content(self, guild_id: int, content: str) -> bool:
+        """Check if a message's text contains a thank word of its guild."""
+        matcher = self._guild_matchers.get(guild_id, self.matcher)
+        return matcher.matches(content)
 
-    def get_mentioned_users(self, message: discord.Message) -> List[int]:
-        """Get the list of valid mentioned users from a message."""
+    def get_mentioned_users(
+        self, message: discord.Message, reply_author_id: Optional[int] = None
+    ) -> List[int]:
+        """Get the list of valid mentioned users from a message, the replied-to author included."""
         users = []
 
-        if (
+        if reply_author_id is not None:
+            users.append(reply_author_id)
+        elif (
             message.reference
             and message.reference.resolved
             and isinstance(message.reference.resolved, discord.Message)
@@ -277,46 +414,252 @@ class Points:
         self.bot = bot
         self.config = config or PointsConfig()
         self.validator = PointsValidator(self.config)
-        self.manager = PointsManager(db, self.validator, bot)
+        buffer_interval = int(os.getenv("POINTS_BUFFER_INTERVAL_MS", 0))
+        buffer = None
+        if buffer_interval > 0:
+            buffer = PointsBuffer(
+                bot.db,
+                interval=buffer_interval / 1000,
+                max_entries=int(os.getenv("POINTS_BUFFER_MAX_ENTRIES", 500)),
+            )
+        self.manager = PointsManager(bot.db, self.validator, bot, buffer)
+        self.reply_authors = ReplyAuthorCache(
+            capacity=int(os.getenv("REPLY_CACHE_SIZE", 100_000))
+        )
+        # Thanks awarded once the message they reply to is fetched.
+        self._awards: set = set()
+        # Merge the confirmations of a channel sent within this many seconds.
+        coalesce_window = float(os.getenv("CONFIRM_COALESCE_SECONDS", 0))
+        self.confirmations = None
+        if coalesce_window > 0:
+            self.confirmations = ConfirmationCoalescer(
+                bot.outbound,
+                self.confirmation_embed,
+                window=coalesce_window,
+                delete_after=self.config.message_timeout,
+            )
+
+    async def start(self) -> None:
+        """Load the guilds' thank words and autoroles, start the background jobs of the points system."""
+        await self.manager.autoroles.load()
+        guild_words: Dict[int, List[str]] = {}
+        for row in await self.manager.db.select(TableName.THANK_WORDS.value):
+            guild_words.setdefault(row["guild_id"], []).append(row["word"])
+        for guild_id, words in guild_words.items():
+            self.validator.set_guild_thank_words(guild_id, words)
+
+        if self.manager.buffer is not None:
+            self.manager.buffer.start()
+        self.manager.history.start()
+        self.manager.backfill.resume()
+
+    async def close(self) -> None:
+        """Finish the awards in progress, stop the autorole backfills, write everything still buffered."""
+        await self.drain()
+        await self.manager.backfill.close()
+        if self.manager.buffer is not None:
+            await self.manager.buffer.close()
+        await self.manager.history.close()
 
     async def process_message(self, message: discord.Message) -> None:
-        """Process a message and handle points if applicable."""
-        if not self.validator.is_valid_thank_message(message):
+        """
+        Process a message and handle points if applicable.
+
+        Nothing here waits on Discord: confirmations are sent in the
+        background, and a thanks whose recipient must be fetched is awarded
+        in the background once it is, so a dispatcher worker never waits on
+        a rate-limited route.
+        """
+        with metrics.stage_seconds.time(stage="match"):
+            is_thanks = self.validator.is_valid_thank_message(message)
+        if not is_thanks:
             return
+        metrics.thank_matches.inc()
 
-        mentioned_users = self.validator.get_mentioned_users(message)
-        if not mentioned_users:
+        reply_author_id, unresolved = self.known_reply_author(message)
+        mentioned_users = self.validator.get_mentioned_users(message, reply_author_id)
+        if not mentioned_users and not unresolved:
             return
 
-        sender_record = self.manager.get_user_points(
+        start = time.perf_counter()
+        sender_record = await self.manager.tracker.get(
             message.guild.id, message.author.id
         )
-
-        if sender_record and self.validator.is_on_cooldown(
-            sender_record["last_thanks"]
-        ):
+        if self.validator.is_on_cooldown(sender_record["last_thanks"]):
+            metrics.rejections.inc(reason="cooldown")
+            return
+        if unresolved:
+            # Rate limited: only fetched for a thanks that can be awarded.
+            task = asyncio.create_task(self._award_reply(message, sender_record))
+            self._awards.add(task)
+            task.add_done_callback(self._awards.discard)
             return
+        await self._award(message, sender_record, mentioned_users, start)
 
-        valid_users_string = ""
-        self.manager.update_has_thanked_user(
-            message.guild.id, message.author.id, sender_record
+    async def _award_reply(self, message: discord.Message, sender_record: dict):
+        """Fetch the author of the message replied to, then award the thanks."""
+        try:
+            fetch_start = time.perf_counter()
+            reply_author_id = await self.fetch_reply_author(message)
+            metrics.stage_seconds.observe(
+                time.perf_counter() - fetch_start, stage="fetch"
+            )
+            mentioned_users = self.validator.get_mentioned_users(
+                message, reply_author_id
+            )
+            if not mentioned_users:
+                return
+            # Another message of the sender may have passed meanwhile.
+            if self.validator.is_on_cooldown(sender_record["last_thanks"]):
+                metrics.rejections.inc(reason="cooldown")
+                return
+            await self._award(
+                message, sender_record, mentioned_users, time.perf_counter()
+            )
+        except DatabaseUnavailable:
+            metrics.rejections.inc(reason="db_unavailable")
+        except Exception as e:
+            print(f"[ERROR] Failed to award the reply {message.id}: {e}")
+            traceback.print_exc()
+
+    async def _award(
+        self,
+        message: discord.Message,
+        sender_record: dict,
+        mentioned_users: List[int],
+        start: float,
+    ):
+        # On cooldown from now on, before anything awaits: another message
+        # of the sender can't pass the cooldown check meanwhile.
+        self.manager.mark_thanked(sender_record)
+
+        # The sender and the recipients are distinct members, each one's
+        # daily limit is checked and updated on its own tracked row: their
+        # round trips can overlap. One failing doesn't undo the others: the
+        # points given are confirmed and logged, then the error is raised.
+        written, *totals = await asyncio.gather(
+            self.manager.write_thanked(sender_record),
+            *(
+                self.manager.update_user_points(message.guild.id, user_id)
+                for user_id in mentioned_users
+            ),
+            return_exceptions=True,
         )
+        metrics.stage_seconds.observe(time.perf_counter() - start, stage="db")
+
+        errors = [
+            result for result in (written, *totals) if isinstance(result, BaseException)
+        ]
+        awarded = []
+        for user_id, total in zip(mentioned_users, totals):
+            if isinstance(total, BaseException):
+                continue
+            if total is None:
+                metrics.rejections.inc(reason="daily_limit")
+            else:
+                metrics.awards.inc()
+                awarded.append(user_id)
+        if awarded:
+            self.manager.history.record(
+                message.guild.id,
+                message.author.id,
+                awarded,
+                message.channel.id,
+                message.id,
+            )
+            self.manager.run_in_background(self.send_confirmation(message, awarded))
+        if errors:
+            raise errors[0]
 
-        for user_id in mentioned_users:
-            await self.manager.update_user_points(message.guild.id, user_id)
-            valid_users_string += f"<@{user_id}>, "
+    async def drain(self):
+        """Wait for the thanks being awarded in the background."""
+        while self._awards:
+            await asyncio.gather(*self._awards, return_exceptions=True)
 
-        valid_users_string = valid_users_string[:-2]
-        embed = discord.Embed(
-            title="",
-            description=f"{valid_users_string} received a point! Thanks for helping this community!",
-            color=self.config.embed_color,
-        )
+    async def send_confirmation(self, message: discord.Message, awarded: List[int]):
+        """Confirm in the message's channel the points just given."""
         try:
-            await message.channel.send(
-                embed=embed, delete_after=self.config.message_timeout
-            )
+            with metrics.stage_seconds.time(stage="send"):
+                if self.confirmations is not None:
+                    await self.confirmations.confirm(message.channel, awarded)
+                else:
+                    embed = self.confirmation_embed(
+                        [(user_id, 1) for user_id in awarded]
+                    )
+                    await self.bot.outbound.run(
+                        f"channel:{message.channel.id}",
+                        lambda: message.channel.send(
+                            embed=embed, delete_after=self.config.message_timeout
+                        ),
+                        priority=PRIORITY_CONFIRMATION,
+                    )
         except discord.DiscordException as e:
-            await self.bot.logger.error(
+            self.bot.logger.error(
                 f"Guild: {message.guild.id} ({message.guild.name}) - Failed to send points message: {e}"
             )
+
+    async def get_reply_author(self, message: discord.Message) -> Optional[int]:
+        """
+        Get the author of the message replied to.
+
+        Taken from the reference when discord.py resolved it, else from the
+        reply cache, else fetched (rate limited per channel). None if the
+        message isn't a reply or its target is gone.
+        """
+        author_id, unresolved = self.known_reply_author(message)
+        if unresolved:
+            return await self.fetch_reply_author(message)
+        return author_id
+
+    def known_reply_author(
+        self, message: discord.Message
+    ) -> Tuple[Optional[int], bool]:
+        """
+        The author of the message replied to, without fetching it.
+
+        Returns:
+            Tuple[Optional[int], bool]: The author if known, and whether
+            only `fetch_reply_author` can tell it.
+        """
+        reference = message.reference
+        if reference is None or reference.message_id is None:
+            return None, False
+        if isinstance(reference.resolved, discord.Message):
+            return reference.resolved.author.id, False
+
+        author_id = self.reply_authors.get(reference.message_id)
+        # resolved is a DeletedReferencedMessage when Discord sent none.
+        if author_id is not None or reference.resolved is not None:
+            return author_id, False
+        return None, reference.channel_id == message.channel.id
+
+    async def fetch_reply_author(self, message: discord.Message) -> Optional[int]:
+        """Fetch the message replied to, rate limited per channel, and return its author."""
+        reference = message.reference
+        try:
+            replied = await self.bot.outbound.run(
+                f"messages:{message.channel.id}",
+                lambda: message.channel.fetch_message(reference.message_id),
+                priority=PRIORITY_CONFIRMATION,
+                key=("message", reference.message_id),
+            )
+        except discord.DiscordException as e:
+            self.bot.logger.debug(
+                f"Guild: {message.guild.id} - Replied message {reference.message_id} not fetched: {e}"
+            )
+            return None
+        self.reply_authors.add(replied.id, replied.author.id)
+        return replied.author.id
+
+    def confirmation_embed(self, awards: List[Tuple[int, int]]) -> discord.Embed:
+        """The embed confirming (user_id, points) awards."""
+        valid_users_string = ", ".join(
+            f"<@{user_id}>" if points == 1 else f"<@{user_id}> (x{points})"
+            for user_id, points in awards
+        )
+        received = "a point" if all(points == 1 for _, points in awards) else "points"
+        return discord.Embed(
+            title="",
+            description=f"{valid_users_string} received {received}! Thanks for helping this community!",
+            color=self.config.embed_color,
+        )
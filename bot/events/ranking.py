@@ -0,0 +1,208 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+_COLUMNS = ("guild_id", "discord_user_id", "points", "num_of_thanks")
+
+
+def _rank_key(row: dict) -> Tuple[int, int]:
+    return row["points"], row["discord_user_id"]
+
+
+class LeaderboardCache:
+    """
+    Top `size` members of each guild by points, kept current on every change.
+
+    A guild's board is built lazily from the database on first access (or
+    after `invalidate`) and then updated in memory with the rows passed to
+    `update`. Points never decrease, so a member outside the board can only
+    enter it by passing its lowest entry. Ties are broken by user ID, like the
+    keyset pages of `ThanksDB.points_page`, so page 1 and page 2 never overlap.
+    """
+
+    def __init__(
+        self, loader: Callable[[int, int], Awaitable[List[dict]]], size: int = 10
+    ):
+        self.loader = loader
+        self.size = size
+        self.rebuilds = 0
+
+        # guild_id -> user_id -> row; fewer than `size` rows means the board
+        # holds every member of the guild that has a row.
+        self._boards: Dict[int, Dict[int, dict]] = {}
+        # Rows updated while a board was being loaded, applied once it is.
+        self._loading: Dict[int, Dict[int, dict]] = {}
+        self._loaded: Dict[int, asyncio.Future] = {}
+
+    async def top(self, guild_id: int) -> List[dict]:
+        """The board of a guild, highest points first."""
+        board = self._boards.get(guild_id)
+        if board is None:
+            board = await self._rebuild(guild_id)
+        return sorted(board.values(), key=_rank_key, reverse=True)
+
+    def update(self, row: dict):
+        """Apply a member's new points/num_of_thanks to the guild's board."""
+        guild_id = row["guild_id"]
+        entry = {column: row[column] for column in _COLUMNS}
+        updated_while_loading = self._loading.get(guild_id)
+        if updated_while_loading is not None:
+            updated_while_loading[entry["discord_user_id"]] = entry
+        board = self._boards.get(guild_id)
+        if board is not None:
+            self._apply(board, entry)
+
+    def invalidate(self, guild_id: int):
+        """Drop a guild's board, the next access rebuilds it from the database."""
+        self._boards.pop(guild_id, None)
+
+    def _apply(self, board: Dict[int, dict], entry: dict):
+        user_id = entry["discord_user_id"]
+        if user_id in board or len(board) < self.size:
+            board[user_id] = entry
+            return
+        lowest = min(board.values(), key=_rank_key)
+        if _rank_key(entry) > _rank_key(lowest):
+            del board[lowest["discord_user_id"]]
+            board[user_id] = entry
+
+    async def _rebuild(self, guild_id: int) -> Dict[int, dict]:
+        loaded = self._loaded.get(guild_id)
+        if loaded is not None:
+            return await asyncio.shield(loaded)
+
+        loaded = self._loaded[guild_id] = asyncio.get_running_loop().create_future()
+        updated_while_loading = self._loading[guild_id] = {}
+        try:
+            rows = await self.loader(guild_id, self.size)
+        except BaseException as e:
+            loaded.set_exception(e)
+            loaded.exception()
+            raise
+        finally:
+            del self._loaded[guild_id]
+            del self._loading[guild_id]
+
+        board = {
+            row["discord_user_id"]: {column: row[column] for column in _COLUMNS}
+            for row in rows
+        }
+        for entry in updated_while_loading.values():
+            self._apply(board, entry)
+        self._boards[guild_id] = board
+        self.rebuilds += 1
+        loaded.set_result(board)
+        return board
+
+
+class _FenwickTree:
+    """Counts per points value, with prefix sums in O(log n)."""
+
+    def __init__(self, counts: List[int]):
+        # Linear-time construction from the raw counts.
+        self.counts = counts
+        self.tree = [0] + counts
+        for i in range(1, len(self.tree)):
+            parent = i + (i & -i)
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[i]
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, value: int, delta: int):
+        self.counts[value] += delta
+        i = value + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def count_up_to(self, value: int) -> int:
+        """Number of members with at most `value` points."""
+        total = 0
+        i = min(value, len(self.counts) - 1) + 1
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+class RankIndex:
+    """
+    Order statistics on points per guild: a member's rank in O(log n).
+
+    Each guild gets a Fenwick tree counting members per points value, built
+    once from a grouped query and updated on every award. Members with no
+    points are not ranked. Awards landing in the database while a guild's
+    tree is being built can be counted twice or missed until the next
+    `invalidate`.
+    """
+
+    def __init__(self, loader: Callable[[int], Awaitable[List[dict]]]):
+        self.loader = loader
+        self._trees: Dict[int, _FenwickTree] = {}
+        self._totals: Dict[int, int] = {}
+        self._loaded: Dict[int, asyncio.Future] = {}
+
+    async def rank(self, guild_id: int, points: int) -> Tuple[Optional[int], int]:
+        """
+        Rank of a member with `points` points and the number of ranked members.
+
+        Returns:
+            Tuple[Optional[int], int]: 1 + the number of members with more
+            points (None when `points` is 0), and the number of members with
+            at least one point.
+        """
+        tree = self._trees.get(guild_id)
+        if tree is None:
+            tree = await self._rebuild(guild_id)
+        total = self._totals[guild_id]
+        if points <= 0:
+            return None, total
+        return total - tree.count_up_to(points) + 1, total
+
+    def update(self, guild_id: int, old_points: int, new_points: int):
+        tree = self._trees.get(guild_id)
+        if tree is None or old_points == new_points:
+            return
+        if old_points > 0:
+            tree.add(old_points, -1)
+            self._totals[guild_id] -= 1
+        if new_points > 0:
+            if new_points >= len(tree):
+                tree = self._grow(guild_id, new_points)
+            tree.add(new_points, 1)
+            self._totals[guild_id] += 1
+
+    def invalidate(self, guild_id: int):
+        self._trees.pop(guild_id, None)
+        self._totals.pop(guild_id, None)
+
+    def _grow(self, guild_id: int, points: int) -> _FenwickTree:
+        counts = self._trees[guild_id].counts
+        counts.extend([0] * (max(points + 1, 2 * len(counts)) - len(counts)))
+        tree = self._trees[guild_id] = _FenwickTree(counts)
+        return tree
+
+    async def _rebuild(self, guild_id: int) -> _FenwickTree:
+        loaded = self._loaded.get(guild_id)
+        if loaded is not None:
+            return await asyncio.shield(loaded)
+
+        loaded = self._loaded[guild_id] = asyncio.get_running_loop().create_future()
+        try:
+            rows = await self.loader(guild_id)
+        except BaseException as e:
+            loaded.set_exception(e)
+            loaded.exception()
+            raise
+        finally:
+            del self._loaded[guild_id]
+
+        counts = [0] * (max((row["points"] for row in rows), default=0) * 2 + 16)
+        for row in rows:
+            if row["points"] > 0:
+                counts[row["points"]] += row["count"]
+        tree = self._trees[guild_id] = _FenwickTree(counts)
+        self._totals[guild_id] = sum(counts)
+        loaded.set_result(tree)
+        return tree
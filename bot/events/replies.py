@@ -0,0 +1,56 @@
+import sys
+from array import array
+from typing import Dict, Optional
+
+
+class ReplyAuthorCache:
+    """
+    Author of each of the last `capacity` messages seen, by message ID.
+
+    Lets a reply be credited to the author of the message it answers when
+    discord.py couldn't resolve the reference, without keeping Message
+    objects around. Entries live in a dict, and their order of arrival in a
+    fixed ring of message IDs (`array`, 8 bytes each) which gives the entry
+    to drop when a new message comes in with the cache full: oldest first,
+    replies overwhelmingly answer recent messages.
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        if capacity < 1:
+            raise ValueError("Invalid cache capacity.")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+
+        self._authors: Dict[int, int] = {}
+        self._ring = array("q", bytes(8 * capacity))
+        self._next = 0  # Slot of the ring overwritten by the next message.
+
+    def __len__(self) -> int:
+        return len(self._authors)
+
+    def add(self, message_id: int, author_id: int):
+        if message_id in self._authors:
+            return
+        if len(self._authors) >= self.capacity:
+            self._authors.pop(self._ring[self._next], None)
+        self._ring[self._next] = message_id
+        self._next = (self._next + 1) % self.capacity
+        self._authors[message_id] = author_id
+
+    def get(self, message_id: int) -> Optional[int]:
+        author_id = self._authors.get(message_id)
+        if author_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return author_id
+
+    def bytes_per_entry(self) -> float:
+        """Memory held per cached message: dict slots, ring slot and both IDs."""
+        if not self._authors:
+            return 0.0
+        message_id, author_id = next(iter(self._authors.items()))
+        total = sys.getsizeof(self._authors) + len(self._ring) * self._ring.itemsize
+        per_entry = total / len(self._authors)
+        return per_entry + sys.getsizeof(message_id) + sys.getsizeof(author_id)
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+
+class ThanksTracker:
+    """
+    In-memory cooldown and daily-limit state, per guild.
+
+    Keeps the points row of the members seen recently so `last_thanks` and the
+    daily counters can be checked without a query. A member's row is loaded
+    once from the database on first access and evicted after `ttl` seconds
+    without being accessed.
+    """
+
+    def __init__(self, loader: Callable[[int, int], Awaitable[dict]], ttl: float):
+        self.loader = loader
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        # guild_id -> user_id -> [row, expires_at]
+        self._guilds: Dict[int, Dict[int, list]] = {}
+        self._loading: Dict[Tuple[int, int], asyncio.Future] = {}
+        self._next_sweep = time.monotonic() + ttl
+
+    def __len__(self) -> int:
+        return sum(len(members) for members in self._guilds.values())
+
+    async def get(self, guild_id: int, user_id: int) -> dict:
+        """
+        Return the tracked row of a member, loading it on first access.
+
+        The returned dict is the tracked state itself: changes made to it
+        without awaiting in between are seen by every other coroutine.
+        """
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self.evict_expired(now)
+
+        members = self._guilds.get(guild_id)
+        entry = members.get(user_id) if members else None
+        if entry is not None:
+            self.hits += 1
+            entry[1] = now + self.ttl
+            return entry[0]
+
+        self.misses += 1
+        key = (guild_id, user_id)
+        loading = self._loading.get(key)
+        if loading is not None:
+            return await asyncio.shield(loading)
+
+        loading = self._loading[key] = asyncio.get_running_loop().create_future()
+        try:
+            row = await self.loader(guild_id, user_id)
+        except BaseException as e:
+            loading.set_exception(e)
+            # Consumed by the waiters if any, don't warn about it otherwise.
+            loading.exception()
+            raise
+        finally:
+            del self._loading[key]
+        self._guilds.setdefault(guild_id, {})[user_id] = [row, now + self.ttl]
+        loading.set_result(row)
+        return row
+
+    def peek(self, guild_id: int, user_id: int) -> Optional[dict]:
+        """The tracked row of a member if there is one, never loading it."""
+        members = self._guilds.get(guild_id)
+        entry = members.get(user_id) if members else None
+        return entry[0] if entry is not None else None
+
+    def forget(self, guild_id: int, user_id: int):
+        """Drop a member's row, the next access reloads it."""
+        members = self._guilds.get(guild_id)
+        if members:
+            members.pop(user_id, None)
+
+    def forget_guild(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+
+    def evict_expired(self, now: float = None):
+        now = time.monotonic() if now is None else now
+        for guild_id in list(self._guilds):
+            members = self._guilds[guild_id]
+            for user_id in [u for u, entry in members.items() if entry[1] <= now]:
+                del members[user_id]
+            if not members:
+                del self._guilds[guild_id]
+        self._next_sweep = now + self.ttl
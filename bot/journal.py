@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        # The format the backends store TIMESTAMP columns in.
+        return value.isoformat(" ")
+    raise TypeError(f"Can't journal {type(value).__name__}")
+
+
+class WriteJournal:
+    """
+    Append-only file of the writes made while the database is unreachable.
+
+    Each write is one JSON line with a unique `id`, an `op` naming the
+    ThanksDB write and its `args`. Lines are written to the file as they come
+    and fsynced together every `fsync_interval` seconds, so a crash loses at
+    most that much.
+
+    Replaying moves the file aside (`<path>.replay`) so new writes keep going
+    to a fresh file, applies its entries in order and deletes it once all are
+    applied. The database remembers the applied entry IDs, so an entry
+    replayed twice (crash in the middle of a replay) is applied once.
+    """
+
+    def __init__(self, path: str, fsync_interval: float = 0.1):
+        self.path = path
+        self.replay_path = path + ".replay"
+        self.fsync_interval = fsync_interval
+        self.appended = 0
+        self.replayed = 0
+        self.fsyncs = 0
+
+        self._file = None
+        self._entries = 0  # Lines in the current file.
+        self._dirty = asyncio.Event()
+        self._sync_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        """Entries not yet applied, a pending replay file counting as one at least."""
+        return self._entries + os.path.exists(self.replay_path)
+
+    def open(self):
+        """Open the journal, keeping the entries left by the last run."""
+        if self._file is not None:
+            return
+        self._entries = len(self._read(self.path))
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline(self.path):
+            # Don't glue the next entry to a line cut by a crash.
+            self._file.write("\n")
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._file is not None:
+            await self.sync()
+            self._file.close()
+            self._file = None
+
+    async def _run(self):
+        while True:
+            await self._dirty.wait()
+            await asyncio.sleep(self.fsync_interval)
+            try:
+                await self.sync()
+            except OSError as e:
+                print(f"[ERROR] Journal fsync failed: {e}")
+
+    # ── Writes ─────────────────────────────────────────────────────────────────
+
+    def append(self, op: str, **args) -> str:
+        """
+        Journal a write.
+
+        Args:
+            op (str): The ThanksDB method applying it.
+            **args: Its arguments, JSON serializable or datetimes.
+
+        Returns:
+            str: The ID of the entry.
+        """
+        entry_id = uuid.uuid4().hex
+        line = json.dumps({"id": entry_id, "op": op, "args": args}, default=_encode)
+        self._file.write(line + "\n")
+        self._entries += 1
+        self.appended += 1
+        self._dirty.set()
+        return entry_id
+
+    async def sync(self):
+        """Write the appended lines to disk now."""
+        async with self._sync_lock:
+            if not self._dirty.is_set() or self._file is None:
+                return
+            self._dirty.clear()
+            self._file.flush()
+            # Appends made during the fsync are marked dirty again.
+            await asyncio.get_running_loop().run_in_executor(
+                None, os.fsync, self._file.fileno()
+            )
+            self.fsyncs += 1
+
+    # ── Replay ─────────────────────────────────────────────────────────────────
+
+    async def replay(self, apply: Callable[[dict], Awaitable[bool]]) -> int:
+        """
+        Apply the journaled entries in order.
+
+        Args:
+            apply (Callable): Applies one entry, False if it was already.
+
+        Returns:
+            int: The number of entries applied.
+
+        Raises whatever `apply` raises, the entries left are replayed on the
+        next call.
+        """
+        if not os.path.exists(self.replay_path):
+            if not self._entries:
+                return 0
+            await self._rotate()
+
+        loop = asyncio.get_running_loop()
+        entries = await loop.run_in_executor(None, self._read, self.replay_path)
+        applied = 0
+        for entry in entries:
+            applied += await apply(entry)
+        os.remove(self.replay_path)
+        self.replayed += applied
+        return applied
+
+    async def _rotate(self):
+        async with self._sync_lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self.path, self.replay_path)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._entries = 0
+            self._dirty.clear()
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        with open(path, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+    @staticmethod
+    def _read(path: str) -> List[dict]:
+        if not os.path.exists(path):
+            return []
+        entries = []
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # The last line, cut by a crash before its fsync.
+                    print(f"[WARNING] Skipping a truncated line of {path}")
+        return entries
@@ -1,34 +1,129 @@
+import asyncio
 import discord
 import os
+from collections import deque
+from typing import Deque, Optional
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+# Max length of a Discord message.
+MESSAGE_LIMIT = 2000
 
 
 class Logger:
-    def __init__(self, bot: discord.Client):
+    """
+    Logs to the console and to the log channel without waiting on Discord.
+
+    Logging only appends the line to a bounded queue; a background task sends
+    the queued lines to the channel, packed into as few messages as fit in
+    2000 characters, at most one message every `interval` seconds. Lines
+    logged before `setup` has resolved the channel wait in the queue. When the
+    queue is full new lines are dropped (an error instead pushes out the oldest
+    line) and the number of dropped lines is reported with the next message.
+    """
+
+    def __init__(self, bot: discord.Client, max_lines: int = 1000, interval: float = 1):
         self.bot = bot
+        self.channel: Optional[discord.abc.Messageable] = None
+        self.level = LEVELS.get(
+            os.getenv("LOG_LEVEL", "DEBUG").upper(), LEVELS["DEBUG"]
+        )
+        self.interval = interval
+        self.dropped = 0
+        self.sent = 0
+
+        self._lines: Deque[str] = deque()
+        self._max_lines = max_lines
+        self._pending = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
 
     async def setup(self):
+        if self.channel is not None:
+            return
+
         channel_id = os.getenv("LOG_CHANNEL_ID", "0")
 
         if len(channel_id) not in [17, 18, 19]:
             raise ValueError("Channel ID invalid.")
 
         self.channel = await self.bot.fetch_channel(channel_id)
+        self._task = asyncio.create_task(self._run())
         print(
             f"[INFO] Logger initialized with channel: {self.channel.name} ({self.channel.id})"
         )
 
-    async def info(self, message: str):
-        print(f"[INFO]: {message}")
-        await self.channel.send(f"[INFO] {message}")
+    async def close(self):
+        """Send what is still queued, then stop the background task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while self._lines:
+            if not await self._send(self._next_message()):
+                break
+
+    def info(self, message: str):
+        self.log("INFO", message)
+
+    def warning(self, message: str):
+        self.log("WARNING", message)
+
+    def error(self, message: str):
+        self.log("ERROR", message)
+
+    def debug(self, message: str):
+        self.log("DEBUG", message)
+
+    def log(self, level: str, message: str):
+        levelno = LEVELS[level]
+        if levelno < self.level:
+            return
+        print(f"[{level}]: {message}")
+
+        if len(self._lines) >= self._max_lines:
+            if levelno < LEVELS["ERROR"]:
+                self.dropped += 1
+                return
+            self._lines.popleft()
+            self.dropped += 1
+        self._lines.append(f"[{level}] {message}"[:MESSAGE_LIMIT])
+        self._pending.set()
 
-    async def warning(self, message: str):
-        print(f"[WARNING]: {message}")
-        await self.channel.send(f"[WARNING] {message}")
+    def _next_message(self) -> str:
+        """Pop as many queued lines as fit in one message."""
+        content = ""
+        if self.dropped:
+            content = (
+                f"[WARNING] {self.dropped} log line(s) dropped, the log queue was full"
+            )
+            self.dropped = 0
+        while self._lines:
+            line = self._lines[0]
+            if content and len(content) + 1 + len(line) > MESSAGE_LIMIT:
+                break
+            content = f"{content}\n{line}" if content else line
+            self._lines.popleft()
+        return content
 
-    async def error(self, message: str):
-        print(f"[ERROR]: {message}")
-        await self.channel.send(f"[ERROR] {message}")
+    async def _send(self, content: str) -> bool:
+        try:
+            await self.channel.send(content)
+        except discord.DiscordException as e:
+            # Not logged again, a broken channel would feed itself.
+            print(f"[ERROR]: Failed to send logs to the log channel: {e}")
+            return False
+        self.sent += 1
+        return True
 
-    async def debug(self, message: str):
-        print(f"[DEBUG]: {message}")
-        await self.channel.send(f"[DEBUG] {message}")
+    async def _run(self):
+        while True:
+            await self._pending.wait()
+            self._pending.clear()
+            while self._lines or self.dropped:
+                await self._send(self._next_message())
+                # Lines logged meanwhile are packed into the next message.
+                await asyncio.sleep(self.interval)
@@ -0,0 +1,306 @@
+"""
+Prometheus metrics of the bot, served as text on an optional local endpoint.
+
+The metrics below are updated from the event loop and from the database
+threads, each with a short lock; the server only formats them when scraped.
+"""
+
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+_registry: List["_Metric"] = []
+
+
+def _format_labels(names: Tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels[name] for name in self.labels)
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    """A value read when scraped, from `set` or from a function."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        function: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation)
+        self.function = function
+        self._value = 0.0
+
+    def set(self, value: float):
+        self._value = value
+
+    def render(self) -> List[str]:
+        value = self.function() if self.function is not None else self._value
+        return super().render() + [f"{self.name} {value}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+        # labels -> [count per bucket (+Inf last), sum]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        # Buckets are cumulative when rendered, only the first one is counted.
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts[0][index] += 1
+            counts[1] += value
+
+    def time(self, **labels) -> "_Timer":
+        """Context manager observing the time spent in its block."""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        counts = self._values.get(self._key(labels))
+        return sum(counts[0]) if counts else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            values = [
+                (key, list(counts[0]), counts[1])
+                for key, counts in self._values.items()
+            ]
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labels, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+def render() -> str:
+    """All the metrics in the Prometheus text format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ── Metrics ────────────────────────────────────────────────────────────────
+
+messages_seen = Counter("thanks_messages_total", "Messages received by on_message")
+prefilter_dropped = Counter(
+    "thanks_prefilter_dropped_total",
+    "Messages dropped by the gateway prefilter, never parsed nor seen by on_message",
+)
+thank_matches = Counter("thanks_matches_total", "Messages containing a thank word")
+awards = Counter("thanks_awards_total", "Points awarded")
+rejections = Counter(
+    "thanks_rejections_total",
+    "Thanks that gave no point, by reason (cooldown, daily_limit, db_unavailable)",
+    ("reason",),
+)
+message_seconds = Histogram(
+    "thanks_message_seconds", "Time spent handling a message in on_message"
+)
+stage_seconds = Histogram(
+    "thanks_stage_seconds",
+    "Time spent in each stage of process_message (match, fetch, db, send)",
+    ("stage",),
+)
+db_query_seconds = Histogram(
+    "thanks_db_query_seconds", "ThanksDB query latency by table", ("table",)
+)
+db_query_errors = Counter(
+    "thanks_db_query_errors_total", "ThanksDB queries that raised, by table", ("table",)
+)
+db_circuit_open = Gauge(
+    "thanks_db_circuit_open", "1 while the database circuit breaker is open"
+)
+db_journal_entries = Gauge(
+    "thanks_db_journal_entries", "Writes journaled and not yet replayed"
+)
+background_tasks = Gauge(
+    "thanks_background_tasks", "Pending PointsManager background tasks"
+)
+dispatch_queue_depth = Gauge(
+    "thanks_dispatch_queue_depth", "Messages waiting in the dispatcher queues"
+)
+dispatch_wait_seconds = Histogram(
+    "thanks_dispatch_wait_seconds", "Time a message waited in a dispatcher queue"
+)
+dispatch_shed = Counter(
+    "thanks_dispatch_shed_total", "Messages dropped because their queue was full"
+)
+outbound_queue_depth = Gauge(
+    "thanks_outbound_queue_depth",
+    "Discord REST calls waiting in the outbound scheduler",
+)
+outbound_wait_seconds = Histogram(
+    "thanks_outbound_wait_seconds",
+    "Time a REST call waited for its route's rate limit, by route kind",
+    ("kind",),
+)
+outbound_actions = Counter(
+    "thanks_outbound_actions_total",
+    "REST calls made by the outbound scheduler, by route kind",
+    ("kind",),
+)
+autorole_backfill_members = Counter(
+    "thanks_autorole_backfill_members_total",
+    "Qualifying members checked by autorole backfill jobs",
+)
+thanks_events_pending = Gauge(
+    "thanks_events_pending", "Thanks events waiting to be appended to the log"
+)
+reply_cache_entries = Gauge(
+    "thanks_reply_cache_entries", "Messages in the reply author cache"
+)
+reply_cache_entry_bytes = Gauge(
+    "thanks_reply_cache_entry_bytes", "Memory per entry of the reply author cache"
+)
+loop_lag_seconds = Histogram(
+    "thanks_event_loop_lag_seconds",
+    "How late the event loop woke up a sleeping task",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+class MetricsServer:
+    """
+    Serves `render()` on http://host:port/metrics and samples event-loop lag.
+
+    Lag is measured by sleeping `lag_interval` seconds and recording how much
+    later than asked the loop woke the task up.
+    """
+
+    def __init__(self, host: str, port: int, lag_interval: float = 0.5):
+        self.host = host
+        self.port = port
+        self.lag_interval = lag_interval
+        self._runner: Optional[web.AppRunner] = None
+        self._lag_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._lag_task = asyncio.create_task(self._sample_lag())
+        print(f"[INFO] Metrics served on http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, _: web.Request) -> web.Response:
+        return web.Response(text=render(), content_type="text/plain", charset="utf-8")
+
+    async def _sample_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            loop_lag_seconds.observe(max(0.0, loop.time() - start - self.lag_interval))
@@ -0,0 +1,263 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+from bot import metrics
+
+# Lower runs first.
+PRIORITY_CONFIRMATION = 0
+PRIORITY_ROLE = 1
+PRIORITY_DM = 2
+PRIORITY_BACKFILL = 3  # Autoroles given to members who already qualified.
+
+# Route kind -> (requests per second, burst). Routes are "<kind>:<id>", each
+# with its own bucket; kinds missing here are not throttled. Kept under
+# Discord's limits so bursts wait here instead of in 429 retries.
+DEFAULT_LIMITS: Dict[str, Tuple[float, int]] = {
+    "channel": (1.0, 5),  # Messages sent or edited, per channel: 5 per 5s.
+    "roles": (1.0, 10),  # Role grants, per guild.
+    "members": (5.0, 10),  # Member fetches, per guild.
+    "messages": (1.0, 5),  # Fetches of replied-to messages, per channel.
+    "dm": (0.5, 5),  # DMs, all members together.
+}
+
+
+class TokenBucket:
+    """`burst` tokens, refilled at `rate` per second."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_at(self, now: float) -> float:
+        """When the next token is available, `now` if one is."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return now
+        return now + (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "route", "action", "key", "future", "queued_at")
+
+    def __init__(self, priority, seq, route, action, key, future):
+        self.priority = priority
+        self.seq = seq
+        self.route = route
+        self.action = action
+        self.key = key
+        self.future = future
+        self.queued_at = time.monotonic()
+
+
+class OutboundScheduler:
+    """
+    Single way out for the bot's Discord REST calls that can wait.
+
+    Actions are queued per route and each route is throttled by a token
+    bucket (`limits`). Whenever fewer than `max_concurrency` actions are
+    running, the next one started is the most urgent (priority, then order
+    of arrival) among the routes that have a token, so a throttled route
+    never holds up the others; within a route, an action goes ahead of the
+    queued ones of a lower priority. An action submitted with the `key` of one
+    still queued or running is not run again: the caller shares its result.
+    """
+
+    MAX_IDLE_BUCKETS = 1000
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, int]]] = None,
+        max_concurrency: int = 4,
+    ):
+        self.limits = DEFAULT_LIMITS if limits is None else limits
+        self.max_concurrency = max_concurrency
+        self.done = 0
+        self.failed = 0
+        self.deduplicated = 0
+
+        self._routes: Dict[str, Deque[_Job]] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._keys: Dict[Hashable, asyncio.Future] = {}
+        self._running = 0
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._jobs: set = set()
+
+    def __len__(self) -> int:
+        """Actions queued, not yet started."""
+        return sum(len(jobs) for jobs in self._routes.values())
+
+    def pending(self, key: Hashable) -> bool:
+        """Whether an action with this key is queued or running."""
+        return key in self._keys
+
+    def stats(self) -> dict:
+        """Queued actions per priority, and counters since start."""
+        queued: Dict[int, int] = {}
+        for jobs in self._routes.values():
+            for job in jobs:
+                queued[job.priority] = queued.get(job.priority, 0) + 1
+        return {
+            "queued": queued,
+            "routes": len(self._routes),
+            "running": self._running,
+            "done": self.done,
+            "failed": self.failed,
+            "deduplicated": self.deduplicated,
+        }
+
+    async def close(self):
+        """Stop starting actions, the queued ones are cancelled."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in list(self._jobs):
+            task.cancel()
+        for jobs in self._routes.values():
+            for job in jobs:
+                job.future.cancel()
+        self._routes.clear()
+        self._keys.clear()
+
+    async def run(
+        self,
+        route: str,
+        action: Callable[[], Awaitable[Any]],
+        priority: int = PRIORITY_DM,
+        key: Hashable = None,
+    ):
+        """
+        Run an action once its route allows it, and return its result.
+
+        Args:
+            route (str): "<kind>:<id>", e.g. "channel:123", the bucket used.
+            action (Callable): Makes the call, e.g. `lambda: member.send(...)`.
+            priority (int, optional): PRIORITY_*, lower runs first.
+            key (Hashable, optional): Identifies duplicate actions.
+        """
+        if key is not None and key in self._keys:
+            self.deduplicated += 1
+            return await asyncio.shield(self._keys[key])
+
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(priority, next(self._seq), route, action, key, future)
+        if key is not None:
+            self._keys[key] = future
+        jobs = self._routes.setdefault(route, deque())
+        if jobs and jobs[-1].priority > priority:
+            index = next(
+                i for i, queued in enumerate(jobs) if queued.priority > priority
+            )
+            jobs.insert(index, job)
+        else:
+            jobs.append(job)
+        if self._task is None:
+            self._task = asyncio.create_task(self._dispatch())
+        self._wakeup.set()
+        return await asyncio.shield(future)
+
+    def _bucket(self, route: str) -> Optional[TokenBucket]:
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            limit = self.limits.get(route.partition(":")[0])
+            if limit is None:
+                return None
+            bucket = self._buckets[route] = TokenBucket(*limit)
+        return bucket
+
+    def _next_job(self, now: float) -> Tuple[Optional[_Job], float]:
+        """The most urgent job whose route has a token, or when one will."""
+        best, wake_at = None, float("inf")
+        for route, jobs in self._routes.items():
+            bucket = self._bucket(route)
+            ready_at = bucket.ready_at(now) if bucket is not None else now
+            if ready_at > now:
+                wake_at = min(wake_at, ready_at)
+            elif best is None or (jobs[0].priority, jobs[0].seq) < (
+                best.priority,
+                best.seq,
+            ):
+                best = jobs[0]
+        return best, wake_at
+
+    async def _dispatch(self):
+        while True:
+            self._wakeup.clear()
+            wake_at = None
+            while self._running < self.max_concurrency:
+                now = time.monotonic()
+                job, wake_at = self._next_job(now)
+                if job is None:
+                    break
+                self._start(job, now)
+                wake_at = None
+            timeout = None
+            if wake_at is not None and wake_at != float("inf"):
+                timeout = wake_at - time.monotonic()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _start(self, job: _Job, now: float):
+        jobs = self._routes[job.route]
+        jobs.popleft()
+        if not jobs:
+            del self._routes[job.route]
+        bucket = self._bucket(job.route)
+        if bucket is not None:
+            bucket.take(now)
+            if len(self._buckets) > self.MAX_IDLE_BUCKETS:
+                self._prune(now)
+
+        kind = job.route.partition(":")[0]
+        metrics.outbound_wait_seconds.observe(now - job.queued_at, kind=kind)
+        self._running += 1
+        task = asyncio.create_task(self._execute(job, kind))
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+
+    def _prune(self, now: float):
+        """Drop the buckets of idle routes that refilled, a new one is the same."""
+        for route, bucket in list(self._buckets.items()):
+            if route not in self._routes:
+                bucket.ready_at(now)
+                if bucket.tokens >= bucket.burst:
+                    del self._buckets[route]
+
+    async def _execute(self, job: _Job, kind: str):
+        try:
+            result = await job.action()
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as e:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+                # Consumed by the callers if any, don't warn about it otherwise.
+                job.future.exception()
+        else:
+            self.done += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            metrics.outbound_actions.inc(kind=kind)
+            if job.key is not None and self._keys.get(job.key) is job.future:
+                del self._keys[job.key]
+            self._running -= 1
+            self._wakeup.set()
@@ -0,0 +1,163 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+
+
+class PoolTimeout(mysql.connector.errors.PoolError):
+    """Raised when no connection could be checked out in time."""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of MySQL connections.
+
+    Connections are created on demand up to `max_size` and handed out LIFO so
+    the hottest ones are reused. A connection that sat idle for longer than
+    `ping_after` seconds is pinged on checkout and replaced if it is dead, and
+    connections idle for longer than `idle_timeout` are closed as long as the
+    pool stays above `min_size`.
+    """
+
+    def __init__(
+        self,
+        min_size: int = 1,
+        max_size: int = 5,
+        checkout_timeout: float = 10,
+        idle_timeout: float = 300,
+        ping_after: float = 30,
+        **connect_kwargs,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size.")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.connect_kwargs = connect_kwargs
+
+        self._idle: list = []  # (connection, last_used) pairs, most recent last
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def _create(self):
+        return mysql.connector.connect(autocommit=True, **self.connect_kwargs)
+
+    def open(self):
+        """Create the first `min_size` connections, raising if the server is unreachable."""
+        with self._cond:
+            self._closed = False
+        conns = [self._create() for _ in range(self.min_size)]
+        now = time.monotonic()
+        with self._cond:
+            self._size += len(conns)
+            self._idle.extend((conn, now) for conn in conns)
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """Check a connection out for the duration of the block."""
+        conn = self.checkout()
+        try:
+            yield conn
+        except (mysql.connector.InterfaceError, mysql.connector.OperationalError):
+            self.release(conn, discard=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def checkout(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            conn, last_used = self._reserve(deadline)
+            if conn is None:
+                try:
+                    return self._create()
+                except BaseException:
+                    self._forget()
+                    raise
+            if time.monotonic() - last_used < self.ping_after or self._is_alive(conn):
+                return conn
+            self._close_quietly(conn)
+            self._forget()
+
+    def _reserve(self, deadline: float):
+        """Take an idle connection, or a free slot to create one (None)."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise mysql.connector.errors.PoolError("Pool is closed.")
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, 0
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"No connection available after {self.checkout_timeout}s."
+                    )
+                self._cond.wait(remaining)
+
+    def release(self, conn, discard: bool = False):
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            if discard or self._closed:
+                expired.append(conn)
+                self._size -= 1
+            else:
+                self._idle.append((conn, now))
+            # Oldest idle connections sit at the front of the list.
+            while (
+                self._idle
+                and self._size > self.min_size
+                and now - self._idle[0][1] > self.idle_timeout
+            ):
+                expired.append(self._idle.pop(0)[0])
+                self._size -= 1
+            self._cond.notify()
+        for old in expired:
+            self._close_quietly(old)
+
+    def _forget(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_alive(conn) -> bool:
+        try:
+            return conn.is_connected()
+        except mysql.connector.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except mysql.connector.Error:
+            pass
@@ -0,0 +1,63 @@
+from typing import Callable
+
+from bot import metrics
+
+
+class GatewayPrefilter:
+    """
+    Drops MESSAGE_CREATE events that can't be a thanks before discord.py
+    builds a Message for them.
+
+    Wraps the parser of the connection state, so the checks of on_message
+    and process_message that need no database run on the decoded gateway
+    dict: bot author, blacklisted channel, no mention nor reply, no thank
+    word. Only the remaining candidates are parsed and dispatched; dropped
+    messages never reach on_message nor discord.py's message cache, only
+    their author is kept in the reply author cache.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.seen = 0
+        self.dropped = 0
+        self._parse: Callable[[dict], None] = None
+
+    def install(self):
+        parsers = self.client._connection.parsers
+        if self._parse is None:
+            self._parse = parsers["MESSAGE_CREATE"]
+            parsers["MESSAGE_CREATE"] = self.parse_message_create
+
+    def parse_message_create(self, data: dict):
+        self.seen += 1
+        if "guild_id" in data:
+            # Dropped messages can still be replied to with a thanks.
+            self.client.points_event.reply_authors.add(
+                int(data["id"]), int(data["author"]["id"])
+            )
+        if self.is_candidate(data):
+            self._parse(data)
+        else:
+            self.dropped += 1
+            metrics.prefilter_dropped.inc()
+
+    def is_candidate(self, data: dict) -> bool:
+        """Whether a MESSAGE_CREATE payload may be a thanks."""
+        if data.get("author", {}).get("bot"):
+            return False
+        guild_id = data.get("guild_id")
+        if guild_id is None:
+            return False
+        if not data.get("mentions") and not data.get("message_reference"):
+            return False
+
+        guild_id = int(guild_id)
+        guild_config = self.client.guilds_config.get(guild_id)
+        if (
+            guild_config
+            and int(data["channel_id"]) in guild_config["blacklisted_channel"]
+        ):
+            return False
+        return self.client.points_event.validator.is_thank_content(
+            guild_id, data.get("content", "")
+        )
@@ -0,0 +1,14 @@
+import pytest
+
+from bot.backends.sqlite import SQLiteBackend
+from bot.database import TableName, ThanksDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A ThanksDB on a fresh SQLite database, with the guild 1."""
+    db = ThanksDB(backend=SQLiteBackend(str(tmp_path / "thanks.db")))
+    db.init_db()
+    db.insert(TableName.GUILDS.value, {"guild_id": 1})
+    yield db
+    db.close()
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from bot.database import TableName
+
+GUILD_ID = 1
+NOW = datetime(2026, 1, 1, 12)
+
+
+def points(db, user_id: int) -> dict:
+    rows = db.select(
+        TableName.POINTS.value,
+        where={"guild_id": GUILD_ID, "discord_user_id": user_id},
+    )
+    return rows[0] if rows else None
+
+
+def test_award_points_creates_then_adds(db):
+    assert db.award_points(GUILD_ID, 10, 1, 5, NOW) == 1
+    assert db.award_points(GUILD_ID, 10, 2, 5, NOW) == 3
+
+    row = points(db, 10)
+    assert row["points"] == 3
+    assert row["current_day_received_points"] == 2
+    assert row["num_of_thanks"] == 0
+
+
+def test_award_points_stops_at_daily_limit(db):
+    totals = [db.award_points(GUILD_ID, 10, 1, 3, NOW) for _ in range(5)]
+
+    assert totals == [1, 2, 3, None, None]
+    assert points(db, 10)["points"] == 3
+
+
+def test_daily_window_starts_at_first_award(db):
+    assert db.award_points(GUILD_ID, 10, 1, 2, NOW) == 1
+    assert db.award_points(GUILD_ID, 10, 1, 2, NOW + timedelta(hours=23)) == 2
+    assert (
+        db.award_points(GUILD_ID, 10, 1, 2, NOW + timedelta(hours=23, minutes=30))
+        is None
+    )
+
+    # 24 hours after the first award of the window, not after the last one.
+    later = NOW + timedelta(hours=24, minutes=1)
+    assert db.award_points(GUILD_ID, 10, 1, 2, later) == 3
+    row = points(db, 10)
+    assert row["current_day_received_points"] == 1
+    assert row["last_received_points_date"] == later
+
+
+def test_daily_limit_is_per_member(db):
+    assert db.award_points(GUILD_ID, 10, 1, 1, NOW) == 1
+    assert db.award_points(GUILD_ID, 10, 1, 1, NOW) is None
+    assert db.award_points(GUILD_ID, 11, 1, 1, NOW) == 1
+
+
+def test_record_thanks_counts_messages(db):
+    db.record_thanks(GUILD_ID, 10, NOW)
+    db.record_thanks(GUILD_ID, 10, NOW + timedelta(minutes=1))
+
+    row = points(db, 10)
+    assert row["num_of_thanks"] == 2
+    assert row["last_thanks"] == NOW + timedelta(minutes=1)
+    assert row["points"] == 0
+    # Thanking doesn't open a daily window for received points.
+    assert db.award_points(GUILD_ID, 10, 1, 1, NOW) == 1
+
+
+def test_points_page_follows_keyset_cursor(db):
+    for user_id, total in ((10, 3), (11, 5), (12, 3), (13, 1)):
+        db.award_points(GUILD_ID, user_id, total, 10, NOW)
+
+    first = db.points_page(GUILD_ID, 2)
+    assert [row["discord_user_id"] for row in first] == [11, 12]
+    last = first[-1]
+    rest = db.points_page(GUILD_ID, 2, after=(last["points"], last["discord_user_id"]))
+    assert [row["discord_user_id"] for row in rest] == [10, 13]
+
+
+def test_award_points_needs_the_guild(db):
+    with pytest.raises(db.backend.errors):
+        db.award_points(GUILD_ID + 1, 10, 1, 5, NOW)
@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bot.database import AsyncThanksDB
+from bot.events.history import ThanksHistory
+
+GUILD_ID = 1
+
+
+def run(db, record, rollup_chunk: int = 1000):
+    """Record the events with `record(history)`, then flush and roll them up."""
+
+    async def main():
+        adb = AsyncThanksDB(db)
+        history = ThanksHistory(adb, rollup_chunk=rollup_chunk)
+        record(history)
+        await history.flush()
+        await history.rollup()
+        await adb.close()
+        return history
+
+    return asyncio.run(main())
+
+
+def today(db, user_id: int) -> tuple:
+    since = datetime.now() - timedelta(days=1)
+    rows = db.thanks_rollup(GUILD_ID, user_id, "day", since)
+    return sum(row["received"] for row in rows), sum(row["given"] for row in rows)
+
+
+def record_messages(history):
+    history.record(GUILD_ID, 10, [20, 21, 22], 5, 100)
+    history.record(GUILD_ID, 10, [20], 5, 101)
+    history.record(GUILD_ID, 11, [10, 20], 5, 102)
+
+
+def test_rollup_counts_received_per_event_and_given_per_message(db):
+    history = run(db, record_messages)
+
+    assert history.events_rolled_up == 6
+    assert today(db, 10) == (1, 2)
+    assert today(db, 11) == (0, 1)
+    assert today(db, 20) == (3, 0)
+
+
+def test_message_split_across_rollup_chunks_is_given_once(db):
+    run(db, record_messages, rollup_chunk=2)
+
+    assert today(db, 10) == (1, 2)
+    assert today(db, 11) == (0, 1)
+
+
+def test_rollup_is_not_repeated(db):
+    run(db, record_messages)
+    run(db, lambda history: None)
+
+    assert today(db, 20) == (3, 0)
+
+
+def test_window_page_reads_the_rolled_up_window(db):
+    run(db, record_messages)
+
+    page = db.window_page(GUILD_ID, "week", 10)
+    assert [(row["discord_user_id"], row["points"]) for row in page] == [
+        (20, 3),
+        (22, 1),
+        (21, 1),
+        (10, 1),
+    ]
+    assert page[-1]["num_of_thanks"] == 2
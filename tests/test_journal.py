@@ -0,0 +1,154 @@
+import asyncio
+import json
+from datetime import datetime
+
+from bot.database import AsyncThanksDB, TableName
+from bot.journal import WriteJournal
+
+GUILD_ID = 1
+NOW = datetime(2026, 1, 1, 12)
+
+
+def entry(entry_id: str, op: str, **args) -> dict:
+    return {"id": entry_id, "op": op, "args": args}
+
+
+def award(entry_id: str, user_id: int = 10, daily_limit: int = 5) -> dict:
+    return entry(
+        entry_id,
+        "award_points",
+        guild_id=GUILD_ID,
+        user_id=user_id,
+        points_delta=1,
+        daily_limit=daily_limit,
+        now=NOW.isoformat(" "),
+    )
+
+
+def points(db, user_id: int = 10) -> dict:
+    return db.select(
+        TableName.POINTS.value,
+        where={"guild_id": GUILD_ID, "discord_user_id": user_id},
+    )[0]
+
+
+def test_entry_applied_once(db):
+    assert db.apply_journal_entry(award("a")) is True
+    assert db.apply_journal_entry(award("a")) is False
+    assert db.apply_journal_entry(award("b")) is True
+
+    assert points(db)["points"] == 2
+
+
+def test_journaled_award_keeps_its_time_and_limit(db):
+    for entry_id in "abc":
+        db.apply_journal_entry(award(entry_id, daily_limit=2))
+
+    row = points(db)
+    assert row["points"] == 2
+    assert row["last_received_points_date"] == NOW
+
+
+def test_replays_every_op(db):
+    db.apply_journal_entry(award("a"))
+    db.apply_journal_entry(
+        entry(
+            "b", "record_thanks", guild_id=GUILD_ID, user_id=10, now=NOW.isoformat(" ")
+        )
+    )
+    db.apply_journal_entry(
+        entry(
+            "c",
+            "upsert",
+            table=TableName.POINTS.value,
+            rows=[
+                {
+                    "guild_id": GUILD_ID,
+                    "discord_user_id": 10,
+                    "points": 4,
+                    "num_of_thanks": 1,
+                }
+            ],
+            increment=["points", "num_of_thanks"],
+        )
+    )
+    db.apply_journal_entry(
+        entry(
+            "d",
+            "insert_many",
+            table=TableName.THANKS_EVENTS.value,
+            rows=[
+                {
+                    "guild_id": GUILD_ID,
+                    "giver_id": 10,
+                    "receiver_id": receiver_id,
+                    "channel_id": 5,
+                    "message_id": 100,
+                    "created_at": NOW.isoformat(" "),
+                }
+                for receiver_id in (11, 12)
+            ],
+        )
+    )
+
+    row = points(db)
+    assert (row["points"], row["num_of_thanks"]) == (5, 2)
+    assert len(db.select(TableName.THANKS_EVENTS.value)) == 2
+
+
+def test_clear_marks_forgets_applied_ids(db):
+    db.apply_journal_entry(award("a"))
+    db.clear_journal_marks()
+
+    assert db.select(TableName.JOURNAL_APPLIED.value) == []
+
+
+def write_journal(path: str, entries):
+    with open(path, "a", encoding="utf-8") as file:
+        for item in entries:
+            file.write(json.dumps(item) + "\n")
+
+
+def open_and_close(db, path: str):
+    async def run():
+        adb = AsyncThanksDB(db, journal=WriteJournal(path))
+        await adb.open()
+        await adb.close()
+
+    asyncio.run(run())
+
+
+def test_open_replays_the_last_run_journal(db, tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    write_journal(path, [award("a"), award("b", user_id=11)])
+
+    open_and_close(db, path)
+
+    assert points(db, 10)["points"] == 1
+    assert points(db, 11)["points"] == 1
+    assert not (tmp_path / "journal.jsonl.replay").exists()
+    assert (tmp_path / "journal.jsonl").read_text() == ""
+
+
+def test_replay_interrupted_by_a_crash_applies_each_entry_once(db, tmp_path):
+    # The crash came after "a" was applied, before the file was deleted.
+    path = str(tmp_path / "journal.jsonl")
+    db.apply_journal_entry(award("a"))
+    write_journal(path + ".replay", [award("a"), award("b")])
+    write_journal(path, [award("c")])
+
+    open_and_close(db, path)
+
+    assert points(db)["points"] == 3
+    assert not (tmp_path / "journal.jsonl.replay").exists()
+
+
+def test_truncated_last_line_is_skipped(db, tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    write_journal(path, [award("a")])
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(json.dumps(award("b"))[:20])
+
+    open_and_close(db, path)
+
+    assert points(db)["points"] == 1